@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="useractivity",
+            index=models.Index(
+                fields=["user", "-timestamp"], name="useractivity_user_recent_idx"
+            ),
+        ),
+    ]
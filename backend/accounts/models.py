@@ -127,6 +127,9 @@ class UserActivity(models.Model):
         verbose_name = 'User Activity'
         verbose_name_plural = 'User Activities'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='useractivity_user_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.activity_type} at {self.timestamp}"
@@ -90,6 +90,16 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'email_verified', 'created_at', 'updated_at']
 
 
+class PublicUserSerializer(serializers.ModelSerializer):
+    """Public, read-only summary of a user (for expanded relations)."""
+    full_name = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'full_name', 'avatar', 'user_type']
+        read_only_fields = fields
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating user information."""
     class Meta:
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="blogcomment",
+            index=models.Index(
+                condition=models.Q(("is_approved", True)),
+                fields=["post", "created_at"],
+                name="blogcomment_approved_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("status", "published")),
+                fields=["-created_at"],
+                name="blogpost_published_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_active", True), ("is_featured", True), ("status", "published")
+                ),
+                fields=["-created_at"],
+                name="blogpost_featured_recent_idx",
+            ),
+        ),
+    ]
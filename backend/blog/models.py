@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
@@ -103,6 +104,15 @@ class BlogPost(models.Model):
         verbose_name = _('blog post')
         verbose_name_plural = _('blog posts')
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            models.Index(
+                fields=['-created_at'], condition=Q(status='published', is_active=True), name='blogpost_published_recent_idx',
+            ),
+            models.Index(
+                fields=['-created_at'], condition=Q(status='published', is_active=True, is_featured=True),
+                name='blogpost_featured_recent_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -122,10 +132,16 @@ class BlogPost(models.Model):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
     
-    def increment_views(self):
-        """Increment view count."""
+    def increment_views(self, user=None, ip_address=None, user_agent=''):
+        """Record a view of this post.
+
+        The ``BlogView`` row is the only source of the ``views`` counter: its
+        ``post_save`` signal buffers the increment, and ``reconcile_counters``
+        recounts these rows.
+        """
+        view = BlogView.objects.create(post=self, user=user, ip_address=ip_address, user_agent=user_agent)
         self.views += 1
-        self.save(update_fields=['views'])
+        return view
     
     @property
     def is_published(self):
@@ -159,6 +175,9 @@ class BlogComment(models.Model):
         verbose_name = _('blog comment')
         verbose_name_plural = _('blog comments')
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'created_at'], condition=Q(is_approved=True), name='blogcomment_approved_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
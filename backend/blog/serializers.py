@@ -1,39 +1,51 @@
 # backend/blog/serializers.py
 from rest_framework import serializers
+from core.serializers import DynamicFieldsModelSerializer
 from .models import BlogPost, BlogCategory, BlogTag, BlogComment, BlogLike, BlogBookmark, BlogNewsletter
 
-class BlogCategorySerializer(serializers.ModelSerializer):
+class BlogCategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogCategory
         fields = '__all__'
 
-class BlogTagSerializer(serializers.ModelSerializer):
+class BlogTagSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogTag
         fields = '__all__'
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogPost
         fields = '__all__'
+        expandable_fields = {
+            'author': 'accounts.serializers.PublicUserSerializer',
+            'category': BlogCategorySerializer,
+            'tags': (BlogTagSerializer, {'many': True}),
+        }
 
-class BlogCommentSerializer(serializers.ModelSerializer):
+class BlogCommentSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogComment
         fields = '__all__'
+        expandable_fields = {
+            'author': 'accounts.serializers.PublicUserSerializer',
+            'post': BlogPostSerializer,
+        }
 
-class BlogLikeSerializer(serializers.ModelSerializer):
+class BlogLikeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogLike
         fields = '__all__'
 
-class BlogBookmarkSerializer(serializers.ModelSerializer):
+class BlogBookmarkSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogBookmark
         fields = '__all__'
+        expandable_fields = {
+            'post': BlogPostSerializer,
+        }
 
-class BlogNewsletterSerializer(serializers.ModelSerializer):
+class BlogNewsletterSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogNewsletter
         fields = '__all__'
-
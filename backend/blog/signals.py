@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.counters import decrement, increment
+
+from .models import BlogComment, BlogLike, BlogPost, BlogView
+
+
+@receiver(post_save, sender=BlogLike)
+def count_like(sender, instance, created, **kwargs):
+    """Count a new like on its post."""
+    if created:
+        increment(BlogPost, instance.post_id, 'likes')
+
+
+@receiver(post_delete, sender=BlogLike)
+def uncount_like(sender, instance, **kwargs):
+    """Remove a deleted like from its post."""
+    decrement(BlogPost, instance.post_id, 'likes')
+
+
+@receiver(post_save, sender=BlogComment)
+def count_comment(sender, instance, created, **kwargs):
+    """Count a new comment on its post."""
+    if created:
+        increment(BlogPost, instance.post_id, 'comment_count')
+
+
+@receiver(post_delete, sender=BlogComment)
+def uncount_comment(sender, instance, **kwargs):
+    """Remove a deleted comment from its post."""
+    decrement(BlogPost, instance.post_id, 'comment_count')
+
+
+@receiver(post_save, sender=BlogView)
+def count_view(sender, instance, created, **kwargs):
+    """Count a recorded view on its post."""
+    if created:
+        increment(BlogPost, instance.post_id, 'views')
@@ -3,13 +3,16 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django.shortcuts import get_object_or_404
+
+from core.views import ValuesListMixin
+
 from .models import BlogPost, BlogCategory, BlogTag, BlogComment, BlogLike, BlogBookmark, BlogNewsletter
 from .serializers import (
     BlogPostSerializer, BlogCategorySerializer, BlogTagSerializer,
     BlogCommentSerializer, BlogLikeSerializer, BlogBookmarkSerializer, BlogNewsletterSerializer
 )
 
-class BlogPostListView(generics.ListAPIView):
+class BlogPostListView(ValuesListMixin, generics.ListAPIView):
     """List all blog posts."""
     queryset = BlogPost.objects.filter(status='published', is_active=True).order_by('-created_at')
     serializer_class = BlogPostSerializer
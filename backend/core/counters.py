@@ -0,0 +1,194 @@
+"""
+Buffered counters for denormalized statistics columns.
+
+Increments are accumulated in a process-wide buffer and written in batches
+as ``UPDATE ... SET field = field + n`` statements, grouped so that every
+row/field pair receives at most one UPDATE per flush. Nothing is read back
+before writing, so concurrent increments are never lost, and hot rows such
+as a popular blog post's ``views`` are touched once per flush instead of
+once per request.
+
+The buffer is flushed when it holds ``COUNTER_FLUSH_THRESHOLD`` pending
+increments, ``COUNTER_FLUSH_INTERVAL`` seconds after the first pending
+increment, and at interpreter exit. ``counters_flushed`` is sent after
+every flush that wrote rows, so cached copies of the counted rows can be
+invalidated.
+"""
+import atexit
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.dispatch import Signal
+
+# Sent once a flush has been written; ``models`` is the set of models whose
+# counters changed.
+counters_flushed = Signal()
+
+
+class CounterBuffer:
+    """Thread-safe accumulator of pending counter increments."""
+
+    def __init__(self, flush_threshold=None, flush_interval=None):
+        self._flush_threshold = flush_threshold
+        self._flush_interval = flush_interval
+        self._pending = defaultdict(int)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def flush_threshold(self):
+        if self._flush_threshold is not None:
+            return self._flush_threshold
+        return getattr(settings, 'COUNTER_FLUSH_THRESHOLD', 500)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5.0)
+
+    def add(self, model, pk, field, delta=1):
+        """Buffer ``delta`` for ``model.field`` on the row with primary key ``pk``."""
+        if not delta:
+            return
+        with self._lock:
+            self._pending[(model, field, pk)] += delta
+            self._size += 1
+            should_flush = self._size >= self.flush_threshold
+            if not should_flush and self._timer is None and self.flush_interval > 0:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if should_flush:
+            self.flush()
+
+    def pending(self):
+        """Return a snapshot of the buffered deltas."""
+        with self._lock:
+            return dict(self._pending)
+
+    def get_pending(self, model, pk, field):
+        """Return the buffered (not yet flushed) delta for one row/field."""
+        with self._lock:
+            return self._pending.get((model, field, pk), 0)
+
+    def _drain(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(int)
+            self._size = 0
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return pending
+
+    def flush(self):
+        """Write every buffered delta to the database; return the rows updated."""
+        with self._flush_lock:
+            pending = self._drain()
+            # Group rows receiving the same delta on the same field so each
+            # group is a single UPDATE ... WHERE pk IN (...).
+            groups = defaultdict(list)
+            for (model, field, pk), delta in pending.items():
+                if delta:
+                    groups[(model, field, delta)].append(pk)
+
+            updated = 0
+            try:
+                with transaction.atomic():
+                    for (model, field, delta), pks in groups.items():
+                        expression = F(field) + delta
+                        if delta < 0:
+                            expression = Greatest(expression, 0)
+                        updated += model._default_manager.filter(pk__in=pks).update(**{field: expression})
+            except Exception:
+                # Put the deltas back so they are retried on the next flush.
+                with self._lock:
+                    for key, delta in pending.items():
+                        self._pending[key] += delta
+                        self._size += 1
+                raise
+            if updated:
+                counters_flushed.send(sender=type(self), models={model for model, _, _ in groups})
+            return updated
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+counter_buffer = CounterBuffer()
+atexit.register(counter_buffer.flush)
+
+
+def increment(model, pk, field, delta=1):
+    """Increment a counter column once the current transaction commits."""
+    transaction.on_commit(lambda: counter_buffer.add(model, pk, field, delta))
+
+
+def decrement(model, pk, field, delta=1):
+    """Decrement a counter column (never below zero) once the transaction commits."""
+    increment(model, pk, field, -delta)
+
+
+def flush_counters():
+    """Flush the process-wide counter buffer."""
+    return counter_buffer.flush()
+
+
+def reconcile_counters(model, counters, chunk_size=1000, stdout=None):
+    """Recompute counter columns of ``model`` from their source tables.
+
+    ``counters`` maps a field name to ``(source_queryset, foreign_key)``; the
+    field is set to the number of source rows pointing at each instance. An
+    optional third element replaces ``Count('pk')`` with another aggregate,
+    e.g. ``Sum('rating')``.
+
+    Rows are processed in primary-key chunks: one grouped COUNT per counter
+    and one ``bulk_update`` of the changed rows per chunk.
+    """
+    fields = list(counters)
+    updated = 0
+    last_pk = None
+    while True:
+        chunk = model._default_manager.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk.values('pk', *fields)[:chunk_size])
+        if not rows:
+            break
+        pks = [row['pk'] for row in rows]
+        last_pk = pks[-1]
+
+        actual = {}
+        for field, (source, foreign_key, *aggregate) in counters.items():
+            counts = (
+                source.filter(**{f'{foreign_key}__in': pks})
+                .order_by()
+                .values(foreign_key)
+                .annotate(total=aggregate[0] if aggregate else Count('pk'))
+                .values_list(foreign_key, 'total')
+            )
+            actual[field] = {pk: total or 0 for pk, total in counts}
+
+        changed = []
+        for row in rows:
+            values = {field: actual[field].get(row['pk'], 0) for field in fields}
+            if any(row[field] != value for field, value in values.items()):
+                changed.append(model(pk=row['pk'], **values))
+        if changed:
+            model._default_manager.bulk_update(changed, fields)
+            updated += len(changed)
+        if stdout:
+            stdout.write(f'{model._meta.label}: checked up to pk {last_pk}, {updated} rows corrected')
+    return updated
@@ -0,0 +1,24 @@
+"""
+Filter backends shared by the API.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+from .serializers import DynamicFieldsModelSerializer
+
+
+class SparseFieldsetFilter(BaseFilterBackend):
+    """Load only what a ``DynamicFieldsModelSerializer`` will serialize.
+
+    Applies the serializer's ``optimize_queryset`` so ``?fields=`` skips
+    unrequested columns in SQL and ``?expand=`` joins or prefetches the
+    expanded relations instead of querying them row by row.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        get_serializer = getattr(view, 'get_serializer', None)
+        if get_serializer is None or getattr(view, 'serializer_class', None) is None:
+            return queryset
+        serializer = get_serializer()
+        if isinstance(serializer, DynamicFieldsModelSerializer) and serializer.Meta.model is queryset.model:
+            queryset = serializer.optimize_queryset(queryset)
+        return queryset
@@ -0,0 +1,328 @@
+"""
+Pagination classes shared by the API.
+"""
+import base64
+import json
+from datetime import datetime
+from functools import reduce
+from itertools import groupby
+from operator import and_, itemgetter, or_
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class QuerySetChain:
+    """Ordered querysets listed one after another and paged as one list.
+
+    Each part keeps its own ``order_by()``, so it can be read off its own
+    index, and a slice only queries the parts it covers. A part is a
+    queryset or a ``(queryset, load)`` pair, where ``load`` maps the rows
+    read from the part to the objects listed (e.g. fetches them with
+    ``in_bulk``). ``count`` replaces the sum of the counts of the parts.
+    """
+
+    def __init__(self, *parts, count=None):
+        self.parts = [part if isinstance(part, tuple) else (part, None) for part in parts]
+        self._count = count
+
+    def count(self):
+        if self._count is not None:
+            return self._count()
+        return sum(queryset.count() for queryset, _ in self.parts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('QuerySetChain only supports slices without a step.')
+        offset = index.start or 0
+        wanted = None if index.stop is None else index.stop - offset
+        rows = []
+        for part, (queryset, _) in enumerate(self.parts):
+            if wanted is not None and len(rows) >= wanted:
+                break
+            stop = None if wanted is None else offset + wanted - len(rows)
+            found = list(queryset[offset:stop])
+            if found:
+                rows += [(part, row) for row in found]
+                offset = 0
+            elif offset:
+                # The slice starts after this part.
+                offset = max(offset - queryset.count(), 0)
+        return self.load(rows)
+
+    def load(self, rows):
+        """Turn ``(part, row)`` pairs into the listed objects, keeping their order."""
+        results = []
+        for part, group in groupby(rows, key=itemgetter(0)):
+            found = [row for _, row in group]
+            load = self.parts[part][1]
+            results += load(found) if load else found
+        return results
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on the ordering columns instead of OFFSET.
+
+    The cursor encodes the ordering values of the last (or first) row of the
+    current page, and the next page is fetched with a lexicographic
+    ``WHERE (a, b, id) < (...)`` filter, so every page costs the same as the
+    first one and no ``COUNT(*)`` is issued.
+
+    The ordering is taken from the view's ``keyset_ordering`` attribute, or
+    otherwise from the queryset's ``order_by()`` (falling back to the model's
+    ``Meta.ordering``). The primary key is appended as a tie-breaker when it
+    is not already part of the ordering. Ordering fields must not be
+    nullable.
+
+    A ``QuerySetChain`` is paged part by part, each with its own ordering;
+    the cursor also records the part it points into.
+    """
+    page_size = PageNumberPagination.page_size
+    page_size_query_param = None
+    max_page_size = None
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.chain = None
+        if isinstance(queryset, QuerySetChain):
+            return self.paginate_chain(queryset, request)
+        queryset = self.get_page_queryset(queryset, request, view)
+        results = list(queryset[:self.page_size + 1])
+        self.first_part = self.last_part = None
+        return self._set_page(results)
+
+    def paginate_chain(self, chain, request):
+        """Read one page of a ``QuerySetChain``, crossing into the next parts when needed."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.chain = chain
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor['reverse']
+        part = self.cursor['part'] if self.cursor is not None else 0
+        if not 0 <= part < len(chain.parts):
+            raise NotFound(self.invalid_cursor_message)
+
+        rows = []
+        values = self.cursor['values'] if self.cursor is not None else None
+        while 0 <= part < len(chain.parts) and len(rows) <= self.page_size:
+            queryset = self._use_part(part)
+            if values is not None:
+                values = self._decode_values(values)
+            queryset = self._seek(queryset, values)
+            rows += [(part, row) for row in queryset[:self.page_size + 1 - len(rows)]]
+            part += -1 if self.reverse else 1
+            values = None
+
+        rows = self._set_page(rows)
+        self.first_part = rows[0][0] if rows else None
+        self.last_part = rows[-1][0] if rows else None
+        self.first = rows[0][1] if rows else None
+        self.last = rows[-1][1] if rows else None
+        return chain.load(rows)
+
+    def _set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Order ``queryset`` and seek past the request's cursor, without slicing."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self._use_queryset(queryset, view)
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor['reverse']
+        values = None
+        if self.cursor is not None:
+            values = self.cursor['values'] = self._decode_values(self.cursor['values'])
+        return self._seek(queryset, values)
+
+    def _use_queryset(self, queryset, view=None):
+        self.ordering = self.get_ordering(queryset, view)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+
+    def _use_part(self, part):
+        """Switch to the ordering of one part of the chain; returns its queryset."""
+        queryset = self.chain.parts[part][0]
+        self._use_queryset(queryset)
+        return queryset
+
+    def _seek(self, queryset, values):
+        ordering = [self._invert(field) for field in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, values))
+        return queryset
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size) if self.max_page_size else size
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset, view=None):
+        ordering = getattr(view, 'keyset_ordering', None)
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = list(ordering)
+        pk_name = queryset.model._meta.pk.name
+        if not any(field.lstrip('-') in ('pk', 'id', pk_name) for field in ordering):
+            descending = ordering[0].startswith('-') if ordering else False
+            ordering.append(f'-{pk_name}' if descending else pk_name)
+        return ordering
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _seek_filter(self, ordering, values):
+        """Build ``(a > x) OR (a = x AND b > y) OR ...`` for the given ordering."""
+        clauses = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = [Q(**{ordering[i].lstrip('-'): values[i]}) for i in range(index)]
+            clauses.append(reduce(and_, equal + [Q(**{f'{name}__{lookup}': values[index]})]))
+        return reduce(or_, clauses)
+
+    def _row_values(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj
+            for part in field.lstrip('-').split('__'):
+                value = getattr(value, part)
+            values.append(value)
+        return values
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            if not isinstance(values, list):
+                raise ValueError
+            return {'values': values, 'reverse': bool(payload.get('r')), 'part': int(payload.get('p', 0))}
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _decode_values(self, raw_values):
+        """Convert the JSON values of a cursor with the current ordering's fields."""
+        try:
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            return [
+                self._field_for(field).to_python(value)
+                for field, value in zip(self.ordering, raw_values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _field_for(self, field):
+        model = self.model
+        parts = field.lstrip('-').split('__')
+        if len(parts) == 1 and parts[0] in self.annotations:
+            return self.annotations[parts[0]].output_field
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+        name = parts[-1]
+        if name == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    def encode_cursor(self, obj, reverse, part=None):
+        if part is not None:
+            self._use_part(part)
+        # Full isoformat: DjangoJSONEncoder truncates datetimes to milliseconds,
+        # which would make the seek skip or repeat rows.
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in self._row_values(obj)]
+        payload = {'v': values, 'r': int(reverse)}
+        if part is not None:
+            payload['p'] = part
+        data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False, part=self.last_part)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True, part=self.first_part)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class StandardPagination(PageNumberPagination):
+    """Page-number pagination with opt-in keyset mode.
+
+    Clients switch to keyset pagination with ``?pagination=cursor`` (or by
+    following a ``cursor`` link). Views can opt in permanently with
+    ``pagination_class = KeysetPagination``.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, queryset, request):
+        if not isinstance(queryset, (QuerySet, QuerySetChain)):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(queryset, request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
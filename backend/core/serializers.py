@@ -0,0 +1,236 @@
+"""
+Serializer base classes shared by the API.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns database values of the right type
+# unchanged (``str(str)``, ``int(int)``, ...).
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.FloatField)
+
+
+def parse_field_list(value):
+    """Split a comma-separated query parameter into a list of names."""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer supporting sparse fieldsets and related expansion.
+
+    On read requests the top-level serializer honours ``?fields=a,b`` (only
+    serialize these fields) and ``?expand=rel`` (serialize the related
+    object(s) of ``rel`` inline instead of their primary key). Expandable
+    relations are declared in ``Meta.expandable_fields`` as a mapping of
+    field name to a serializer class or its dotted import path, optionally
+    paired with keyword arguments: ``{'tags': ('app.TagSerializer', {'many':
+    True})}``.
+
+    ``optimize_queryset`` narrows a queryset to what the selected fields
+    need: ``only()`` the selected columns, ``select_related`` expanded
+    forward relations and ``prefetch_related`` expanded many-valued ones.
+    The ``core.filters.SparseFieldsetFilter`` backend applies it to every
+    generic view.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        request = self._context.get('request')
+        if request is not None and request.method in SAFE_METHODS:
+            if fields is None:
+                fields = parse_field_list(request.query_params.get(self.fields_query_param)) or None
+            if expand is None:
+                expand = parse_field_list(request.query_params.get(self.expand_query_param))
+
+        self.expanded_fields = []
+        for name in expand or []:
+            if name in self.get_expandable_fields() and (fields is None or name in fields):
+                self.fields[name] = self.build_expanded_field(name)
+                self.expanded_fields.append(name)
+
+        self.selected_fields = fields
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_expandable_fields(cls):
+        return getattr(cls.Meta, 'expandable_fields', {})
+
+    def build_expanded_field(self, name):
+        spec = self.get_expandable_fields()[name]
+        serializer_class, kwargs = spec if isinstance(spec, tuple) else (spec, {})
+        if isinstance(serializer_class, str):
+            serializer_class = import_string(serializer_class)
+        return serializer_class(read_only=True, **kwargs)
+
+    def get_model_field(self, name):
+        try:
+            return self.Meta.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def optimize_queryset(self, queryset):
+        """Restrict ``queryset`` to the columns and relations being serialized."""
+        select_related, prefetch_related = [], []
+        for name in self.expanded_fields:
+            source = self.fields[name].source.split('.')[0]
+            model_field = self.get_model_field(source)
+            if model_field is None or not model_field.is_relation:
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch_related.append(source)
+            else:
+                select_related.append(source)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        columns = self.get_selected_columns()
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_selected_columns(self):
+        """Model columns needed by the selected fields, or None when unknown."""
+        if self.selected_fields is None:
+            return None
+        model = self.Meta.model
+        columns = {model._meta.pk.name}
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                return None
+            source = field.source.split('.')[0]
+            model_field = self.get_model_field(source)
+            if model_field is None:
+                # A property or method: it may read any column.
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+            elif model_field.one_to_one and field.field_name in self.expanded_fields:
+                # Reverse one-to-one, loaded by select_related.
+                columns.add(model_field.name)
+        return sorted(columns)
+
+    def get_values_plan(self):
+        """Compile a ``ValuesPlan`` producing the same output as this serializer.
+
+        Returns None when a readable field is not a plain model column, a
+        file or a primary key relation (e.g. nested or method fields), in
+        which case the serializer has to be used.
+        """
+        fields, many_related = [], []
+        for field in self._readable_fields:
+            if len(field.source_attrs) != 1:
+                return None
+            model_field = self.get_model_field(field.source)
+            if model_field is None:
+                return None
+            compiled = self.compile_field(field, model_field)
+            if compiled is None:
+                return None
+            column, convert = compiled
+            fields.append((field.field_name, column, convert))
+            if column is None:
+                many_related.append((field.field_name, model_field, convert))
+        return ValuesPlan(self.Meta.model, fields, many_related)
+
+    def compile_field(self, field, model_field):
+        """Return ``(column, converter)`` for one field, or None if unsupported.
+
+        The column is None for a many-to-many field, whose converter then
+        applies to every related primary key.
+        """
+        if isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+            if not model_field.many_to_many or type(child) is not serializers.PrimaryKeyRelatedField:
+                return None
+            return None, child.pk_field.to_representation if child.pk_field is not None else None
+        if type(field) is serializers.PrimaryKeyRelatedField:
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                return None
+            return model_field.attname, field.pk_field.to_representation if field.pk_field is not None else None
+        if isinstance(field, (serializers.RelatedField, serializers.BaseSerializer)):
+            return None
+        if not model_field.concrete or model_field.is_relation:
+            return None
+        if isinstance(field, serializers.FileField):
+            return model_field.attname, self.compile_file_field(field, model_field)
+        if isinstance(field, IDENTITY_FIELDS):
+            return model_field.attname, None
+        return model_field.attname, field.to_representation
+
+    def compile_file_field(self, field, model_field):
+        """Converter of a stored file name to the URL ``FileField`` renders."""
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return lambda name: name or None
+        storage = model_field.storage
+        request = self.context.get('request')
+        if request is None:
+            return lambda name: storage.url(name) if name else None
+        return lambda name: request.build_absolute_uri(storage.url(name)) if name else None
+
+
+class ValuesPlan:
+    """Read-only serialization of ``.values()`` rows with per-field converters.
+
+    Built by ``DynamicFieldsModelSerializer.get_values_plan``. Each entry of
+    ``fields`` is ``(name, column, converter)``; a ``None`` converter passes
+    the column value through unchanged. Many-to-many primary keys are read
+    with one query per relation for the whole page.
+    """
+
+    def __init__(self, model, fields, many_related):
+        self.model = model
+        self.fields = fields
+        self.many_related = many_related
+        self.pk_column = model._meta.pk.attname
+        columns = {self.pk_column}
+        columns.update(column for _, column, _ in fields if column is not None)
+        self.columns = sorted(columns)
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def fetch_many(self, model_field, convert, pks):
+        """Map every pk to the related pks, in the related model's ordering."""
+        related = {pk: [] for pk in pks}
+        query_name = model_field.related_query_name()
+        rows = (
+            model_field.related_model._default_manager
+            .filter(**{f'{query_name}__in': pks})
+            .values_list(query_name, 'pk')
+        )
+        for pk, related_pk in rows:
+            related[pk].append(related_pk if convert is None else convert(related_pk))
+        return related
+
+    def serialize(self, rows):
+        rows = list(rows)
+        pks = [row[self.pk_column] for row in rows]
+        many = {
+            name: self.fetch_many(model_field, convert, pks)
+            for name, model_field, convert in self.many_related
+        } if pks else {}
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.fields:
+                if column is None:
+                    item[name] = many[name][row[self.pk_column]]
+                    continue
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
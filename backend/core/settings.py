@@ -127,15 +127,78 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        'core.filters.SparseFieldsetFilter',
     ],
 }
 
+# Cache settings
+# Use a shared backend (e.g. django.core.cache.backends.redis.RedisCache) in
+# production so cache invalidation is visible to every worker process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='learning-platform'),
+    }
+}
+
+# Seconds a cached catalog list response is kept before it expires
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+# Buffered counters (see core/counters.py): pending increments are written
+# once this many have accumulated, or this many seconds after the first one
+COUNTER_FLUSH_THRESHOLD = config('COUNTER_FLUSH_THRESHOLD', default=500, cast=int)
+COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=5.0, cast=float)
+
+# Certificate rendering: worker threads per process, output format (png or
+# pdf), attempts per certificate, base retry delay in seconds (doubled after
+# every failure) and seconds before an interrupted render is queued again
+CERTIFICATE_RENDER_WORKERS = config('CERTIFICATE_RENDER_WORKERS', default=2, cast=int)
+CERTIFICATE_FORMAT = config('CERTIFICATE_FORMAT', default='png')
+CERTIFICATE_MAX_ATTEMPTS = config('CERTIFICATE_MAX_ATTEMPTS', default=3, cast=int)
+CERTIFICATE_RETRY_DELAY = config('CERTIFICATE_RETRY_DELAY', default=30, cast=int)
+CERTIFICATE_RENDER_TIMEOUT = config('CERTIFICATE_RENDER_TIMEOUT', default=600, cast=int)
+
+# Co-enrollment recommendations: similarity metric (cosine or jaccard),
+# neighbours stored per course and minimum number of shared students
+RECOMMENDATION_METRIC = config('RECOMMENDATION_METRIC', default='cosine')
+RECOMMENDATION_TOP_K = config('RECOMMENDATION_TOP_K', default=20, cast=int)
+RECOMMENDATION_MIN_OVERLAP = config('RECOMMENDATION_MIN_OVERLAP', default=2, cast=int)
+
+# Video heartbeats (see videos/heartbeats.py): buffered positions are written
+# once this many sessions are pending, or this many seconds after the first one
+VIDEO_HEARTBEAT_FLUSH_THRESHOLD = config('VIDEO_HEARTBEAT_FLUSH_THRESHOLD', default=1000, cast=int)
+VIDEO_HEARTBEAT_FLUSH_INTERVAL = config('VIDEO_HEARTBEAT_FLUSH_INTERVAL', default=5.0, cast=float)
+
+# Video streaming: hand file delivery to the front-end server with
+# 'x-accel-redirect' (nginx, internal location below mapped to MEDIA_ROOT)
+# or 'x-sendfile'; empty streams the file from Django
+VIDEO_SENDFILE_BACKEND = config('VIDEO_SENDFILE_BACKEND', default='')
+VIDEO_ACCEL_REDIRECT_LOCATION = config('VIDEO_ACCEL_REDIRECT_LOCATION', default='/protected-media/')
+
+# Video processing: worker processes of the process_videos command, attempts
+# per job, base retry delay in seconds (doubled after every failure), seconds
+# before a job of a dead worker is picked up again and the transcoder callable
+VIDEO_PROCESSING_WORKERS = config('VIDEO_PROCESSING_WORKERS', default=2, cast=int)
+VIDEO_PROCESSING_MAX_ATTEMPTS = config('VIDEO_PROCESSING_MAX_ATTEMPTS', default=3, cast=int)
+VIDEO_PROCESSING_RETRY_DELAY = config('VIDEO_PROCESSING_RETRY_DELAY', default=30, cast=int)
+VIDEO_PROCESSING_LEASE = config('VIDEO_PROCESSING_LEASE', default=3600, cast=int)
+VIDEO_TRANSCODER = config('VIDEO_TRANSCODER', default='videos.processing.probe_video')
+
+# Resumable video uploads: directory of partial files (empty: MEDIA_ROOT/uploads,
+# keep it on the media filesystem so finished files are moved, not copied),
+# largest chunk in bytes, seconds before an unfinished chunk is released and
+# hours an upload session stays open
+VIDEO_UPLOAD_TEMP_DIR = config('VIDEO_UPLOAD_TEMP_DIR', default='')
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = config('VIDEO_UPLOAD_MAX_CHUNK_SIZE', default=64 * 1024 * 1024, cast=int)
+VIDEO_UPLOAD_CHUNK_TIMEOUT = config('VIDEO_UPLOAD_CHUNK_TIMEOUT', default=600, cast=int)
+VIDEO_UPLOAD_EXPIRY = config('VIDEO_UPLOAD_EXPIRY', default=24, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -0,0 +1,41 @@
+"""
+View mixins shared by the API.
+"""
+from rest_framework.response import Response
+
+from .pagination import KeysetPagination, StandardPagination
+from .serializers import DynamicFieldsModelSerializer
+
+
+class ValuesListMixin:
+    """Serve list pages from ``.values()`` rows instead of model instances.
+
+    When the view's serializer can compile a ``ValuesPlan`` (every field is
+    a model column, a file or a primary key relation), the page is fetched
+    as dictionaries and converted field by field, skipping model and
+    serializer instantiation per row. The output is the same as the
+    serializer's. Expanded relations, method fields and keyset pagination
+    fall back to the regular serializer path.
+    """
+
+    def get_values_plan(self):
+        serializer = self.get_serializer()
+        if not isinstance(serializer, DynamicFieldsModelSerializer):
+            return None
+        paginator = self.paginator
+        if isinstance(paginator, KeysetPagination):
+            return None
+        if isinstance(paginator, StandardPagination) and paginator.use_keyset(self.get_queryset(), self.request):
+            return None
+        return serializer.get_values_plan()
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_values_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(queryset))
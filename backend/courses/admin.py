@@ -254,10 +254,10 @@ class LessonProgressAdmin(admin.ModelAdmin):
 
 # Course Certificate Admin
 class CourseCertificateAdmin(admin.ModelAdmin):
-    list_display = ['student', 'course', 'certificate_number', 'issued_at']
-    list_filter = ['issued_at', 'course']
+    list_display = ['student', 'course', 'certificate_number', 'status', 'issued_at']
+    list_filter = ['status', 'issued_at', 'course']
     search_fields = ['student__username', 'course__title', 'certificate_number']
-    readonly_fields = ['issued_at', 'certificate_number']
+    readonly_fields = ['issued_at', 'certificate_number', 'content_hash', 'rendered_at']
     ordering = ['-issued_at']
 
 
@@ -0,0 +1,265 @@
+"""Daily rollups behind the instructor analytics dashboard.
+
+An incremental job folds new events into ``CourseDailyStats`` and
+``LessonDailyStats``. Every event source has its own ``RollupWatermark``;
+a run aggregates only the events timestamped after the watermark (and
+before ``now - ROLLUP_LAG``, so rows of transactions still in flight are
+picked up by the next run), adds them to the daily rows and advances the
+watermark in the same transaction. Watermarks compare server-side record
+times, so events reported late with an old client timestamp are still
+counted.
+
+Dashboard reads only touch the rollup tables, so their cost depends on the
+number of days shown rather than on the number of enrollments, ratings or
+streams.
+
+Events are attributed to the day of their timestamp: enrollments to
+``enrolled_at``, course completions to ``completed_at``, ratings to
+``created_at``, lesson completions to the progress ``completed_at`` and
+video views (with their watch time) to the stream's ``ended_at``. The last
+two are reported by clients, so they are read past the watermark on
+``completion_recorded_at`` and ``end_recorded_at`` and never placed after
+the day they were recorded.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, Least, TruncDate
+from django.utils import timezone
+
+from videos.models import VideoStream
+
+from .models import (
+    CourseDailyStats, CourseEnrollment, CourseRating, LessonDailyStats,
+    LessonProgress, RollupWatermark,
+)
+
+ROLLUP_LAG = timedelta(minutes=5)
+
+STAT_FIELDS = ['enrollments', 'completions', 'ratings', 'rating_sum', 'views', 'watch_time']
+
+
+def course_sources():
+    """Event sources of ``CourseDailyStats``.
+
+    Each entry is ``(watermark name, queryset, course field, time field,
+    record time field, aggregates)``.
+    """
+    return [
+        ('course_stats:enrollments', CourseEnrollment.objects.all(), 'course_id', 'enrolled_at', 'enrolled_at', {
+            'enrollments': Count('pk'),
+        }),
+        ('course_stats:completions', CourseEnrollment.objects.all(), 'course_id', 'completed_at', 'completed_at', {
+            'completions': Count('pk'),
+        }),
+        ('course_stats:ratings', CourseRating.objects.all(), 'course_id', 'created_at', 'created_at', {
+            'ratings': Count('pk'),
+            'rating_sum': Sum('rating'),
+        }),
+        ('course_stats:streams', VideoStream.objects.all(), 'video__lesson__course_id', 'ended_at', 'end_recorded_at', {
+            'views': Count('pk'),
+            'watch_time': Sum('total_watch_time'),
+        }),
+    ]
+
+
+def advance_watermark(name, upper):
+    """Lock a watermark, move it to ``upper`` and return its previous position.
+
+    Returns None on the first run, which creates the watermark. Must run in
+    a transaction: the row stays locked until it commits.
+    """
+    # A first run holds the new row's unique key until it commits, so a
+    # concurrent first run waits for it, then finds and locks the row
+    # instead of folding the full history a second time.
+    watermark, created = RollupWatermark.objects.get_or_create(name=name, defaults={'position': upper})
+    if created:
+        return None
+    watermark = RollupWatermark.objects.select_for_update().get(pk=watermark.pk)
+    since = watermark.position
+    watermark.position = upper
+    watermark.save(update_fields=['position', 'updated_at'])
+    return since
+
+
+def _daily(queryset, group_fields, time_field, record_field, aggregates, since, upper):
+    """Aggregate the events recorded in ``(since, upper]`` per group and day of ``time_field``."""
+    queryset = queryset.filter(**{f'{record_field}__lte': upper})
+    if since is not None:
+        queryset = queryset.filter(**{f'{record_field}__gt': since})
+    event_time = time_field
+    if record_field != time_field:
+        # Client-reported times may be missing or ahead of the server.
+        event_time = Least(Coalesce(time_field, record_field), record_field)
+    return list(
+        queryset.annotate(day=TruncDate(event_time))
+        .values(*group_fields, 'day')
+        .annotate(**aggregates)
+        .values_list(*group_fields, 'day', *aggregates)
+        .order_by()
+    )
+
+
+def _merge(model, deltas, key_fields, unique_fields, fields, batch_size=500):
+    """Add ``deltas`` (``{key: {field: value}}``) to the rollup rows of ``model``.
+
+    ``key_fields`` name the parts of each key, ``unique_fields`` the unique
+    constraint used for the upsert. Existing rows are read once per batch
+    and written back with a single upsert.
+    """
+    keys = list(deltas)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        lookup = {
+            f'{name}__in': {key[position] for key in batch}
+            for position, name in enumerate(key_fields)
+        }
+        existing = {
+            tuple(row[:len(key_fields)]): dict(zip(fields, row[len(key_fields):]))
+            for row in model.objects.filter(**lookup).values_list(*key_fields, *fields)
+        }
+        rows = []
+        for key in batch:
+            values = existing.get(key) or dict.fromkeys(fields, 0)
+            for field, delta in deltas[key].items():
+                values[field] += delta
+            rows.append(model(**dict(zip(key_fields, key)), **values))
+        model.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=unique_fields, update_fields=fields,
+        )
+
+
+def rollup(now=None):
+    """Fold every event since the last run into the daily rollups.
+
+    Returns the number of daily rows touched per rollup table.
+    """
+    upper = (now or timezone.now()) - ROLLUP_LAG
+    with transaction.atomic():
+        course_deltas = defaultdict(lambda: defaultdict(int))
+        for name, queryset, course_field, time_field, record_field, aggregates in course_sources():
+            since = advance_watermark(name, upper)
+            for course_id, day, *values in _daily(
+                queryset, [course_field], time_field, record_field, aggregates, since, upper,
+            ):
+                if course_id is None:
+                    continue
+                for field, value in zip(aggregates, values):
+                    course_deltas[(course_id, day)][field] += value or 0
+        _merge(CourseDailyStats, course_deltas, ['course_id', 'date'], ['course', 'date'], STAT_FIELDS)
+
+        since = advance_watermark('lesson_stats:completions', upper)
+        completions = _daily(
+            LessonProgress.objects.filter(is_completed=True), ['lesson_id', 'lesson__course_id'],
+            'completed_at', 'completion_recorded_at', {'completions': Count('pk')}, since, upper,
+        )
+        lesson_deltas = {
+            (lesson_id, course_id, day): {'completions': count}
+            for lesson_id, course_id, day, count in completions
+        }
+        _merge(
+            LessonDailyStats, lesson_deltas, ['lesson_id', 'course_id', 'date'], ['lesson', 'date'],
+            ['completions'],
+        )
+    return {'courses': len(course_deltas), 'lessons': len(lesson_deltas)}
+
+
+def rebuild_rollups():
+    """Drop every rollup row and watermark, then roll up the full history."""
+    with transaction.atomic():
+        CourseDailyStats.objects.all().delete()
+        LessonDailyStats.objects.all().delete()
+        RollupWatermark.objects.filter(name__startswith='course_stats:').delete()
+        RollupWatermark.objects.filter(name__startswith='lesson_stats:').delete()
+        return rollup()
+
+
+def _totals(queryset):
+    totals = queryset.aggregate(**{field: Sum(field) for field in STAT_FIELDS})
+    return {field: value or 0 for field, value in totals.items()}
+
+
+def course_dashboard(course, days=30, today=None):
+    """Daily series, lifetime totals and the lesson funnel of one course."""
+    today = today or timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    stats = CourseDailyStats.objects.filter(course=course)
+
+    rows = {
+        row['date']: row
+        for row in stats.filter(date__gte=since).values('date', *STAT_FIELDS)
+    }
+    series = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        row = rows.get(day) or dict.fromkeys(STAT_FIELDS, 0)
+        series.append({
+            'date': day,
+            **{field: row[field] for field in STAT_FIELDS},
+            'average_rating': round(row['rating_sum'] / row['ratings'], 2) if row['ratings'] else None,
+        })
+
+    totals = _totals(stats)
+    enrollments = totals['enrollments']
+    completed = dict(
+        LessonDailyStats.objects.filter(course=course)
+        .values('lesson_id')
+        .annotate(total=Sum('completions'))
+        .values_list('lesson_id', 'total')
+    )
+    funnel = []
+    previous = enrollments
+    for lesson_id, title, order in course.lessons.filter(is_published=True).order_by('order').values_list('pk', 'title', 'order'):
+        count = completed.get(lesson_id, 0)
+        funnel.append({
+            'lesson': lesson_id,
+            'title': title,
+            'order': order,
+            'completions': count,
+            'completion_rate': round(count / enrollments * 100, 2) if enrollments else 0,
+            'drop_off': max(previous - count, 0),
+        })
+        previous = count
+
+    return {
+        'course': course.slug,
+        'days': days,
+        'totals': {
+            **totals,
+            'completion_rate': round(totals['completions'] / enrollments * 100, 2) if enrollments else 0,
+            'average_rating': round(course.rating_sum / course.total_ratings, 2) if course.total_ratings else 0,
+        },
+        'series': series,
+        'lessons': funnel,
+    }
+
+
+def instructor_dashboard(instructor, days=30, today=None):
+    """Per-course totals over the last ``days`` days for every course of an instructor."""
+    today = today or timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    courses = list(
+        instructor.courses_taught.order_by('-created_at')
+        .values('id', 'slug', 'title', 'enrollment_count', 'rating_sum', 'total_ratings')
+    )
+    recent = {
+        row['course_id']: row
+        for row in CourseDailyStats.objects.filter(course__instructor=instructor, date__gte=since)
+        .values('course_id')
+        .annotate(**{field: Sum(field) for field in STAT_FIELDS})
+    }
+    return {
+        'days': days,
+        'courses': [
+            {
+                'course': course['slug'],
+                'title': course['title'],
+                'enrollment_count': course['enrollment_count'],
+                'average_rating': round(course['rating_sum'] / course['total_ratings'], 2) if course['total_ratings'] else 0,
+                **{field: (recent.get(course['id']) or {}).get(field) or 0 for field in STAT_FIELDS},
+            }
+            for course in courses
+        ],
+    }
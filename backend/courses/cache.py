@@ -0,0 +1,109 @@
+"""Versioned response cache for the public course catalog endpoints.
+
+The version is bumped when a category, course or lesson is saved or
+deleted, when a counter flush writes course counters (enrollment counts)
+and when a rating changes a course's aggregates, so cached lists never
+outlive the flush that changed them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version'
+HITS_KEY = 'catalog:hits'
+MISSES_KEY = 'catalog:misses'
+
+
+def _incr(key, delta=1):
+    """Increment a cache counter, creating it if it does not exist yet."""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The key expired or was evicted between add() and incr().
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def get_catalog_version():
+    """Return the current catalog version, initialising it on first use."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate_catalog():
+    """Bump the catalog version so every cached list response goes stale."""
+    get_catalog_version()
+    return _incr(VERSION_KEY)
+
+
+def get_cache_stats():
+    """Return hit/miss counters for the catalog cache."""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'version': get_catalog_version(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0,
+    }
+
+
+def reset_cache_stats():
+    """Reset hit/miss counters."""
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def build_cache_key(view_name, query_params):
+    """Build a cache key from the view name, catalog version and query string."""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+    )
+    digest = hashlib.md5(repr(items).encode('utf-8')).hexdigest()
+    return f'catalog:{get_catalog_version()}:{view_name}:{digest}'
+
+
+def _to_cacheable(data):
+    """Strip serializer back-references so the payload pickles cleanly."""
+    if isinstance(data, dict):
+        return {key: _to_cacheable(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_to_cacheable(item) for item in data]
+    return data
+
+
+class CatalogCacheMixin:
+    """Serve list responses from the versioned catalog cache.
+
+    The cache key covers every query parameter (including ``page``), so
+    filtered and paginated variants are cached independently. Entries are
+    never deleted explicitly; bumping the catalog version makes them
+    unreachable and they expire after ``CATALOG_CACHE_TIMEOUT`` seconds.
+    """
+    cache_timeout = None
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+    def list(self, request, *args, **kwargs):
+        key = build_cache_key(self.__class__.__name__, request.query_params)
+        data = cache.get(key)
+        if data is not None:
+            _incr(HITS_KEY)
+            return Response(data)
+
+        _incr(MISSES_KEY)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, _to_cacheable(response.data), self.get_cache_timeout())
+        return response
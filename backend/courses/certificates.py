@@ -0,0 +1,266 @@
+"""Certificate rendering pipeline.
+
+Certificates are rendered with Pillow on a bounded thread pool, never in
+the request thread: a request only creates the ``CourseCertificate`` row
+and enqueues it, then clients poll until the status is ``ready``.
+
+Rendered files are content-addressed: the file name is the SHA-256 of
+everything drawn on the certificate (plus the template version), so
+re-rendering an unchanged certificate reuses the stored file.
+
+A worker claims a certificate with a conditional update, so one render
+runs at a time across processes. A failed render goes back to ``pending``
+with an exponential backoff until ``CERTIFICATE_MAX_ATTEMPTS``, then stays
+``failed``. A render whose worker died is claimed again once
+``CERTIFICATE_RENDER_TIMEOUT`` seconds have passed.
+"""
+import hashlib
+import io
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CourseCertificate, CourseEnrollment
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout changes so existing files are re-rendered.
+TEMPLATE_VERSION = 1
+
+VERIFY_CACHE_KEY = 'certificate:verify:{}'
+VERIFY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Longest wait between two attempts, whatever the backoff gives.
+MAX_RETRY_DELAY = 60 * 60
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CERTIFICATE_RENDER_WORKERS', 2),
+                thread_name_prefix='certificate-render',
+            )
+        return _executor
+
+
+def certificate_context(certificate):
+    student = certificate.student
+    return {
+        'student_name': student.full_name or student.username,
+        'course_title': certificate.course.title,
+        'certificate_number': certificate.certificate_number,
+        'issued_on': certificate.issued_at.strftime('%B %d, %Y'),
+    }
+
+
+def certificate_fingerprint(context, file_format):
+    payload = '\n'.join([str(TEMPLATE_VERSION), file_format] + [
+        f'{key}={value}' for key, value in sorted(context.items())
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_certificate_image(context, file_format='png'):
+    """Draw a certificate and return the encoded file contents."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = 1600, 1131
+    image = Image.new('RGB', (width, height), '#ffffff')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([30, 30, width - 30, height - 30], outline='#007bff', width=12)
+    draw.rectangle([60, 60, width - 60, height - 60], outline='#cfe2ff', width=4)
+
+    def centered(text, y, size, fill='#212529'):
+        font = ImageFont.load_default(size=size)
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        draw.text(((width - (right - left)) / 2, y), text, font=font, fill=fill)
+
+    centered('Certificate of Completion', 180, 72, fill='#007bff')
+    centered('This certifies that', 380, 36, fill='#6c757d')
+    centered(context['student_name'], 460, 64)
+    centered('has successfully completed the course', 600, 36, fill='#6c757d')
+    centered(context['course_title'], 680, 52)
+    centered(f"Issued on {context['issued_on']}", 880, 30, fill='#6c757d')
+    centered(f"Certificate number {context['certificate_number']}", 940, 26, fill='#6c757d')
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PDF' if file_format == 'pdf' else 'PNG', resolution=150.0)
+    return buffer.getvalue()
+
+
+def verification_payload(certificate):
+    return {
+        'certificate_number': certificate.certificate_number,
+        'student_name': certificate.student.full_name or certificate.student.username,
+        'course_title': certificate.course.title,
+        'course_slug': certificate.course.slug,
+        'issued_at': certificate.issued_at.isoformat(),
+        'valid': True,
+    }
+
+
+def get_verification(certificate_number):
+    """Return the public verification record of a certificate, cached."""
+    key = VERIFY_CACHE_KEY.format(certificate_number)
+    payload = cache.get(key)
+    if payload is None:
+        certificate = (
+            CourseCertificate.objects.select_related('student', 'course')
+            .filter(certificate_number=certificate_number)
+            .first()
+        )
+        if certificate is None:
+            return None
+        payload = verification_payload(certificate)
+        cache.set(key, payload, VERIFY_CACHE_TIMEOUT)
+    return payload
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt ``attempts + 1``: exponential with jitter."""
+    base = getattr(settings, 'CERTIFICATE_RETRY_DELAY', 30)
+    delay = min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def render_due(now=None):
+    """Q of the certificates a worker may claim now.
+
+    Pending certificates whose retry time has come, and renders that have
+    run longer than ``CERTIFICATE_RENDER_TIMEOUT`` (their worker died).
+    """
+    now = now or timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'CERTIFICATE_RENDER_TIMEOUT', 600))
+    return Q(status='pending', render_after__lte=now) | Q(status='rendering', render_started_at__lt=now - timeout)
+
+
+def is_render_due(certificate, now=None):
+    """Python counterpart of ``render_due`` for a loaded certificate."""
+    now = now or timezone.now()
+    if certificate.status == 'pending':
+        return certificate.render_after <= now
+    if certificate.status == 'rendering':
+        timeout = timedelta(seconds=getattr(settings, 'CERTIFICATE_RENDER_TIMEOUT', 600))
+        return certificate.render_started_at is not None and certificate.render_started_at < now - timeout
+    return False
+
+
+def fail_render(certificate, exc):
+    """Schedule a retry of a failed render, or fail it for good after the last attempt."""
+    now = timezone.now()
+    error = str(exc) or exc.__class__.__name__
+    if certificate.render_attempts >= getattr(settings, 'CERTIFICATE_MAX_ATTEMPTS', 3):
+        CourseCertificate.objects.filter(pk=certificate.pk).update(status='failed', rendering_error=error)
+        return 'failed'
+    CourseCertificate.objects.filter(pk=certificate.pk).update(
+        status='pending', rendering_error=error,
+        render_after=now + timedelta(seconds=retry_delay(certificate.render_attempts)),
+    )
+    return 'pending'
+
+
+def render_certificate(certificate_id, force=False):
+    """Render one certificate and store the file; runs on a worker thread.
+
+    Only certificates that are due (see ``render_due``) are claimed, unless
+    ``force`` is set. Returns the stored path, or None when the certificate
+    was not claimed or rendering failed.
+    """
+    now = timezone.now()
+    claimable = CourseCertificate.objects.filter(pk=certificate_id)
+    if not force:
+        claimable = claimable.filter(render_due(now))
+    if not claimable.update(status='rendering', render_started_at=now, render_attempts=F('render_attempts') + 1):
+        return None
+    certificate = (
+        CourseCertificate.objects.select_related('student', 'course')
+        .filter(pk=certificate_id)
+        .first()
+    )
+    if certificate is None:
+        return None
+
+    file_format = getattr(settings, 'CERTIFICATE_FORMAT', 'png')
+    try:
+        context = certificate_context(certificate)
+        content_hash = certificate_fingerprint(context, file_format)
+        path = f'certificates/{content_hash[:2]}/{content_hash}.{file_format}'
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(render_certificate_image(context, file_format)))
+    except Exception as exc:
+        logger.exception(
+            'Rendering certificate %s failed (attempt %s)', certificate.certificate_number,
+            certificate.render_attempts,
+        )
+        fail_render(certificate, exc)
+        return None
+
+    now = timezone.now()
+    with transaction.atomic():
+        CourseCertificate.objects.filter(pk=certificate_id).update(
+            status='ready', file=path, content_hash=content_hash,
+            rendering_error='', rendered_at=now,
+        )
+        CourseEnrollment.objects.filter(pk=certificate.enrollment_id, certificate_issued=False).update(
+            certificate_issued=True, certificate_issued_at=now,
+        )
+    cache.set(
+        VERIFY_CACHE_KEY.format(certificate.certificate_number),
+        verification_payload(certificate),
+        VERIFY_CACHE_TIMEOUT,
+    )
+    return path
+
+
+def _run_render(certificate_id):
+    close_old_connections()
+    try:
+        render_certificate(certificate_id)
+    except Exception:
+        logger.exception('Certificate worker failed for certificate %s', certificate_id)
+    finally:
+        with _executor_lock:
+            _in_flight.discard(certificate_id)
+        connections.close_all()
+
+
+def enqueue_render(certificate_id):
+    """Queue a certificate for rendering unless it is already queued here."""
+    with _executor_lock:
+        if certificate_id in _in_flight:
+            return False
+        _in_flight.add(certificate_id)
+    get_executor().submit(_run_render, certificate_id)
+    return True
+
+
+def issue_certificate(enrollment):
+    """Get or create the certificate of a completed enrollment and queue it.
+
+    Returns the certificate; rendering happens after the transaction
+    commits, on the worker pool, and only when it is due: polling does not
+    re-queue a render that is running or waiting for its retry.
+    """
+    certificate, created = CourseCertificate.objects.get_or_create(
+        enrollment=enrollment,
+        defaults={'student_id': enrollment.student_id, 'course_id': enrollment.course_id},
+    )
+    if is_render_due(certificate):
+        transaction.on_commit(lambda: enqueue_render(certificate.pk))
+    return certificate
@@ -0,0 +1,177 @@
+"""Bulk (cohort) enrollment of many students into one course.
+
+Emails are resolved to users in chunks, enrollments are written with
+``bulk_create(ignore_conflicts=True)`` against the ``(student, course)``
+unique pair, and the side effects of enrolling (activity rows, profile and
+course counters) are written once per chunk instead of once per student.
+Results are yielded row by row so callers can stream a report while the
+remaining chunks are still being processed.
+"""
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Lower
+
+from accounts.models import User, UserActivity, UserProfile
+from core.counters import increment
+
+from .models import Course, CourseEnrollment
+
+REPORT_FIELDS = ['row', 'email', 'status', 'enrollment']
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def read_emails(stream):
+    """Yield the emails of a CSV file (an ``email`` column, or the first column)."""
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(stream)
+    column = 0
+    for index, row in enumerate(reader):
+        if not row:
+            continue
+        if index == 0:
+            header = [cell.strip().lower() for cell in row]
+            if 'email' in header:
+                column = header.index('email')
+                continue
+        if column < len(row):
+            yield row[column]
+
+
+def record_enrollments(course, student_ids):
+    """Write the activity rows and profile counters for new enrollments."""
+    if not student_ids:
+        return
+    UserActivity.objects.bulk_create([
+        UserActivity(
+            user_id=student_id,
+            activity_type='course_enrolled',
+            description=f'Enrolled in {course.title}',
+            related_object_id=course.pk,
+            related_object_type='course',
+        )
+        for student_id in student_ids
+    ])
+    UserProfile.objects.filter(user_id__in=student_ids).update(
+        total_courses_enrolled=F('total_courses_enrolled') + 1
+    )
+
+
+def unrecord_enrollment(student_id):
+    """Remove a deleted enrollment from its student's profile counter."""
+    UserProfile.objects.filter(user_id=student_id).update(
+        total_courses_enrolled=Greatest(F('total_courses_enrolled') - 1, 0)
+    )
+
+
+def _chunks(emails, chunk_size):
+    chunk = []
+    for row, email in enumerate(emails, start=1):
+        chunk.append((row, email))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _enroll_chunk(course, chunk, seen):
+    results = []
+    wanted = {}
+    for row, raw in chunk:
+        email = normalize_email(raw)
+        try:
+            validate_email(email)
+        except ValidationError:
+            results.append({'row': row, 'email': raw, 'status': 'invalid_email'})
+            continue
+        if email in seen:
+            results.append({'row': row, 'email': raw, 'status': 'duplicate'})
+            continue
+        seen.add(email)
+        wanted[email] = raw
+        results.append({'row': row, 'email': email, 'status': None})
+    if not wanted:
+        return results
+
+    users = _resolve_users(wanted.values())
+
+    with transaction.atomic():
+        # Serialize cohort imports of the same course so the "already
+        # enrolled" set read below cannot go stale before the insert.
+        Course.objects.select_for_update().filter(pk=course.pk).first()
+        existing = set(
+            CourseEnrollment.objects.filter(course=course, student_id__in=users.values())
+            .values_list('student_id', flat=True)
+        )
+        new_ids = [pk for pk in users.values() if pk not in existing]
+        CourseEnrollment.objects.bulk_create(
+            [CourseEnrollment(student_id=pk, course=course) for pk in new_ids],
+            ignore_conflicts=True,
+        )
+        enrollment_ids = dict(
+            CourseEnrollment.objects.filter(course=course, student_id__in=users.values())
+            .values_list('student_id', 'pk')
+        )
+        # bulk_create does not send post_save, so do the signal's work here.
+        record_enrollments(course, new_ids)
+        increment(Course, course.pk, 'enrollment_count', len(new_ids))
+        increment(Course, course.pk, 'enrolled_students', len(new_ids))
+
+    new = set(new_ids)
+    for result in results:
+        if result['status'] is not None:
+            continue
+        student_id = users.get(result['email'])
+        if student_id is None:
+            result['status'] = 'user_not_found'
+        else:
+            result['status'] = 'enrolled' if student_id in new else 'already_enrolled'
+            result['enrollment'] = enrollment_ids.get(student_id)
+    return results
+
+
+def _resolve_users(emails):
+    """Map normalized emails to user ids.
+
+    Exact matches (on the address as given and lower-cased) use the unique
+    email index; only the remaining addresses fall back to a
+    case-insensitive comparison.
+    """
+    emails = list(emails)
+    candidates = set()
+    for email in emails:
+        candidates.update((email.strip(), normalize_email(email)))
+    users = {
+        normalize_email(email): pk
+        for pk, email in User.objects.filter(email__in=candidates).values_list('pk', 'email')
+    }
+    missing = {normalize_email(email) for email in emails} - set(users)
+    if missing:
+        users.update(
+            (normalize_email(email), pk)
+            for pk, email in User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=missing)
+            .values_list('pk', 'email')
+        )
+    return users
+
+
+def bulk_enroll(course, emails, chunk_size=1000):
+    """Enroll the users behind ``emails`` into ``course``.
+
+    Yields one result dict per input row, in input order, with a status of
+    ``enrolled``, ``already_enrolled``, ``user_not_found``,
+    ``invalid_email`` or ``duplicate``.
+    """
+    seen = set()
+    for chunk in _chunks(emails, chunk_size):
+        yield from _enroll_chunk(course, chunk, seen)
@@ -0,0 +1,206 @@
+"""In-memory bitmap index for faceted catalog filtering.
+
+Every facet value (a level, a category, free/paid, a price range) owns a
+bitmap over the active courses, packed eight courses per byte and laid out
+in catalog order (newest first). Filtering ANDs the OR of the selected
+values of each facet; the count of every facet value is a popcount of its
+bitmap intersected with the filters of the *other* facets, so selecting a
+level still shows how many courses every other level would give.
+
+The index is built once per process and rebuilt lazily whenever the
+catalog version changes, i.e. after any course, category or lesson write.
+"""
+import threading
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+
+from .cache import get_catalog_version
+from .models import Category, Course
+
+PRICE_RANGES = [
+    ('under-20', 'Under 20', 0, 20),
+    ('20-50', '20 to 50', 20, 50),
+    ('50-100', '50 to 100', 50, 100),
+    ('100-plus', '100 and above', 100, None),
+]
+
+FACETS = ('level', 'category', 'is_free', 'price')
+
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no'}
+
+
+class FacetIndex:
+    """Bitmaps of the active courses for every facet value."""
+
+    def __init__(self, course_ids, prices, bitmaps, labels):
+        self.course_ids = course_ids
+        self.prices = prices
+        self.size = len(course_ids)
+        self.bitmaps = bitmaps
+        self.labels = labels
+        self.all = self.pack(np.ones(self.size, dtype=bool))
+
+    @staticmethod
+    def pack(flags):
+        return np.packbits(flags)
+
+    def unpack(self, bitmap):
+        return np.unpackbits(bitmap, count=self.size).astype(bool)
+
+    @staticmethod
+    def count(bitmap):
+        return int(np.bitwise_count(bitmap).sum())
+
+    @classmethod
+    def build(cls):
+        rows = list(
+            Course.objects.filter(is_active=True)
+            .order_by('-created_at', '-pk')
+            .values_list('pk', 'level', 'category_id', 'is_free', 'price')
+        )
+        course_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        levels = np.array([row[1] for row in rows], dtype=object)
+        categories = np.array([row[2] or 0 for row in rows], dtype=np.int64)
+        free = np.array([row[3] for row in rows], dtype=bool)
+        prices = np.array([float(row[4]) for row in rows], dtype=np.float64)
+
+        level_labels = dict(Course._meta.get_field('level').choices)
+        category_labels = {
+            pk: (slug, name)
+            for pk, slug, name in Category.objects.filter(pk__in=set(categories.tolist())).values_list('pk', 'slug', 'name')
+        }
+
+        bitmaps = {facet: {} for facet in FACETS}
+        labels = {facet: {} for facet in FACETS}
+        for value, label in level_labels.items():
+            bitmaps['level'][value] = cls.pack(levels == value)
+            labels['level'][value] = str(label)
+        for pk, (slug, name) in sorted(category_labels.items(), key=lambda item: item[1][1]):
+            bitmaps['category'][slug] = cls.pack(categories == pk)
+            labels['category'][slug] = name
+        for value, flags in (('true', free), ('false', ~free)):
+            bitmaps['is_free'][value] = cls.pack(flags)
+            labels['is_free'][value] = 'Free' if value == 'true' else 'Paid'
+        for key, label, low, high in PRICE_RANGES:
+            flags = prices >= low
+            if high is not None:
+                flags &= prices < high
+            bitmaps['price'][key] = cls.pack(flags)
+            labels['price'][key] = label
+        return cls(course_ids, prices, bitmaps, labels)
+
+    def facet_filter(self, facet, values):
+        """OR of the bitmaps of the selected values of one facet."""
+        bitmap = np.zeros_like(self.all)
+        for value in values:
+            if value in self.bitmaps[facet]:
+                bitmap |= self.bitmaps[facet][value]
+        return bitmap
+
+    def price_filter(self, min_price=None, max_price=None):
+        flags = np.ones(self.size, dtype=bool)
+        if min_price is not None:
+            flags &= self.prices >= min_price
+        if max_price is not None:
+            flags &= self.prices <= max_price
+        return self.pack(flags)
+
+    def search(self, selections, min_price=None, max_price=None):
+        """Return the matching course ids (catalog order) and every facet count.
+
+        ``selections`` maps facet names to the selected values of the facet.
+        """
+        base = self.all
+        if min_price is not None or max_price is not None:
+            base = base & self.price_filter(min_price, max_price)
+        filters = {
+            facet: self.facet_filter(facet, values)
+            for facet, values in selections.items() if values
+        }
+
+        matches = base
+        for bitmap in filters.values():
+            matches = matches & bitmap
+
+        counts = {}
+        for facet in FACETS:
+            # Counts of a facet ignore its own selection.
+            others = base
+            for other, bitmap in filters.items():
+                if other != facet:
+                    others = others & bitmap
+            counts[facet] = [
+                {
+                    'value': value,
+                    'label': self.labels[facet][value],
+                    'count': self.count(bitmap & others),
+                    'selected': value in selections.get(facet, ()),
+                }
+                for value, bitmap in self.bitmaps[facet].items()
+            ]
+        return self.course_ids[self.unpack(matches)], counts
+
+
+class FacetIndexCache:
+    """Per-process facet index, rebuilt when the catalog version changes."""
+
+    def __init__(self):
+        self.version = None
+        self.index = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        version = get_catalog_version()
+        index = self.index
+        if index is not None and self.version == version:
+            return index
+        with self.lock:
+            if self.index is None or self.version != version:
+                self.index = FacetIndex.build()
+                self.version = version
+            return self.index
+
+
+facet_index = FacetIndexCache()
+
+
+def parse_values(query_params, name):
+    """Read a multi-valued filter given as repeated or comma-separated values."""
+    values = [
+        value.strip()
+        for raw in query_params.getlist(name)
+        for value in raw.split(',')
+        if value.strip()
+    ]
+    if name == 'is_free':
+        values = [
+            'true' if value.lower() in TRUE_VALUES else 'false' if value.lower() in FALSE_VALUES else value
+            for value in values
+        ]
+    elif name != 'category':
+        values = [value.lower() for value in values]
+    return values
+
+
+def parse_price(value):
+    """Parse a price bound; raises ``ValueError`` when it is not a number."""
+    if value in (None, ''):
+        return None
+    try:
+        return float(Decimal(value))
+    except InvalidOperation:
+        raise ValueError(f'Invalid price {value!r}.')
+
+
+def faceted_search(query_params):
+    """Filter the catalog by the facets in ``query_params``.
+
+    Returns ``(course_ids, facet_counts)``; raises ``ValueError`` for an
+    invalid price bound.
+    """
+    selections = {facet: parse_values(query_params, facet) for facet in FACETS}
+    min_price = parse_price(query_params.get('min_price'))
+    max_price = parse_price(query_params.get('max_price'))
+    return facet_index.get().search(selections, min_price, max_price)
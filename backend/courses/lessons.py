@@ -0,0 +1,60 @@
+"""Bulk lesson operations that avoid per-row ordering queries."""
+from django.db import transaction
+from django.db.models import Case, F, Max, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_catalog
+from .models import Lesson
+from .progress import invalidate_lesson_count
+
+
+def bulk_create_lessons(course, items, batch_size=500):
+    """Append many lessons to a course in one transaction.
+
+    Orders are assigned from a single ``MAX(order)`` lookup taken while the
+    course row is locked, instead of one lookup per ``Lesson.save``.
+    """
+    with transaction.atomic():
+        type(course).objects.select_for_update().filter(pk=course.pk).first()
+        last_order = Lesson.objects.filter(course=course).aggregate(last=Max('order'))['last'] or 0
+        lessons = [
+            Lesson(course=course, order=last_order + position, **item)
+            for position, item in enumerate(items, start=1)
+        ]
+        Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+        # bulk_create does not send post_save, so invalidate explicitly.
+        transaction.on_commit(invalidate_catalog)
+        transaction.on_commit(lambda: invalidate_lesson_count(course.pk))
+    return lessons
+
+
+def reorder_lessons(course, lesson_ids):
+    """Rewrite the order of every lesson of a course in two UPDATEs.
+
+    ``lesson_ids`` must list each lesson of the course exactly once; lesson
+    ``lesson_ids[i]`` receives order ``i + 1``. Lessons are first shifted
+    above the current maximum so the ``(course, order)`` unique constraint
+    is never violated while the final orders are written.
+    """
+    with transaction.atomic():
+        type(course).objects.select_for_update().filter(pk=course.pk).first()
+        lessons = Lesson.objects.filter(course=course)
+        current = dict(lessons.values_list('pk', 'order'))
+        if len(lesson_ids) != len(set(lesson_ids)) or set(lesson_ids) != set(current):
+            raise ValueError('The lesson list must contain every lesson of the course exactly once.')
+        if not lesson_ids:
+            return 0
+
+        offset = max(current.values()) + 1
+        now = timezone.now()
+        lessons.update(order=F('order') + offset)
+        lessons.update(
+            order=Case(
+                *[When(pk=pk, then=Value(position)) for position, pk in enumerate(lesson_ids, start=1)],
+                default=F('order'),
+                output_field=Lesson._meta.get_field('order'),
+            ),
+            updated_at=now,
+        )
+        transaction.on_commit(invalidate_catalog)
+    return len(lesson_ids)
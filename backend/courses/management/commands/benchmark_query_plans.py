@@ -0,0 +1,310 @@
+import random
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User, UserActivity
+from accounts.views import UserActivityListView
+from blog.models import BlogComment, BlogPost
+from blog.views import BlogCommentListView, BlogPostListView, FeaturedBlogPostListView
+from core.pagination import KeysetPagination, QuerySetChain
+from courses.models import (
+    Course, CourseRating, CourseSearchDocument, CourseSearchPosting, CourseSimilarity,
+    CourseTrendingScore, Lesson,
+)
+from courses.search import posting_rows
+from courses.views import (
+    CourseDetailView, CourseFacetedListView, CourseListView, CourseRecommendationView,
+    CourseReviewListView, CourseSearchView, FeaturedCourseListView, LessonListView,
+    PopularCourseListView,
+)
+from videos.models import Video, VideoComment, VideoStream
+from videos.views import VideoCommentListView, VideoListView
+
+SEARCH_TERMS = [f'term{i}' for i in range(200)]
+
+
+def seed(size, using):
+    """Fill an empty database with ``size`` courses and proportional activity.
+
+    Rows are bulk-created so model ``save()`` side effects (slugs, counters,
+    video processing) are skipped; only the shape of the data matters here.
+    """
+    rng = random.Random(0)
+    now = timezone.now()
+
+    def ago(limit_days=365):
+        return now - timedelta(seconds=rng.randrange(limit_days * 86400))
+
+    users = User.objects.using(using).bulk_create(
+        User(username=f'bench{i}', email=f'bench{i}@example.com', password='!') for i in range(size)
+    )
+    courses = Course.objects.using(using).bulk_create(
+        Course(
+            title=f'Course {i}', slug=f'course-{i}', description='', instructor=rng.choice(users),
+            is_active=rng.random() < 0.9, is_featured=rng.random() < 0.05, created_at=ago(),
+            enrollment_count=rng.randrange(500),
+        )
+        for i in range(size)
+    )
+    CourseTrendingScore.objects.using(using).bulk_create(
+        CourseTrendingScore(course=course, window=window, score=rng.random() * 100, computed_at=now)
+        for course in rng.sample(courses, size // 3) for window in ('24h', '7d', '30d')
+    )
+    CourseSearchDocument.objects.using(using).bulk_create(
+        CourseSearchDocument(course=course, length=8) for course in courses
+    )
+    CourseSearchPosting.objects.using(using).bulk_create(
+        CourseSearchPosting(course=course, term=term, frequency=rng.randint(1, 3), length=8)
+        for course in courses for term in rng.sample(SEARCH_TERMS, 8)
+    )
+    lessons = Lesson.objects.using(using).bulk_create(
+        Lesson(title=f'Lesson {i}', course=course, order=i, is_active=True)
+        for course in courses for i in range(5)
+    )
+    videos = Video.objects.using(using).bulk_create(
+        Video(
+            title=lesson.title, lesson=lesson, video_file=f'videos/{lesson.pk}.mp4',
+            is_active=rng.random() < 0.9, created_at=ago(),
+        )
+        for lesson in lessons
+    )
+    CourseRating.objects.using(using).bulk_create(
+        (CourseRating(student=user, course=course, rating=rng.randint(1, 5), created_at=ago())
+         for user in users for course in rng.sample(courses, 3)),
+        ignore_conflicts=True,
+    )
+    CourseSimilarity.objects.using(using).bulk_create(
+        CourseSimilarity(
+            course=course, similar_course=rng.choice(courses), rank=rank, score=rng.random(),
+            co_enrollments=rng.randint(2, 50), computed_at=now,
+        )
+        for course in courses for rank in range(1, 6)
+    )
+    posts = BlogPost.objects.using(using).bulk_create(
+        BlogPost(
+            title=f'Post {i}', slug=f'post-{i}', author=rng.choice(users), content='',
+            status='published' if rng.random() < 0.8 else 'draft', is_active=rng.random() < 0.95,
+            is_featured=rng.random() < 0.05, created_at=ago(),
+        )
+        for i in range(size)
+    )
+    BlogComment.objects.using(using).bulk_create(
+        BlogComment(post=rng.choice(posts), author=rng.choice(users), content='', is_approved=rng.random() < 0.9)
+        for _ in range(size * 5)
+    )
+    VideoComment.objects.using(using).bulk_create(
+        VideoComment(video=rng.choice(videos), user=rng.choice(users), content='', is_approved=rng.random() < 0.9)
+        for _ in range(size * 5)
+    )
+    VideoStream.objects.using(using).bulk_create(
+        VideoStream(user=rng.choice(users), video=rng.choice(videos), session_id=f'bench-{i}')
+        for i in range(size * 20)
+    )
+    UserActivity.objects.using(using).bulk_create(
+        UserActivity(user=rng.choice(users), activity_type='login', description='', timestamp=ago())
+        for _ in range(size * 20)
+    )
+    return {
+        'user': users[0].pk, 'course': courses[0].slug, 'post': posts[0].slug, 'video': videos[0].pk,
+        'term': SEARCH_TERMS[0], 'page': [course.pk for course in courses[:10]],
+    }
+
+
+def existing_sample(using):
+    """Pick the lookups of ``hot_queries`` from the first rows of an existing database."""
+    def first(queryset, field):
+        return queryset.using(using).order_by('pk').values_list(field, flat=True).first()
+
+    return {
+        'user': first(User.objects, 'pk'),
+        'course': first(Course.objects, 'slug'),
+        'post': first(BlogPost.objects, 'slug'),
+        'video': first(Video.objects, 'pk'),
+        'term': first(CourseSearchPosting.objects, 'term') or '',
+        'page': list(Course.objects.using(using).order_by('pk').values_list('pk', flat=True)[:10]),
+    }
+
+
+def view_queryset(view_class, using, path='/', user=None, **kwargs):
+    """The filtered queryset ``view_class`` reads to answer a GET of ``path``.
+
+    Returns ``(queryset, view)``; the queryset may be a ``QuerySetChain``.
+    """
+    request = APIRequestFactory().get(path)
+    force_authenticate(request, user)
+    view = view_class(args=(), kwargs=kwargs, format_kwarg=None)
+    view.request = view.initialize_request(request)
+    queryset = view.filter_queryset(view.get_queryset())
+    if isinstance(queryset, QuerySetChain):
+        return QuerySetChain(*[(part.using(using), load) for part, load in queryset.parts]), view
+    return queryset.using(using), view
+
+
+def chain_parts(name, queryset):
+    """Name every part of a ``QuerySetChain`` as its own hot query."""
+    if not isinstance(queryset, QuerySetChain):
+        return {name: queryset}
+    return {f'{name} [{index + 1}]': part for index, (part, _) in enumerate(queryset.parts)}
+
+
+def keyset_page(view_class, using, user=None, **kwargs):
+    """The queryset of the second ``?pagination=cursor`` page of a list view.
+
+    Reads the first page to get its ``next`` cursor, so the queryset carries
+    the seek predicate clients send for every later page. For a
+    ``QuerySetChain`` it is the part the cursor points into.
+    """
+    paginator = KeysetPagination()
+    queryset, view = view_queryset(view_class, using, '/?pagination=cursor', user, **kwargs)
+    paginator.paginate_queryset(queryset, view.request, view)
+    link = paginator.get_next_link()
+    if link is not None:
+        queryset, view = view_queryset(view_class, using, link, user, **kwargs)
+    if isinstance(queryset, QuerySetChain):
+        cursor = paginator.decode_cursor(view.request)
+        queryset = queryset.parts[cursor['part'] if cursor is not None else 0][0]
+        return paginator.get_page_queryset(queryset, view.request)
+    return paginator.get_page_queryset(queryset, view.request, view)
+
+
+def hot_queries(sample, using):
+    """The querysets behind the busiest read endpoints.
+
+    Each one is taken from the view serving it, so the benchmark follows the
+    views; ``sample`` holds the ids and slugs used for per-object lookups.
+    Search and facet pages load their ranked ids with ``in_bulk``; every
+    part of a ``QuerySetChain`` is listed as its own query.
+    """
+    user = User.objects.using(using).filter(pk=sample['user']).first()
+
+    def view(view_class, path='/', **kwargs):
+        return view_queryset(view_class, using, path, user, **kwargs)[0]
+
+    return {
+        'course list': view(CourseListView),
+        'course list (cursor)': keyset_page(CourseListView, using),
+        'featured courses': view(FeaturedCourseListView),
+        **chain_parts('popular courses', view(PopularCourseListView)),
+        'popular courses (cursor)': keyset_page(PopularCourseListView, using),
+        'course detail': view(CourseDetailView, slug=sample['course']).filter(slug=sample['course']),
+        'course lessons': view(LessonListView, course_slug=sample['course']),
+        'course reviews': view(CourseReviewListView, slug=sample['course']),
+        'course recommendations': view(CourseRecommendationView, slug=sample['course']),
+        'search postings': posting_rows([sample['term']]).using(using),
+        'search page': view(CourseSearchView).filter(pk__in=sample['page']).order_by(),
+        'facets page': view(CourseFacetedListView).filter(pk__in=sample['page']).order_by(),
+        'blog list': view(BlogPostListView),
+        'blog list (cursor)': keyset_page(BlogPostListView, using),
+        'featured posts': view(FeaturedBlogPostListView),
+        'blog comments': view(BlogCommentListView, slug=sample['post']),
+        'video list': view(VideoListView),
+        'video comments': view(VideoCommentListView, pk=sample['video']),
+        # VideoProgressView looks the stream up directly.
+        'video progress': VideoStream.objects.using(using).filter(
+            video_id=sample['video'], user_id=sample['user'],
+        ).order_by(),
+        'user activity (cursor)': keyset_page(UserActivityListView, using, user=user),
+    }
+
+
+def sequential_scans(plan, vendor):
+    """Tables read by a full scan in an EXPLAIN output."""
+    if vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    if vendor == 'sqlite':
+        # "SCAN table" without "USING ... INDEX" is a full table scan.
+        return [
+            match.group(1)
+            for match in re.finditer(r'\bSCAN (\w+)(?: AS \w+)?(.*)', plan)
+            if 'INDEX' not in match.group(2)
+        ]
+    return []
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, EXPLAIN the querysets of the hot read '
+        'endpoints and report the indexes they use and their run time. Fails '
+        'when one of them falls back to a full table scan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to benchmark.')
+        parser.add_argument('--size', type=int, default=2000, help='Number of seeded courses (default 2000).')
+        parser.add_argument(
+            '--existing', action='store_true',
+            help='Explain against the existing database instead of a seeded test database.',
+        )
+        parser.add_argument('--limit', type=int, default=10, help='Page size of every query (default 10).')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query.')
+        parser.add_argument('--no-fail', action='store_true', help='Report full table scans without failing.')
+
+    def handle(self, *args, **options):
+        # The views are called with test requests, whose 'testserver' host
+        # is only allowed in a test environment.
+        setup_test_environment()
+        try:
+            self.run(options)
+        finally:
+            teardown_test_environment()
+
+    def run(self, options):
+        using = options['database']
+        if options['existing']:
+            return self.benchmark(using, None, options)
+
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={using})
+        try:
+            self.stdout.write(f'Seeding {options["size"]} courses...')
+            sample = seed(options['size'], using)
+            with connections[using].cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.benchmark(using, sample, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def benchmark(self, using, sample, options):
+        connection = connections[using]
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            # Small tables are cheaper to scan; judge whether an index is usable.
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        failures = []
+        for name, queryset in hot_queries(sample or existing_sample(using), using).items():
+            queryset = queryset.using(using)[:options['limit']]
+            plan = queryset.explain()
+            started = time.perf_counter()
+            list(queryset)
+            elapsed = (time.perf_counter() - started) * 1000
+            scans = sequential_scans(plan, vendor)
+            indexes = sorted(set(re.findall(
+                r'(?:USING (?:COVERING )?INDEX|Index (?:Only )?Scan (?:Backward )?using) (\w+)', plan,
+            )))
+
+            if scans:
+                failures.append(name)
+                status = self.style.ERROR(f'full scan of {", ".join(scans)}')
+            else:
+                status = self.style.SUCCESS(', '.join(indexes) or 'no table scan')
+            self.stdout.write(f'{name:<28} {elapsed:7.2f} ms  {status}')
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+                self.stdout.write('')
+
+        if vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+        if failures and not options['no_fail']:
+            raise CommandError(f'Full table scans on: {", ".join(failures)}.')
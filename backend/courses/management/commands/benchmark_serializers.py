@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog.models import BlogPost, BlogTag
+from blog.serializers import BlogPostSerializer
+from courses.models import Course
+from courses.serializers import CourseSerializer
+from videos.models import Video
+from videos.serializers import VideoSerializer
+
+from .benchmark_query_plans import seed
+
+ENDPOINTS = [
+    ('courses', CourseSerializer, lambda: Course.objects.filter(is_active=True).order_by('-created_at')),
+    ('blog posts', BlogPostSerializer, lambda: BlogPost.objects.filter(status='published', is_active=True).order_by('-created_at')),
+    ('videos', VideoSerializer, lambda: Video.objects.filter(is_active=True).order_by('-created_at')),
+]
+
+
+def tag_posts(using):
+    """Give every post a few tags so the many-to-many path is exercised."""
+    tags = BlogTag.objects.using(using).bulk_create(
+        BlogTag(name=f'Tag {i}', slug=f'tag-{i}') for i in range(20)
+    )
+    through = BlogPost.tags.through
+    through.objects.using(using).bulk_create(
+        through(blogpost_id=post_id, blogtag_id=tags[(post_id + offset) % len(tags)].pk)
+        for post_id in BlogPost.objects.using(using).values_list('pk', flat=True)
+        for offset in range(post_id % 4)
+    )
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and compare the rows per second of the '
+        'course, blog post and video list serializers with their .values() '
+        'fast path. Fails if the two render different JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to benchmark.')
+        parser.add_argument('--size', type=int, default=2000, help='Number of seeded courses (default 2000).')
+        parser.add_argument('--rows', type=int, default=1000, help='Rows serialized per run (default 1000).')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path; the best is reported (default 5).')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={using})
+        try:
+            self.stdout.write(f'Seeding {options["size"]} courses...')
+            seed(options['size'], using)
+            tag_posts(using)
+            self.benchmark(using, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def benchmark(self, using, options):
+        request = Request(APIRequestFactory().get('/'))
+        context = {'request': request}
+        renderer = JSONRenderer()
+        rows, repeat = options['rows'], options['repeat']
+
+        mismatched = []
+        for name, serializer_class, get_queryset in ENDPOINTS:
+            queryset = get_queryset().using(using)
+            plan = serializer_class(context=context).get_values_plan()
+            if plan is None:
+                raise CommandError(f'{serializer_class.__name__} has no values plan.')
+
+            slow, expected = best_of(repeat, lambda: serializer_class(
+                list(queryset[:rows]), many=True, context=context,
+            ).data)
+            fast, actual = best_of(repeat, lambda: plan.serialize(plan.values(queryset)[:rows]))
+            count = len(expected)
+            identical = renderer.render(expected) == renderer.render(actual)
+            if not identical:
+                mismatched.append(name)
+
+            self.stdout.write(
+                f'{name:<12} {count / slow:>10,.0f} rows/s -> {count / fast:>10,.0f} rows/s '
+                f'({slow / fast:.1f}x)  '
+                + (self.style.SUCCESS('identical') if identical else self.style.ERROR('output differs'))
+            )
+
+        if mismatched:
+            raise CommandError(f'Fast path output differs for: {", ".join(mismatched)}.')
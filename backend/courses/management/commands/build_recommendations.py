@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.recommendations import METRICS, build_recommendations, refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the "students also took" neighbours of every course from '
+        'enrollments. Meant to run on a schedule (e.g. nightly, with '
+        '--incremental runs in between).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only rebuild courses affected by enrollments since the last build.',
+        )
+        parser.add_argument('--metric', choices=METRICS, help='Similarity metric (default: RECOMMENDATION_METRIC).')
+        parser.add_argument('--top-k', type=int, help='Neighbours stored per course (default: RECOMMENDATION_TOP_K).')
+        parser.add_argument(
+            '--min-overlap', type=int,
+            help='Minimum number of shared students (default: RECOMMENDATION_MIN_OVERLAP).',
+        )
+
+    def handle(self, *args, **options):
+        build = refresh_recommendations if options['incremental'] else build_recommendations
+        try:
+            written = build(
+                metric=options['metric'],
+                top_k=options['top_k'],
+                min_overlap=options['min_overlap'],
+                stdout=self.stdout if options['verbosity'] > 1 else None,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Stored neighbours for {written} courses.'))
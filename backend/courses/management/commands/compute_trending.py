@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.trending import compute_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the time-decayed trending scores behind the popular course '
+        'list. Meant to run periodically (e.g. every 15 minutes).'
+    )
+
+    def handle(self, *args, **options):
+        written = compute_trending()
+        summary = ', '.join(f'{window}: {count}' for window, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f'Stored trending scores ({summary}).'))
@@ -0,0 +1,56 @@
+import csv
+import itertools
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.enrollments import REPORT_FIELDS, bulk_enroll, read_emails
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Enroll a cohort of users, given by email, into a course and print a CSV report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_slug', help='Slug of the course to enroll into.')
+        parser.add_argument(
+            'csv_file', nargs='?',
+            help='CSV file with an "email" column (or emails in the first column); "-" reads stdin.',
+        )
+        parser.add_argument(
+            '--email', dest='emails', action='append', default=[],
+            help='Email to enroll; may be repeated.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of emails resolved and enrolled per batch (default: 1000).',
+        )
+
+    def handle(self, *args, **options):
+        course = Course.objects.filter(slug=options['course_slug']).first()
+        if course is None:
+            raise CommandError(f'Course "{options["course_slug"]}" does not exist.')
+        if not options['csv_file'] and not options['emails']:
+            raise CommandError('Provide a CSV file or at least one --email.')
+
+        source = None
+        emails = list(options['emails'])
+        if options['csv_file'] == '-':
+            source = sys.stdin
+        elif options['csv_file']:
+            source = open(options['csv_file'], newline='', encoding='utf-8-sig')
+
+        try:
+            rows = emails if source is None else itertools.chain(emails, read_emails(source))
+            writer = csv.DictWriter(self.stdout, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            totals = {}
+            for result in bulk_enroll(course, rows, chunk_size=options['chunk_size']):
+                writer.writerow(result)
+                totals[result['status']] = totals.get(result['status'], 0) + 1
+        finally:
+            if source is not None and source is not sys.stdin:
+                source.close()
+
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(totals.items()))
+        self.stderr.write(self.style.SUCCESS(f'Done: {summary or "nothing to do"}.'))
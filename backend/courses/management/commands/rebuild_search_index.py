@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from courses.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the course full-text search index from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of courses indexed per batch (default: 1000).',
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} courses.'))
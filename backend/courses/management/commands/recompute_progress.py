@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import CourseEnrollment
+from courses.progress import recompute_progress
+
+
+class Command(BaseCommand):
+    help = 'Recompute enrollment progress from lesson progress rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course', dest='course_slug',
+            help='Only recompute enrollments of the course with this slug.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of enrollments recomputed per batch (default: 1000).',
+        )
+
+    def handle(self, *args, **options):
+        enrollments = CourseEnrollment.objects.all()
+        if options['course_slug']:
+            enrollments = enrollments.filter(course__slug=options['course_slug'])
+        updated = recompute_progress(
+            enrollments,
+            chunk_size=options['chunk_size'],
+            stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} enrollments.'))
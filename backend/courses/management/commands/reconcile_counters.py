@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from accounts.models import UserProfile
+from blog.models import BlogComment, BlogLike, BlogPost, BlogView
+from core.counters import flush_counters, reconcile_counters
+from courses.cache import invalidate_catalog
+from courses.models import Course, CourseEnrollment, CourseRating
+from courses.ratings import refresh_average_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute denormalized course, profile and blog counters from their '
+        'source tables (enrollments, ratings, likes, comments and views), '
+        'including the course rating sum, star histogram and average.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows recomputed per batch (default: 1000).',
+        )
+
+    def get_counters(self):
+        return [
+            (Course, {
+                'enrollment_count': (CourseEnrollment.objects.all(), 'course'),
+                'enrolled_students': (CourseEnrollment.objects.filter(is_active=True), 'course'),
+                'total_ratings': (CourseRating.objects.all(), 'course'),
+                'rating_sum': (CourseRating.objects.all(), 'course', Sum('rating')),
+                **{
+                    f'rating_count_{stars}': (CourseRating.objects.filter(rating=stars), 'course')
+                    for stars in range(1, 6)
+                },
+            }),
+            (UserProfile, {
+                'total_courses_enrolled': (CourseEnrollment.objects.all(), 'student__profile'),
+            }),
+            (BlogPost, {
+                'likes': (BlogLike.objects.all(), 'post'),
+                'comment_count': (BlogComment.objects.all(), 'post'),
+                'views': (BlogView.objects.all(), 'post'),
+            }),
+        ]
+
+    def handle(self, *args, **options):
+        flush_counters()
+        verbosity = options['verbosity']
+        for model, counters in self.get_counters():
+            updated = reconcile_counters(
+                model, counters,
+                chunk_size=options['chunk_size'],
+                stdout=self.stdout if verbosity > 1 else None,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: corrected {updated} rows.'
+            ))
+        refresh_average_ratings()
+        invalidate_catalog()
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from courses.certificates import render_certificate
+from courses.models import CourseCertificate
+
+
+class Command(BaseCommand):
+    help = (
+        'Render certificates that are pending or failed. With --status '
+        'rendering, also renders those interrupted while rendering (e.g. by a '
+        'restart) once CERTIFICATE_RENDER_TIMEOUT has passed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of certificates rendered in parallel (default: 4).',
+        )
+        parser.add_argument(
+            '--status', nargs='+', default=['pending', 'failed'],
+            help='Certificate statuses to render (default: pending failed).',
+        )
+
+    def render(self, certificate):
+        certificate_id, status = certificate
+        try:
+            # A certificate still rendering may belong to a live worker; it
+            # is only taken over once its render has timed out.
+            return render_certificate(certificate_id, force=status != 'rendering')
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        ids = list(
+            CourseCertificate.objects.filter(status__in=options['status'])
+            .order_by('pk')
+            .values_list('pk', 'status')
+        )
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            rendered = sum(1 for path in executor.map(self.render, ids) if path)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} of {len(ids)} certificates.'))
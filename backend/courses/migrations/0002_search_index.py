@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseSearchDocument",
+            fields=[
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "length",
+                    models.FloatField(default=0, verbose_name="weighted length"),
+                ),
+                ("indexed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "course search document",
+                "verbose_name_plural": "course search documents",
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseSearchPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64, verbose_name="term")),
+                (
+                    "frequency",
+                    models.FloatField(verbose_name="weighted term frequency"),
+                ),
+                ("length", models.FloatField(verbose_name="weighted document length")),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_postings",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "course search posting",
+                "verbose_name_plural": "course search postings",
+                "unique_together": {("term", "course")},
+            },
+        ),
+    ]
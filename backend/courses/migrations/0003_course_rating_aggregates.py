@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    CourseRating = apps.get_model("courses", "CourseRating")
+    histograms = {}
+    rows = (
+        CourseRating.objects.order_by()
+        .values("course_id", "rating")
+        .annotate(total=Count("pk"))
+    )
+    for row in rows:
+        histograms.setdefault(row["course_id"], {})[row["rating"]] = row["total"]
+    courses = []
+    for course in Course.objects.filter(pk__in=list(histograms)):
+        histogram = histograms[course.pk]
+        course.total_ratings = sum(histogram.values())
+        course.rating_sum = sum(stars * total for stars, total in histogram.items())
+        for stars in range(1, 6):
+            setattr(course, f"rating_count_{stars}", histogram.get(stars, 0))
+        course.rating = round(course.rating_sum / course.total_ratings, 2)
+        courses.append(course)
+    fields = ["total_ratings", "rating_sum", "rating"] + [
+        f"rating_count_{stars}" for stars in range(1, 6)
+    ]
+    Course.objects.bulk_update(courses, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0002_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="rating_count_1",
+            field=models.PositiveIntegerField(default=0, verbose_name="1-star ratings"),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="rating_count_2",
+            field=models.PositiveIntegerField(default=0, verbose_name="2-star ratings"),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="rating_count_3",
+            field=models.PositiveIntegerField(default=0, verbose_name="3-star ratings"),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="rating_count_4",
+            field=models.PositiveIntegerField(default=0, verbose_name="4-star ratings"),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="rating_count_5",
+            field=models.PositiveIntegerField(default=0, verbose_name="5-star ratings"),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, verbose_name="rating sum"),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
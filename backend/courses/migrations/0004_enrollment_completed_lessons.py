@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0003_course_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="courseenrollment",
+            name="completed_lessons",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="completed lessons"
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0004_enrollment_completed_lessons"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="content hash"
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="file",
+            field=models.FileField(
+                blank=True, upload_to="certificates/", verbose_name="file"
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="rendered_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="rendered at"
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="rendering_error",
+            field=models.TextField(blank=True, verbose_name="rendering error"),
+        ),
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("rendering", "Rendering"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="status",
+            ),
+        ),
+    ]
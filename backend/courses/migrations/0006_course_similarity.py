@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0005_certificate_rendering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseSimilarity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="rank")),
+                ("score", models.FloatField(verbose_name="similarity score")),
+                (
+                    "co_enrollments",
+                    models.PositiveIntegerField(verbose_name="shared students"),
+                ),
+                ("computed_at", models.DateTimeField(verbose_name="computed at")),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similarities",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "similar_course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "course similarity",
+                "verbose_name_plural": "course similarities",
+                "ordering": ["course", "rank"],
+                "unique_together": {("course", "rank")},
+            },
+        ),
+    ]
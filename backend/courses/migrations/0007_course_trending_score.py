@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0006_course_similarity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseTrendingScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "window",
+                    models.CharField(
+                        choices=[
+                            ("24h", "Last 24 hours"),
+                            ("7d", "Last 7 days"),
+                            ("30d", "Last 30 days"),
+                        ],
+                        max_length=3,
+                        verbose_name="window",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="score")),
+                ("computed_at", models.DateTimeField(verbose_name="computed at")),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trending_scores",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "course trending score",
+                "verbose_name_plural": "course trending scores",
+                "indexes": [
+                    models.Index(
+                        fields=["window", "-score"], name="courses_trending_rank_idx"
+                    )
+                ],
+                "unique_together": {("window", "course")},
+            },
+        ),
+    ]
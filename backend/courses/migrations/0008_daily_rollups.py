@@ -0,0 +1,140 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0007_course_trending_score"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, unique=True, verbose_name="name"),
+                ),
+                ("position", models.DateTimeField(verbose_name="processed up to")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "rollup watermark",
+                "verbose_name_plural": "rollup watermarks",
+            },
+        ),
+        migrations.CreateModel(
+            name="LessonDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "completions",
+                    models.PositiveIntegerField(default=0, verbose_name="completions"),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lesson_daily_stats",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "lesson",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="courses.lesson",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "lesson daily stats",
+                "verbose_name_plural": "lesson daily stats",
+                "indexes": [
+                    models.Index(
+                        fields=["course", "date"], name="courses_lessonstats_course_idx"
+                    )
+                ],
+                "unique_together": {("lesson", "date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "enrollments",
+                    models.PositiveIntegerField(default=0, verbose_name="enrollments"),
+                ),
+                (
+                    "completions",
+                    models.PositiveIntegerField(default=0, verbose_name="completions"),
+                ),
+                (
+                    "ratings",
+                    models.PositiveIntegerField(default=0, verbose_name="ratings"),
+                ),
+                (
+                    "rating_sum",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="sum of ratings"
+                    ),
+                ),
+                (
+                    "views",
+                    models.PositiveIntegerField(default=0, verbose_name="video views"),
+                ),
+                (
+                    "watch_time",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="watch time in seconds"
+                    ),
+                ),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "course daily stats",
+                "verbose_name_plural": "course daily stats",
+                "ordering": ["course", "date"],
+                "unique_together": {("course", "date")},
+            },
+        ),
+    ]
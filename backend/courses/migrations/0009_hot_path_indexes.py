@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0008_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at"],
+                name="course_active_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("is_featured", True)),
+                fields=["-created_at"],
+                name="course_featured_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="courserating",
+            index=models.Index(
+                fields=["course", "-created_at"], name="courserating_course_recent_idx"
+            ),
+        ),
+    ]
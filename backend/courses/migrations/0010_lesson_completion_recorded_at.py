@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:53
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def backfill_completion_recorded_at(apps, schema_editor):
+    # Existing completions were rolled up by completed_at; keep that position.
+    LessonProgress = apps.get_model("courses", "LessonProgress")
+    LessonProgress.objects.filter(is_completed=True).update(
+        completion_recorded_at=Coalesce(F("completed_at"), F("last_accessed"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lessonprogress",
+            name="completion_recorded_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            backfill_completion_recorded_at, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name="lessonprogress",
+            index=models.Index(
+                fields=["completion_recorded_at"], name="lessonprogress_recorded_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:00
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_render_state(apps, schema_editor):
+    CourseCertificate = apps.get_model("courses", "CourseCertificate")
+    # Renders interrupted before this migration are picked up again at once.
+    CourseCertificate.objects.filter(status="rendering").update(
+        render_started_at=F("issued_at")
+    )
+    # Failed renders used to be retried on every poll; give them the
+    # remaining attempts instead.
+    CourseCertificate.objects.filter(status="failed").update(
+        status="pending", render_attempts=1
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_lesson_completion_recorded_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="render_after",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="render after"
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="render_attempts",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="render attempts"
+            ),
+        ),
+        migrations.AddField(
+            model_name="coursecertificate",
+            name="render_started_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="render started at"
+            ),
+        ),
+        migrations.RunPython(backfill_render_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_certificate_render_retries"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="coursetrendingscore",
+            name="courses_trending_rank_idx",
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-enrollment_count", "-created_at", "-id"],
+                name="course_active_popular_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="coursetrendingscore",
+            index=models.Index(
+                fields=["window", "-score", "-id"], name="courses_trending_rank_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 from accounts.models import User
 
@@ -76,6 +78,12 @@ class Course(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(5)]
     )
     total_ratings = models.PositiveIntegerField(_('total ratings'), default=0)
+    rating_sum = models.PositiveIntegerField(_('rating sum'), default=0)
+    rating_count_1 = models.PositiveIntegerField(_('1-star ratings'), default=0)
+    rating_count_2 = models.PositiveIntegerField(_('2-star ratings'), default=0)
+    rating_count_3 = models.PositiveIntegerField(_('3-star ratings'), default=0)
+    rating_count_4 = models.PositiveIntegerField(_('4-star ratings'), default=0)
+    rating_count_5 = models.PositiveIntegerField(_('5-star ratings'), default=0)
     
     # SEO and metadata
     meta_title = models.CharField(_('meta title'), max_length=60, blank=True)
@@ -91,6 +99,16 @@ class Course(models.Model):
         verbose_name = _('course')
         verbose_name_plural = _('courses')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=Q(is_active=True), name='course_active_recent_idx'),
+            models.Index(
+                fields=['-created_at'], condition=Q(is_active=True, is_featured=True), name='course_featured_recent_idx',
+            ),
+            models.Index(
+                fields=['-enrollment_count', '-created_at', '-id'], condition=Q(is_active=True),
+                name='course_active_popular_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -108,7 +126,12 @@ class Course(models.Model):
     def average_rating(self):
         if self.total_ratings == 0:
             return 0
-        return round(self.rating / self.total_ratings, 2)
+        return round(self.rating_sum / self.total_ratings, 2)
+    
+    @property
+    def rating_histogram(self):
+        """Number of ratings per star value, from 1 to 5."""
+        return {stars: getattr(self, f'rating_count_{stars}') for stars in range(1, 6)}
     
     @property
     def is_popular(self):
@@ -172,6 +195,7 @@ class CourseEnrollment(models.Model):
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
+    completed_lessons = models.PositiveIntegerField(_('completed lessons'), default=0)
     last_accessed = models.DateTimeField(auto_now=True)
     
     # Certificate
@@ -209,9 +233,19 @@ class CourseRating(models.Model):
         verbose_name_plural = _('course ratings')
         unique_together = ['student', 'course']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['course', '-created_at'], name='courserating_course_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} rated {self.course.title} with {self.rating} stars"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored rating so aggregate updates can apply the delta.
+        instance._stored_rating = instance.__dict__.get('rating')
+        return instance
 
 
 class LessonProgress(models.Model):
@@ -222,16 +256,36 @@ class LessonProgress(models.Model):
     completed_at = models.DateTimeField(blank=True, null=True)
     watch_time = models.PositiveIntegerField(_('watch time in seconds'), default=0)
     last_accessed = models.DateTimeField(auto_now=True)
+    # Server time of the completion; completed_at may be reported by the client.
+    completion_recorded_at = models.DateTimeField(blank=True, null=True, editable=False)
     
     class Meta:
         verbose_name = _('lesson progress')
         verbose_name_plural = _('lesson progress')
         unique_together = ['student', 'lesson']
         ordering = ['lesson__order']
+        indexes = [
+            # Range scans of the analytics rollups past their watermark.
+            models.Index(fields=['completion_recorded_at'], name='lessonprogress_recorded_idx'),
+        ]
     
     def __str__(self):
         status = "completed" if self.is_completed else "in progress"
         return f"{self.student.username} - {self.lesson.title} ({status})"
+    
+    def save(self, *args, **kwargs):
+        if not self.is_completed:
+            self.completion_recorded_at = None
+        elif self.completion_recorded_at is None:
+            self.completion_recorded_at = timezone.now()
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so only real completion flips are counted.
+        instance._stored_is_completed = instance.__dict__.get('is_completed')
+        return instance
 
 
 class CourseCertificate(models.Model):
@@ -242,6 +296,26 @@ class CourseCertificate(models.Model):
     issued_at = models.DateTimeField(auto_now_add=True)
     certificate_number = models.CharField(_('certificate number'), max_length=50, unique=True)
     
+    # Rendering
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('rendering', 'Rendering'),
+            ('ready', 'Ready'),
+            ('failed', 'Failed'),
+        ],
+        default='pending'
+    )
+    file = models.FileField(_('file'), upload_to='certificates/', blank=True)
+    content_hash = models.CharField(_('content hash'), max_length=64, blank=True)
+    rendering_error = models.TextField(_('rendering error'), blank=True)
+    rendered_at = models.DateTimeField(_('rendered at'), blank=True, null=True)
+    render_attempts = models.PositiveIntegerField(_('render attempts'), default=0)
+    render_after = models.DateTimeField(_('render after'), default=timezone.now)
+    render_started_at = models.DateTimeField(_('render started at'), blank=True, null=True)
+    
     class Meta:
         verbose_name = _('course certificate')
         verbose_name_plural = _('course certificates')
@@ -256,3 +330,131 @@ class CourseCertificate(models.Model):
             import uuid
             self.certificate_number = f"CERT-{uuid.uuid4().hex[:8].upper()}"
         super().save(*args, **kwargs)
+
+
+class CourseSearchDocument(models.Model):
+    """A course entry in the full-text search index."""
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.FloatField(_('weighted length'), default=0)
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('course search document')
+        verbose_name_plural = _('course search documents')
+    
+    def __str__(self):
+        return f"Search document for course {self.course_id}"
+
+
+class CourseSearchPosting(models.Model):
+    """Inverted index entry: a term occurring in a course."""
+    term = models.CharField(_('term'), max_length=64)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.FloatField(_('weighted term frequency'))
+    length = models.FloatField(_('weighted document length'))
+    
+    class Meta:
+        verbose_name = _('course search posting')
+        verbose_name_plural = _('course search postings')
+        unique_together = ['term', 'course']
+    
+    def __str__(self):
+        return f"{self.term} in course {self.course_id}"
+
+
+class CourseSimilarity(models.Model):
+    """A precomputed "students also took" neighbour of a course."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='similarities')
+    similar_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(_('rank'))
+    score = models.FloatField(_('similarity score'))
+    co_enrollments = models.PositiveIntegerField(_('shared students'))
+    computed_at = models.DateTimeField(_('computed at'))
+    
+    class Meta:
+        verbose_name = _('course similarity')
+        verbose_name_plural = _('course similarities')
+        unique_together = ['course', 'rank']
+        ordering = ['course', 'rank']
+    
+    def __str__(self):
+        return f"Course {self.course_id} -> {self.similar_course_id} ({self.score:.3f})"
+
+
+class CourseTrendingScore(models.Model):
+    """Time-decayed activity score of a course over a trending window."""
+    WINDOW_CHOICES = [
+        ('24h', _('Last 24 hours')),
+        ('7d', _('Last 7 days')),
+        ('30d', _('Last 30 days')),
+    ]
+    
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='trending_scores')
+    window = models.CharField(_('window'), max_length=3, choices=WINDOW_CHOICES)
+    score = models.FloatField(_('score'))
+    computed_at = models.DateTimeField(_('computed at'))
+    
+    class Meta:
+        verbose_name = _('course trending score')
+        verbose_name_plural = _('course trending scores')
+        unique_together = ['window', 'course']
+        indexes = [
+            models.Index(fields=['window', '-score', '-id'], name='courses_trending_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Course {self.course_id} trending {self.window}: {self.score:.2f}"
+
+
+class RollupWatermark(models.Model):
+    """High-water mark of an incremental rollup job over one event source."""
+    name = models.CharField(_('name'), max_length=100, unique=True)
+    position = models.DateTimeField(_('processed up to'))
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('rollup watermark')
+        verbose_name_plural = _('rollup watermarks')
+    
+    def __str__(self):
+        return f"{self.name} up to {self.position}"
+
+
+class CourseDailyStats(models.Model):
+    """Per-course, per-day activity totals for the instructor dashboard."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField(_('date'))
+    enrollments = models.PositiveIntegerField(_('enrollments'), default=0)
+    completions = models.PositiveIntegerField(_('completions'), default=0)
+    ratings = models.PositiveIntegerField(_('ratings'), default=0)
+    rating_sum = models.PositiveIntegerField(_('sum of ratings'), default=0)
+    views = models.PositiveIntegerField(_('video views'), default=0)
+    watch_time = models.PositiveBigIntegerField(_('watch time in seconds'), default=0)
+    
+    class Meta:
+        verbose_name = _('course daily stats')
+        verbose_name_plural = _('course daily stats')
+        unique_together = ['course', 'date']
+        ordering = ['course', 'date']
+    
+    def __str__(self):
+        return f"Course {self.course_id} on {self.date}"
+
+
+class LessonDailyStats(models.Model):
+    """Per-lesson, per-day completions, used for the lesson drop-off funnel."""
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='daily_stats')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lesson_daily_stats')
+    date = models.DateField(_('date'))
+    completions = models.PositiveIntegerField(_('completions'), default=0)
+    
+    class Meta:
+        verbose_name = _('lesson daily stats')
+        verbose_name_plural = _('lesson daily stats')
+        unique_together = ['lesson', 'date']
+        indexes = [
+            models.Index(fields=['course', 'date'], name='courses_lessonstats_course_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Lesson {self.lesson_id} on {self.date}"
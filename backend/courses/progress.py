@@ -0,0 +1,225 @@
+"""Incremental enrollment progress derived from LessonProgress."""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from .models import CourseEnrollment, Lesson, LessonProgress
+
+LESSON_COUNT_KEY = 'course:{}:published_lessons'
+
+
+def published_lessons_filter(prefix=''):
+    return {f'{prefix}is_published': True, f'{prefix}is_active': True}
+
+
+def get_published_lesson_count(course_id):
+    """Return the number of published lessons of a course, cached."""
+    key = LESSON_COUNT_KEY.format(course_id)
+    total = cache.get(key)
+    if total is None:
+        total = Lesson.objects.filter(course_id=course_id, **published_lessons_filter()).count()
+        cache.set(key, total, timeout=None)
+    return total
+
+
+def invalidate_lesson_count(course_id):
+    cache.delete(LESSON_COUNT_KEY.format(course_id))
+
+
+def progress_expression(completed, total):
+    """SQL expression for the progress percentage of ``completed`` lessons."""
+    if total <= 0:
+        return Value(0)
+    return Least(completed * 100 / total, Value(100), output_field=IntegerField())
+
+
+def apply_completion_change(student_id, lesson_id, delta):
+    """Count one lesson completing (``delta=1``) or reverting (``delta=-1``).
+
+    The enrollment's completed-lesson counter, percentage and
+    ``completed_at`` are updated in a single UPDATE; no progress rows are
+    counted. Like ``recompute_progress``, only published, active lessons
+    count, so changes to any other lesson are ignored.
+    """
+    course_id = (
+        Lesson.objects.filter(pk=lesson_id, **published_lessons_filter())
+        .values_list('course_id', flat=True)
+        .first()
+    )
+    if course_id is None:
+        return 0
+    return apply_completion_delta(student_id, course_id, delta)
+
+
+def apply_completion_delta(student_id, course_id, delta):
+    """Add ``delta`` completed lessons to a student's enrollment in a course."""
+    total = get_published_lesson_count(course_id)
+    completed = Case(
+        When(completed_lessons__lt=-delta, then=Value(0)),
+        default=F('completed_lessons') + delta,
+        output_field=IntegerField(),
+    )
+    if total:
+        # The new count is completed_lessons + delta, compared on the old value.
+        completed_at = Case(
+            When(completed_lessons__gte=total - delta, then=Coalesce(F('completed_at'), Value(timezone.now()))),
+            default=Value(None),
+        )
+    else:
+        completed_at = Value(None)
+    return CourseEnrollment.objects.filter(student_id=student_id, course_id=course_id).update(
+        completed_lessons=completed,
+        progress=progress_expression(completed, total),
+        completed_at=completed_at,
+    )
+
+
+def recompute_progress(enrollments, chunk_size=1000, stdout=None):
+    """Recompute progress for the given enrollments from their progress rows.
+
+    Enrollments are processed in primary-key chunks; each chunk costs one
+    grouped COUNT over ``LessonProgress`` and one ``bulk_update``.
+    """
+    totals = dict(
+        Lesson.objects.filter(**published_lessons_filter())
+        .order_by()
+        .values('course_id')
+        .annotate(total=Count('pk'))
+        .values_list('course_id', 'total')
+    )
+    now = timezone.now()
+    updated = 0
+    last_pk = None
+    while True:
+        chunk = enrollments.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk.only(
+            'id', 'student_id', 'course_id', 'completed_lessons', 'progress', 'completed_at',
+        )[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+
+        completed = {
+            (student_id, course_id): count
+            for student_id, course_id, count in (
+                LessonProgress.objects.filter(
+                    is_completed=True,
+                    student_id__in={row.student_id for row in rows},
+                    lesson__course_id__in={row.course_id for row in rows},
+                    **published_lessons_filter('lesson__'),
+                )
+                .order_by()
+                .values('student_id', 'lesson__course_id')
+                .annotate(total=Count('pk'))
+                .values_list('student_id', 'lesson__course_id', 'total')
+            )
+        }
+
+        changed = []
+        for enrollment in rows:
+            total = totals.get(enrollment.course_id, 0)
+            count = completed.get((enrollment.student_id, enrollment.course_id), 0)
+            progress = min(count * 100 // total, 100) if total else 0
+            completed_at = enrollment.completed_at
+            if progress == 100:
+                completed_at = completed_at or now
+            else:
+                completed_at = None
+            if (enrollment.completed_lessons, enrollment.progress, enrollment.completed_at) != (count, progress, completed_at):
+                enrollment.completed_lessons = count
+                enrollment.progress = progress
+                enrollment.completed_at = completed_at
+                changed.append(enrollment)
+        if changed:
+            CourseEnrollment.objects.bulk_update(changed, ['completed_lessons', 'progress', 'completed_at'])
+            updated += len(changed)
+        if stdout:
+            stdout.write(f'Checked enrollments up to pk {last_pk}, {updated} updated')
+    return updated
+
+
+def ingest_progress(student, updates):
+    """Apply a batch of lesson progress reports from one student.
+
+    ``updates`` is a list of dicts with ``lesson``, ``watch_time``,
+    ``is_completed`` and optionally ``completed_at``. Reports for lessons
+    outside the student's active enrollments are rejected. Reports are
+    merged with the stored rows so replaying an old queue is harmless:
+    watch time only grows and a completed lesson stays completed. Returns
+    one result dict per report, in order.
+    """
+    lesson_ids = {update['lesson'] for update in updates}
+    allowed = dict(
+        Lesson.objects.filter(
+            pk__in=lesson_ids,
+            is_active=True,
+            course__enrollments__student=student,
+            course__enrollments__is_active=True,
+        ).values_list('pk', 'course_id')
+    )
+    # Progress on drafts is kept but, as in recompute_progress, not counted.
+    counted = set(
+        Lesson.objects.filter(pk__in=allowed, **published_lessons_filter()).values_list('pk', flat=True)
+    )
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Create the missing rows, then lock every reported row: a
+        # concurrent batch for the same lessons waits here and then sees
+        # this batch's completions, so none is counted twice.
+        LessonProgress.objects.bulk_create(
+            [LessonProgress(student=student, lesson_id=lesson_id) for lesson_id in allowed],
+            ignore_conflicts=True,
+        )
+        stored = {
+            row['lesson_id']: row
+            for row in LessonProgress.objects.select_for_update()
+            .filter(student=student, lesson_id__in=allowed)
+            .order_by('lesson_id')
+            .values('lesson_id', 'watch_time', 'is_completed', 'completed_at', 'completion_recorded_at')
+        }
+
+        merged = {}
+        results = []
+        for update in updates:
+            lesson_id = update['lesson']
+            if lesson_id not in allowed:
+                results.append({'lesson': lesson_id, 'status': 'rejected', 'error': 'Not enrolled in this lesson\'s course.'})
+                continue
+            current = merged.get(lesson_id) or stored[lesson_id]
+            completed = current['is_completed'] or update.get('is_completed', False)
+            merged[lesson_id] = {
+                'watch_time': max(current['watch_time'], update.get('watch_time', 0)),
+                'is_completed': completed,
+                'completed_at': current['completed_at'] or (
+                    (update.get('completed_at') or now) if completed else None
+                ),
+                'completion_recorded_at': current['completion_recorded_at'] or (now if completed else None),
+            }
+            results.append({'lesson': lesson_id, 'status': 'applied'})
+
+        if merged:
+            LessonProgress.objects.bulk_create(
+                [LessonProgress(student=student, lesson_id=lesson_id, **values) for lesson_id, values in merged.items()],
+                update_conflicts=True,
+                unique_fields=['student', 'lesson'],
+                update_fields=['watch_time', 'is_completed', 'completed_at', 'completion_recorded_at', 'last_accessed'],
+            )
+            # bulk_create sends no signals, so feed newly completed lessons
+            # to the progress engine here, one UPDATE per course.
+            newly_completed = Counter(
+                allowed[lesson_id]
+                for lesson_id, values in merged.items()
+                if lesson_id in counted and values['is_completed'] and not stored[lesson_id]['is_completed']
+            )
+            for course_id, delta in newly_completed.items():
+                transaction.on_commit(
+                    lambda course_id=course_id, delta=delta: apply_completion_delta(student.pk, course_id, delta)
+                )
+    return results
@@ -0,0 +1,75 @@
+"""Incremental maintenance of the per-course rating aggregates."""
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Round
+
+from .cache import invalidate_catalog
+from .models import Course, CourseRating
+
+
+def _average(total, count):
+    """SQL expression for ``round(total / count, 2)`` without integer division."""
+    quotient = ExpressionWrapper(total * Value(1.0) / count, output_field=FloatField())
+    return Round(Cast(quotient, DecimalField(max_digits=12, decimal_places=4)), 2)
+
+
+def apply_rating_change(course_id, old=None, new=None):
+    """Apply one rating being added, changed or removed to its course.
+
+    ``old`` is the previous star value (``None`` for a new rating) and
+    ``new`` the current one (``None`` for a deleted rating). The count, sum,
+    star histogram and average are updated together in a single UPDATE, so
+    the aggregates never drift apart and no rating rows are scanned.
+    """
+    if old == new:
+        return 0
+    count_delta = (new is not None) - (old is not None)
+    sum_delta = (new or 0) - (old or 0)
+
+    updates = {
+        'total_ratings': F('total_ratings') + count_delta,
+        'rating_sum': F('rating_sum') + sum_delta,
+        # Every right-hand side sees the pre-update row, so the new average
+        # is computed from the new sum and count explicitly.
+        'rating': Case(
+            When(Q(total_ratings=-count_delta), then=Value(0)),
+            default=_average(F('rating_sum') + sum_delta, F('total_ratings') + count_delta),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+    }
+    if old is not None:
+        updates[f'rating_count_{old}'] = F(f'rating_count_{old}') - 1
+    if new is not None:
+        updates[f'rating_count_{new}'] = F(f'rating_count_{new}') + 1
+    updated = Course.objects.filter(pk=course_id).update(**updates)
+    if updated:
+        invalidate_catalog()
+    return updated
+
+
+def refresh_average_ratings(queryset=None):
+    """Recompute ``Course.rating`` from the stored sum and count."""
+    queryset = Course.objects.all() if queryset is None else queryset
+    return queryset.update(rating=Case(
+        When(total_ratings=0, then=Value(0)),
+        default=_average(F('rating_sum'), F('total_ratings')),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    ))
+
+
+def recompute_course_ratings(course_id):
+    """Rebuild the aggregates of one course from its rating rows."""
+    histogram = dict(
+        CourseRating.objects.filter(course_id=course_id)
+        .order_by()
+        .values('rating')
+        .annotate(total=Count('pk'))
+        .values_list('rating', 'total')
+    )
+    Course.objects.filter(pk=course_id).update(
+        total_ratings=sum(histogram.values()),
+        rating_sum=sum(stars * total for stars, total in histogram.items()),
+        **{f'rating_count_{stars}': histogram.get(stars, 0) for stars in range(1, 6)},
+    )
+    updated = refresh_average_ratings(Course.objects.filter(pk=course_id))
+    invalidate_catalog()
+    return updated
@@ -0,0 +1,230 @@
+"""Co-enrollment ("students also took") course recommendations.
+
+Similarities are precomputed from ``CourseEnrollment`` and stored as the
+top-K neighbours of every course in ``CourseSimilarity``, so serving
+recommendations is a single indexed lookup.
+
+The student-by-course enrollment matrix is held as sparse index arrays
+(CSR by student, CSC by course). The co-occurrence row of a course is the
+``bincount`` of the courses of its students, so a full build costs one
+vectorized pass per course, proportional to the number of co-enrolled
+pairs rather than to ``courses ** 2``. Rows are normalized with cosine
+(``c / sqrt(n_a * n_b)``) or Jaccard (``c / (n_a + n_b - c)``) similarity.
+
+The start of the last build is kept as a ``RollupWatermark``, written in
+the transaction that stores the rows, so incremental refreshes survive
+cache flushes and never skip enrollments of a failed build. A refresh
+rebuilds the courses whose enrollments changed and every course sharing
+a student with them, whose scores depend on the changed counts. It only
+loads the enrollments of the students of those courses, and takes the
+course sizes of the normalization from a grouped count.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .analytics import ROLLUP_LAG, advance_watermark
+from .models import Course, CourseEnrollment, CourseSimilarity, RollupWatermark
+
+METRICS = ('cosine', 'jaccard')
+
+WATERMARK = 'recommendations:enrollments'
+
+
+class EnrollmentMatrix:
+    """Sparse student-by-course enrollment matrix."""
+
+    def __init__(self, student_ids, course_ids, course_sizes=None):
+        self.courses, course_index = np.unique(course_ids, return_inverse=True)
+        _, student_index = np.unique(student_ids, return_inverse=True)
+        n_students = int(student_index.max()) + 1 if len(student_index) else 0
+
+        # CSR: the courses of each student.
+        order = np.argsort(student_index, kind='stable')
+        self.student_courses = course_index[order]
+        self.student_indptr = np.concatenate(([0], np.cumsum(np.bincount(student_index, minlength=n_students))))
+        # CSC: the students of each course.
+        order = np.argsort(course_index, kind='stable')
+        self.course_students = student_index[order]
+        loaded = np.bincount(course_index, minlength=len(self.courses))
+        self.course_indptr = np.concatenate(([0], np.cumsum(loaded)))
+        # Students per course, used to normalize; a partial matrix gets the
+        # totals from the database.
+        self.course_sizes = loaded if course_sizes is None else course_sizes(self.courses)
+
+    @classmethod
+    def from_database(cls, course_ids=None):
+        """Load the active enrollments, or only those of the students of ``course_ids``.
+
+        The partial matrix holds every co-occurrence of ``course_ids``, so
+        their rows are exact.
+        """
+        enrollments = CourseEnrollment.objects.filter(is_active=True)
+        course_sizes = None
+        if course_ids is not None:
+            students = enrollments.filter(course_id__in=list(course_ids)).values('student_id')
+            enrollments = enrollments.filter(student_id__in=students)
+            course_sizes = _course_sizes
+        rows = np.fromiter(
+            (
+                value
+                for pair in enrollments.values_list('student_id', 'course_id').iterator(chunk_size=10000)
+                for value in pair
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        return cls(rows[:, 0], rows[:, 1], course_sizes)
+
+    def index_of(self, course_ids):
+        if not len(self.courses):
+            return np.empty(0, dtype=np.int64)
+        positions = np.clip(np.searchsorted(self.courses, course_ids), 0, len(self.courses) - 1)
+        return positions[self.courses[positions] == course_ids]
+
+    def co_occurrence(self, index):
+        """Number of students shared by course ``index`` and every course."""
+        students = self.course_students[self.course_indptr[index]:self.course_indptr[index + 1]]
+        starts = self.student_indptr[students]
+        lengths = self.student_indptr[students + 1] - starts
+        # Gather the concatenated course lists of those students.
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        positions = np.arange(int(lengths.sum())) + offsets
+        return np.bincount(self.student_courses[positions], minlength=len(self.courses))
+
+    def similarity(self, index, others, co, metric):
+        """Similarity of course ``index`` to ``others`` sharing ``co`` students."""
+        size, sizes = self.course_sizes[index], self.course_sizes[others]
+        if metric == 'jaccard':
+            return co / (size + sizes - co)
+        return co / np.sqrt(size * sizes)
+
+
+def _course_sizes(courses, batch_size=10000):
+    """Active enrollments of each course of the sorted array ``courses``."""
+    totals = {}
+    for start in range(0, len(courses), batch_size):
+        totals.update(
+            CourseEnrollment.objects.filter(is_active=True, course_id__in=courses[start:start + batch_size].tolist())
+            .order_by()
+            .values('course_id')
+            .annotate(total=Count('pk'))
+            .values_list('course_id', 'total')
+        )
+    return np.array([totals.get(int(course_id), 0) for course_id in courses], dtype=np.int64)
+
+
+def _neighbours(matrix, index, metric, top_k, min_overlap, candidates):
+    co = matrix.co_occurrence(index)
+    co[index] = 0
+    co[~candidates] = 0
+    eligible = np.flatnonzero(co >= min_overlap)
+    if not len(eligible):
+        return []
+    scores = matrix.similarity(index, eligible, co[eligible], metric)
+    if len(eligible) > top_k:
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        top = np.arange(len(eligible))
+    # Best score first; more shared students, then newer course break ties.
+    top = top[np.lexsort((-matrix.courses[eligible[top]], -co[eligible[top]], -scores[top]))]
+    return [
+        (int(matrix.courses[eligible[i]]), float(scores[i]), int(co[eligible[i]]))
+        for i in top
+    ]
+
+
+def get_settings(metric=None, top_k=None, min_overlap=None):
+    metric = metric or getattr(settings, 'RECOMMENDATION_METRIC', 'cosine')
+    if metric not in METRICS:
+        raise ValueError(f'Unknown similarity metric {metric!r}; expected one of {", ".join(METRICS)}.')
+    return (
+        metric,
+        top_k or getattr(settings, 'RECOMMENDATION_TOP_K', 20),
+        min_overlap or getattr(settings, 'RECOMMENDATION_MIN_OVERLAP', 2),
+    )
+
+
+def build_recommendations(course_ids=None, metric=None, top_k=None, min_overlap=None,
+                          batch_size=1000, stdout=None):
+    """Recompute and store the top-K neighbours of courses.
+
+    All courses are rebuilt when ``course_ids`` is None; otherwise only the
+    rows of the given courses are replaced. Returns the number of courses
+    whose neighbours were written.
+    """
+    metric, top_k, min_overlap = get_settings(metric, top_k, min_overlap)
+    started = timezone.now()
+    matrix = EnrollmentMatrix.from_database(course_ids)
+    active = set(Course.objects.filter(is_active=True).values_list('pk', flat=True))
+    candidates = np.isin(matrix.courses, np.fromiter(active, dtype=np.int64, count=len(active)))
+
+    if course_ids is None:
+        targets = np.arange(len(matrix.courses))
+    else:
+        course_ids = np.asarray(sorted(course_ids), dtype=np.int64)
+        targets = matrix.index_of(course_ids)
+
+    written = 0
+    with transaction.atomic():
+        stale = CourseSimilarity.objects.all()
+        if course_ids is not None:
+            stale = stale.filter(course_id__in=course_ids.tolist())
+        stale.delete()
+
+        rows = []
+        for done, index in enumerate(targets, start=1):
+            course_id = int(matrix.courses[index])
+            if course_id not in active:
+                continue
+            neighbours = _neighbours(matrix, index, metric, top_k, min_overlap, candidates)
+            rows.extend(
+                CourseSimilarity(
+                    course_id=course_id, similar_course_id=similar_id, rank=rank,
+                    score=score, co_enrollments=shared, computed_at=started,
+                )
+                for rank, (similar_id, score, shared) in enumerate(neighbours, start=1)
+            )
+            written += bool(neighbours)
+            if len(rows) >= batch_size:
+                CourseSimilarity.objects.bulk_create(rows)
+                rows = []
+            if stdout and done % batch_size == 0:
+                stdout.write(f'Computed neighbours of {done}/{len(targets)} courses...')
+        CourseSimilarity.objects.bulk_create(rows)
+        if course_ids is None:
+            RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'position': started})
+    return written
+
+
+def refresh_recommendations(**kwargs):
+    """Rebuild only the courses affected by enrollments since the last build.
+
+    A new enrollment changes the size of its course, and so the scores of
+    that course against every course sharing a student with it: all of
+    their rows are rebuilt. Falls back to a full build when no previous
+    build is recorded. Removed enrollments are only picked up by a full
+    build.
+    """
+    with transaction.atomic():
+        # Holding the watermark lock serializes concurrent refreshes.
+        since = advance_watermark(WATERMARK, timezone.now())
+        if since is None:
+            return build_recommendations(**kwargs)
+        # Rebuilding a row twice is harmless; reaching back by ROLLUP_LAG
+        # covers enrollments committed after the previous build started.
+        changed = set(
+            CourseEnrollment.objects.filter(enrolled_at__gte=since - ROLLUP_LAG)
+            .values_list('course_id', flat=True)
+            .distinct()
+        )
+        if not changed:
+            return 0
+        students = CourseEnrollment.objects.filter(is_active=True, course_id__in=changed).values('student_id')
+        affected = changed | set(
+            CourseEnrollment.objects.filter(is_active=True, student_id__in=students)
+            .values_list('course_id', flat=True)
+            .distinct()
+        )
+        return build_recommendations(course_ids=affected, **kwargs)
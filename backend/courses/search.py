@@ -0,0 +1,396 @@
+"""Ranked full-text search over the course catalog.
+
+Courses are tokenized into an inverted index stored in
+``CourseSearchPosting`` (one row per term/course pair holding the
+field-weighted term frequency and document length) and
+``CourseSearchDocument`` (one row per indexed course, used for the
+collection statistics). Queries are scored with Okapi BM25.
+
+Posting lists are cached per process as NumPy arrays and dropped whenever
+the index version changes, so repeated queries never touch the database
+for postings and only hit it once per term after the catalog changes.
+Scoring is vectorized, and only the requested page of hits is sorted.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from .models import Course, CourseSearchDocument, CourseSearchPosting
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Relative weight of each indexed field
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'keywords': 2.0,
+    'category': 2.0,
+    'short_description': 1.5,
+    'description': 1.0,
+}
+
+MAX_TERM_LENGTH = 64
+
+VERSION_KEY = 'search:version'
+STATS_KEY = 'search:stats'
+
+STOPWORDS = frozenset("""
+    a about above after again against all am an and any are as at be because
+    been before being below between both but by can did do does doing down
+    during each few for from further had has have having he her here hers him
+    his how i if in into is it its itself just me more most my no nor not now
+    of off on once only or other our ours out over own same she should so some
+    such than that the their theirs them then there these they this those
+    through to too under until up very was we were what when where which while
+    who whom why will with you your yours
+""".split())
+
+TOKEN_RE = re.compile(r'[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?')
+
+VOWELS = frozenset('aeiou')
+
+# Derivational suffixes mapped to their replacement, longest first.
+SUFFIXES = (
+    ('ational', 'ate'),
+    ('fulness', 'ful'),
+    ('iveness', 'ive'),
+    ('ization', 'ize'),
+    ('ousness', 'ous'),
+    ('tional', 'tion'),
+    ('biliti', 'ble'),
+    ('ation', 'ate'),
+    ('alism', 'al'),
+    ('ement', ''),
+    ('ness', ''),
+    ('ment', ''),
+    ('ator', 'ate'),
+    ('ical', 'ic'),
+    ('ful', ''),
+    ('ism', ''),
+    ('ist', ''),
+)
+
+
+def _has_vowel(word):
+    return any(char in VOWELS for char in word)
+
+
+def stem(word):
+    """Reduce a token to its stem with a light Porter-style suffix stripper."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+
+    # Plurals
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('ies'):
+        word = word[:-3] + 'y'
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+
+    # Past tense and gerunds
+    for suffix in ('ingly', 'edly', 'ing', 'ed'):
+        if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+            word = word[:-len(suffix)]
+            if word.endswith(('at', 'bl', 'iz')):
+                word += 'e'
+            elif len(word) > 2 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+
+    if word.endswith('ly') and len(word) > 4:
+        word = word[:-2]
+
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+
+    return word
+
+
+def tokenize(text):
+    """Split text into normalized, stemmed search terms."""
+    if not text:
+        return []
+    return [
+        stem(token)[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def analyze_course(course):
+    """Return the weighted term frequencies and weighted length of a course."""
+    fields = {
+        'title': course.title,
+        'keywords': course.keywords,
+        'category': course.category.name if course.category_id else '',
+        'short_description': course.short_description,
+        'description': course.description,
+    }
+    frequencies = defaultdict(float)
+    length = 0.0
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for term, count in Counter(tokenize(text)).items():
+            frequencies[term] += count * weight
+            length += count * weight
+    return frequencies, length
+
+
+def _bump_version():
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+    cache.delete(STATS_KEY)
+
+
+def get_index_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def _build_rows(course):
+    frequencies, length = analyze_course(course)
+    document = CourseSearchDocument(course_id=course.pk, length=length)
+    postings = [
+        CourseSearchPosting(term=term, course_id=course.pk, frequency=frequency, length=length)
+        for term, frequency in frequencies.items()
+    ]
+    return document, postings
+
+
+def index_course(course):
+    """Replace the index entries of a single course."""
+    with transaction.atomic():
+        CourseSearchPosting.objects.filter(course_id=course.pk).delete()
+        CourseSearchDocument.objects.filter(course_id=course.pk).delete()
+        if course.is_active:
+            document, postings = _build_rows(course)
+            document.save()
+            CourseSearchPosting.objects.bulk_create(postings)
+    _bump_version()
+
+
+def remove_course(course_id):
+    """Drop a course from the index."""
+    CourseSearchPosting.objects.filter(course_id=course_id).delete()
+    CourseSearchDocument.objects.filter(course_id=course_id).delete()
+    _bump_version()
+
+
+def _insert_rows(table, columns, rows):
+    """Insert plain tuples with a single ``executemany`` call."""
+    if not rows:
+        return
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def rebuild_index(batch_size=1000, stdout=None):
+    """Rebuild the whole index from the active courses.
+
+    Rows are written with raw ``executemany`` batches: a 100k-course catalog
+    produces millions of postings, and model instantiation would dominate.
+    """
+    document_table = CourseSearchDocument._meta.db_table
+    posting_table = CourseSearchPosting._meta.db_table
+    now = timezone.now()
+
+    with transaction.atomic():
+        CourseSearchPosting.objects.all().delete()
+        CourseSearchDocument.objects.all().delete()
+
+        courses = (
+            Course.objects.filter(is_active=True)
+            .select_related('category')
+            .only(
+                'id', 'title', 'keywords', 'short_description', 'description',
+                'is_active', 'category__name',
+            )
+            .order_by('pk')
+        )
+        indexed = 0
+        documents, postings = [], []
+        for course in courses.iterator(chunk_size=batch_size):
+            frequencies, length = analyze_course(course)
+            documents.append((course.pk, length, now))
+            postings.extend((term, course.pk, frequency, length) for term, frequency in frequencies.items())
+            if len(documents) >= batch_size:
+                _insert_rows(document_table, ('course_id', 'length', 'indexed_at'), documents)
+                _insert_rows(posting_table, ('term', 'course_id', 'frequency', 'length'), postings)
+                indexed += len(documents)
+                documents, postings = [], []
+                if stdout:
+                    stdout.write(f'Indexed {indexed} courses...')
+        _insert_rows(document_table, ('course_id', 'length', 'indexed_at'), documents)
+        _insert_rows(posting_table, ('term', 'course_id', 'frequency', 'length'), postings)
+        indexed += len(documents)
+    _bump_version()
+    return indexed
+
+
+def get_index_stats():
+    """Return the document count and average document length."""
+    stats = cache.get(STATS_KEY)
+    if stats is None:
+        stats = CourseSearchDocument.objects.aggregate(
+            total=Count('pk'), average_length=Avg('length')
+        )
+        stats['average_length'] = stats['average_length'] or 0.0
+        cache.set(STATS_KEY, stats, timeout=None)
+    return stats
+
+
+EMPTY_POSTINGS = (
+    np.empty(0, dtype=np.int64),
+    np.empty(0, dtype=np.float64),
+    np.empty(0, dtype=np.float64),
+)
+
+
+def posting_rows(terms):
+    """``(term, course_id, frequency, length)`` of every posting of ``terms``."""
+    return CourseSearchPosting.objects.filter(term__in=terms).values_list('term', 'course_id', 'frequency', 'length')
+
+
+class PostingCache:
+    """Per-process cache of posting lists, invalidated by the index version.
+
+    Each posting list is held as three parallel NumPy arrays (course ids,
+    weighted term frequencies and document lengths) so a query can be
+    scored without a Python-level loop over its postings.
+    """
+
+    def __init__(self, max_terms=5000):
+        self.max_terms = max_terms
+        self.version = None
+        self.postings = {}
+        self.lock = threading.Lock()
+
+    def get(self, terms):
+        version = get_index_version()
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.postings = {}
+            found = {term: self.postings[term] for term in terms if term in self.postings}
+
+        missing = [term for term in terms if term not in found]
+        if missing:
+            columns = defaultdict(lambda: ([], [], []))
+            for term, course_id, frequency, length in posting_rows(missing).iterator(chunk_size=10000):
+                ids, frequencies, lengths = columns[term]
+                ids.append(course_id)
+                frequencies.append(frequency)
+                lengths.append(length)
+            loaded = {
+                term: tuple(
+                    np.array(values, dtype=dtype)
+                    for values, dtype in zip(columns[term], (np.int64, np.float64, np.float64))
+                ) if term in columns else EMPTY_POSTINGS
+                for term in missing
+            }
+            with self.lock:
+                if version == self.version:
+                    if len(self.postings) + len(loaded) > self.max_terms:
+                        self.postings = {}
+                    self.postings.update(loaded)
+            found.update(loaded)
+        return found
+
+
+posting_cache = PostingCache()
+
+
+class SearchResults:
+    """Ranked search hits, best match first.
+
+    Behaves like a read-only sequence of ``(course_id, score)`` pairs so it
+    can be handed straight to a paginator. Slicing only sorts the prefix
+    that is actually requested.
+    """
+
+    def __init__(self, course_ids, scores):
+        self.course_ids = course_ids
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.course_ids)
+
+    def count(self):
+        return len(self)
+
+    def __iter__(self):
+        return iter(self[:len(self)])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0] if index >= 0 else list(self)[index]
+        start, stop, step = index.indices(len(self))
+        if start >= stop:
+            return []
+        if stop < len(self):
+            # Keep every hit scoring at least as high as the stop-th one, so
+            # ties at the page cut are ordered by the sort below rather than
+            # picked arbitrarily by the partition.
+            threshold = -np.partition(-self.scores, stop - 1)[stop - 1]
+            top = np.flatnonzero(self.scores >= threshold)
+        else:
+            top = np.arange(len(self))
+        # Highest score first, newest course first among ties.
+        order = top[np.lexsort((-self.course_ids[top], -self.scores[top]))]
+        return [
+            (int(self.course_ids[i]), float(self.scores[i]))
+            for i in order[start:stop:step]
+        ]
+
+
+def search_courses(query):
+    """Score every course matching the query with BM25."""
+    empty = SearchResults(EMPTY_POSTINGS[0], EMPTY_POSTINGS[1])
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return empty
+
+    stats = get_index_stats()
+    total = stats['total']
+    if not total:
+        return empty
+    average_length = stats['average_length'] or 1.0
+
+    matched_ids, matched_scores = [], []
+    postings = posting_cache.get(terms)
+    for term in terms:
+        ids, frequencies, lengths = postings[term]
+        if not len(ids):
+            continue
+        df = len(ids)
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+        norm = K1 * (1 - B + B * lengths / average_length)
+        matched_ids.append(ids)
+        matched_scores.append(idf * frequencies * (K1 + 1) / (frequencies + norm))
+
+    if not matched_ids:
+        return empty
+
+    # Sum per-term scores by course id over a dense accumulator.
+    ids = np.concatenate(matched_ids)
+    totals = np.bincount(ids, weights=np.concatenate(matched_scores))
+    course_ids = np.flatnonzero(totals)
+    return SearchResults(course_ids, totals[course_ids])
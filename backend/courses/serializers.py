@@ -1,28 +1,143 @@
 # backend/courses/serializers.py
 from rest_framework import serializers
-from .models import Category, Course, Lesson, CourseEnrollment, CourseRating
+from accounts.models import User
+from core.serializers import DynamicFieldsModelSerializer
+from videos.models import Video
+from .models import Category, Course, Lesson, CourseEnrollment, CourseRating, CourseCertificate, CourseSimilarity
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Course
         fields = '__all__'
+        expandable_fields = {
+            'category': CategorySerializer,
+            'instructor': 'accounts.serializers.PublicUserSerializer',
+        }
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Lesson
         fields = '__all__'
+        expandable_fields = {
+            'course': CourseSerializer,
+            'video': 'videos.serializers.VideoSerializer',
+        }
 
-class CourseEnrollmentSerializer(serializers.ModelSerializer):
+class CourseRecommendationSerializer(serializers.ModelSerializer):
+    course = CourseSerializer(source='similar_course', read_only=True)
+
+    class Meta:
+        model = CourseSimilarity
+        fields = ['rank', 'score', 'co_enrollments', 'course']
+
+class LessonImportSerializer(serializers.ModelSerializer):
+    """A lesson in a bulk import; course and order are set by the server."""
+    class Meta:
+        model = Lesson
+        exclude = ['course', 'order']
+
+class LessonReorderSerializer(serializers.Serializer):
+    lessons = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """A cohort to enroll: a list of emails and/or a CSV file of emails."""
+    emails = serializers.ListField(child=serializers.CharField(allow_blank=True), required=False)
+    file = serializers.FileField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('emails') and not attrs.get('file'):
+            raise serializers.ValidationError('Provide a list of emails or a CSV file.')
+        return attrs
+
+class CourseCertificateSerializer(serializers.ModelSerializer):
+    course = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+
+    class Meta:
+        model = CourseCertificate
+        fields = ['certificate_number', 'course', 'issued_at', 'status', 'file', 'rendered_at']
+        read_only_fields = fields
+
+class LessonProgressUpdateSerializer(serializers.Serializer):
+    lesson = serializers.IntegerField()
+    watch_time = serializers.IntegerField(min_value=0, default=0)
+    is_completed = serializers.BooleanField(default=False)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True)
+
+class LessonProgressBatchSerializer(serializers.Serializer):
+    """A batch of lesson progress reports, e.g. an offline client's queue."""
+    max_updates = 500
+    updates = LessonProgressUpdateSerializer(many=True, allow_empty=False)
+
+    def validate_updates(self, value):
+        if len(value) > self.max_updates:
+            raise serializers.ValidationError(f'At most {self.max_updates} updates per batch.')
+        return value
+
+class CourseEnrollmentSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = CourseEnrollment
         fields = '__all__'
+        expandable_fields = {
+            'course': CourseSerializer,
+        }
 
-class CourseRatingSerializer(serializers.ModelSerializer):
+class CourseRatingSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = CourseRating
         fields = '__all__'
+        expandable_fields = {
+            'student': 'accounts.serializers.PublicUserSerializer',
+            'course': CourseSerializer,
+        }
+
+class OutlineCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug', 'icon', 'color']
+
+class OutlineInstructorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'avatar']
+
+class OutlineVideoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Video
+        fields = ['id', 'title', 'duration', 'resolution', 'format', 'is_processed', 'is_public']
+
+class OutlineLessonSerializer(serializers.ModelSerializer):
+    """A lesson in a course outline, without its content body."""
+    video = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'order', 'duration', 'is_free', 'is_published', 'video_url', 'video', 'updated_at']
+
+    def get_video(self, lesson):
+        try:
+            video = lesson.video
+        except Video.DoesNotExist:
+            return None
+        if not video.is_active:
+            return None
+        return OutlineVideoSerializer(video).data
+
+class CourseOutlineSerializer(serializers.ModelSerializer):
+    """A course with its category, instructor, lessons and lesson videos."""
+    category = OutlineCategorySerializer(read_only=True)
+    instructor = OutlineInstructorSerializer(read_only=True)
+    lessons = OutlineLessonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Course
+        fields = [
+            'id', 'title', 'slug', 'short_description', 'level', 'thumbnail',
+            'preview_video', 'duration', 'total_lessons', 'is_free', 'price',
+            'rating', 'total_ratings', 'enrolled_students', 'category',
+            'instructor', 'lessons', 'updated_at',
+        ]
@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.counters import counters_flushed, decrement, increment
+
+from .cache import invalidate_catalog
+from .enrollments import record_enrollments, unrecord_enrollment
+from .models import Category, Course, CourseEnrollment, CourseRating, Lesson, LessonProgress
+from .progress import apply_completion_change, invalidate_lesson_count
+from .ratings import apply_rating_change, recompute_course_ratings
+from .search import index_course, remove_course
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Invalidate cached catalog responses once the change is committed."""
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(counters_flushed)
+def invalidate_catalog_on_counter_flush(sender, models, **kwargs):
+    """Invalidate cached catalog responses once course counters are written."""
+    if Course in models:
+        transaction.on_commit(invalidate_catalog)
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_index(sender, instance, **kwargs):
+    """Re-index a course after it is saved."""
+    transaction.on_commit(lambda: index_course(instance))
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_from_search_index(sender, instance, **kwargs):
+    """Drop a deleted course from the search index."""
+    course_id = instance.pk
+    transaction.on_commit(lambda: remove_course(course_id))
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_courses(sender, instance, created, **kwargs):
+    """Re-index a category's courses, since the category name is indexed."""
+    if created:
+        return
+
+    def reindex():
+        for course in instance.courses.select_related('category').iterator():
+            index_course(course)
+
+    transaction.on_commit(reindex)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    """Count a new enrollment on its course."""
+    if not created:
+        return
+    increment(Course, instance.course_id, 'enrollment_count')
+    if instance.is_active:
+        increment(Course, instance.course_id, 'enrolled_students')
+    transaction.on_commit(lambda: record_enrollments(instance.course, [instance.student_id]))
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    """Remove a deleted enrollment from its course and profile counters."""
+    decrement(Course, instance.course_id, 'enrollment_count')
+    if instance.is_active:
+        decrement(Course, instance.course_id, 'enrolled_students')
+    student_id = instance.student_id
+    transaction.on_commit(lambda: unrecord_enrollment(student_id))
+
+
+@receiver(post_save, sender=CourseRating)
+def update_rating_aggregates(sender, instance, created, **kwargs):
+    """Fold a new or changed rating into its course aggregates."""
+    old = None if created else getattr(instance, '_stored_rating', None)
+    new = instance.rating
+    instance._stored_rating = new
+    if not created and old is None:
+        # Saved without having been loaded from the database: the previous
+        # value is unknown, so recompute this course from its ratings.
+        transaction.on_commit(lambda: recompute_course_ratings(instance.course_id))
+        return
+    course_id = instance.course_id
+    transaction.on_commit(lambda: apply_rating_change(course_id, old=old, new=new))
+
+
+@receiver(post_delete, sender=CourseRating)
+def remove_rating_from_aggregates(sender, instance, **kwargs):
+    """Remove a deleted rating from its course aggregates."""
+    old = getattr(instance, '_stored_rating', None) or instance.rating
+    course_id = instance.course_id
+    transaction.on_commit(lambda: apply_rating_change(course_id, old=old))
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_published_lesson_count(sender, instance, **kwargs):
+    """Drop the cached published-lesson count of the lesson's course."""
+    course_id = instance.course_id
+    transaction.on_commit(lambda: invalidate_lesson_count(course_id))
+
+
+@receiver(post_save, sender=LessonProgress)
+def update_enrollment_progress(sender, instance, created, **kwargs):
+    """Advance (or roll back) enrollment progress when a lesson flips completion."""
+    was_completed = False if created else getattr(instance, '_stored_is_completed', None)
+    instance._stored_is_completed = instance.is_completed
+    if was_completed is None or was_completed == instance.is_completed:
+        return
+    student_id, lesson_id = instance.student_id, instance.lesson_id
+    delta = 1 if instance.is_completed else -1
+    transaction.on_commit(lambda: apply_completion_change(student_id, lesson_id, delta))
+
+
+@receiver(post_delete, sender=LessonProgress)
+def remove_completed_lesson(sender, instance, **kwargs):
+    """Roll back enrollment progress when a completed progress row is deleted."""
+    if instance.is_completed:
+        student_id, lesson_id = instance.student_id, instance.lesson_id
+        transaction.on_commit(lambda: apply_completion_change(student_id, lesson_id, -1))
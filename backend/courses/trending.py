@@ -0,0 +1,141 @@
+"""Time-decayed trending scores for the popular course list.
+
+A periodic job folds recent activity into ``CourseTrendingScore``, one row
+per course and window, so the popular list is a top-N scan of the
+``(window, -score)`` index instead of a sort over the whole catalog. The
+courses without a score follow, most enrolled first, read from their own
+index by a second query (see ``popular_courses``).
+
+Every event contributes ``weight * 0.5 ** (age / half_life)``; events older
+than the window are ignored. Activity is bucketed per course and hour in
+SQL, so the job reads at most ``courses * hours`` rows however busy the
+site is, and the decay is applied to the buckets with NumPy.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from core.pagination import QuerySetChain
+from videos.models import VideoStream
+
+from .cache import invalidate_catalog
+from .models import Course, CourseEnrollment, CourseRating, CourseTrendingScore
+
+# Window length and half-life of each trending window.
+WINDOWS = {
+    '24h': (timedelta(hours=24), timedelta(hours=6)),
+    '7d': (timedelta(days=7), timedelta(days=1)),
+    '30d': (timedelta(days=30), timedelta(days=5)),
+}
+DEFAULT_WINDOW = '7d'
+
+# Relative weight of each kind of activity.
+ENROLLMENT_WEIGHT = 3.0
+RATING_WEIGHT = 2.0  # scaled by stars / 5
+STREAM_WEIGHT = 1.0
+
+
+def _hourly(queryset, course_field, time_field, since, weight):
+    """Return ``(course_ids, hours, weights)`` of activity bucketed per hour."""
+    rows = (
+        queryset.filter(**{f'{time_field}__gte': since})
+        .annotate(hour=TruncHour(time_field))
+        .values(course_field, 'hour')
+        .annotate(**weight)
+        .values_list(course_field, 'hour', *weight)
+    )
+    course_ids, hours, weights = [], [], []
+    for course_id, hour, *values in rows.iterator(chunk_size=10000):
+        course_ids.append(course_id)
+        hours.append(hour.timestamp())
+        weights.append(values[0])
+    return (
+        np.array(course_ids, dtype=np.int64),
+        np.array(hours, dtype=np.float64),
+        np.array(weights, dtype=np.float64),
+    )
+
+
+def collect_activity(now):
+    """Return the hourly activity of every course over the longest window."""
+    since = now - max(length for length, _ in WINDOWS.values())
+    sources = [
+        (
+            _hourly(CourseEnrollment.objects.all(), 'course_id', 'enrolled_at', since, {'total': Count('pk')}),
+            ENROLLMENT_WEIGHT,
+        ),
+        (
+            _hourly(CourseRating.objects.all(), 'course_id', 'created_at', since, {'total': Sum('rating')}),
+            RATING_WEIGHT / 5,
+        ),
+        (
+            _hourly(VideoStream.objects.all(), 'video__lesson__course_id', 'started_at', since, {'total': Count('pk')}),
+            STREAM_WEIGHT,
+        ),
+    ]
+    course_ids = np.concatenate([ids for (ids, _, _), _ in sources])
+    hours = np.concatenate([hours for (_, hours, _), _ in sources])
+    weights = np.concatenate([values * weight for (_, _, values), weight in sources])
+    # Age of the middle of each hourly bucket.
+    ages = np.maximum(now.timestamp() - hours - 1800, 0)
+    return course_ids, ages, weights
+
+
+def decayed_scores(course_ids, ages, weights, window):
+    """Sum the decayed weights per course; returns ``(course_ids, scores)``."""
+    length, half_life = WINDOWS[window]
+    recent = ages <= length.total_seconds()
+    if not recent.any():
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    ids, index = np.unique(course_ids[recent], return_inverse=True)
+    decay = np.exp2(-ages[recent] / half_life.total_seconds())
+    return ids, np.bincount(index, weights=weights[recent] * decay, minlength=len(ids))
+
+
+def compute_trending(now=None, batch_size=1000):
+    """Recompute the trending scores of every window; returns rows per window."""
+    now = now or timezone.now()
+    course_ids, ages, weights = collect_activity(now)
+    active = set(Course.objects.filter(is_active=True).values_list('pk', flat=True))
+
+    written = {}
+    with transaction.atomic():
+        for window in WINDOWS:
+            ids, scores = decayed_scores(course_ids, ages, weights, window)
+            rows = [
+                CourseTrendingScore(course_id=int(course_id), window=window, score=float(score), computed_at=now)
+                for course_id, score in zip(ids, scores)
+                if score > 0 and course_id in active
+            ]
+            CourseTrendingScore.objects.filter(window=window).delete()
+            CourseTrendingScore.objects.bulk_create(rows, batch_size=batch_size)
+            written[window] = len(rows)
+        transaction.on_commit(invalidate_catalog)
+    return written
+
+
+def _scored_courses(scores):
+    courses = Course.objects.in_bulk([score.course_id for score in scores])
+    return [courses[score.course_id] for score in scores if score.course_id in courses]
+
+
+def popular_courses(window=DEFAULT_WINDOW):
+    """The active courses ranked by trending score over ``window``.
+
+    Returns a ``QuerySetChain``: the scored courses, read in score order off
+    the ``(window, -score)`` index and fetched with ``in_bulk``, then the
+    courses without a score, most enrolled and newest first.
+    """
+    active = Course.objects.filter(is_active=True)
+    return QuerySetChain(
+        (
+            CourseTrendingScore.objects.filter(window=window, course__is_active=True).order_by('-score', '-id'),
+            _scored_courses,
+        ),
+        active.exclude(trending_scores__window=window).order_by('-enrollment_count', '-created_at', '-id'),
+        count=active.count,
+    )
@@ -8,34 +8,56 @@ urlpatterns = [
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
     path('categories/<slug:slug>/', views.CategoryDetailView.as_view(), name='category-detail'),
     
+    # Search and Filter (declared before the slug routes so they are not shadowed)
+    path('search/', views.CourseSearchView.as_view(), name='course-search'),
+    path('facets/', views.CourseFacetedListView.as_view(), name='course-facets'),
+    path('featured/', views.FeaturedCourseListView.as_view(), name='featured-courses'),
+    path('popular/', views.PopularCourseListView.as_view(), name='popular-courses'),
+    
+    # Lesson progress
+    path('progress/batch/', views.LessonProgressBatchView.as_view(), name='lesson-progress-batch'),
+    
+    # Certificate verification
+    path('certificates/verify/<str:certificate_number>/', views.CertificateVerifyView.as_view(), name='certificate-verify'),
+    
+    # Instructor analytics
+    path('instructor/dashboard/', views.InstructorDashboardView.as_view(), name='instructor-dashboard'),
+    
+    # Catalog cache
+    path('cache/stats/', views.CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
+    
     # Courses
     path('', views.CourseListView.as_view(), name='course-list'),
-    path('<slug:slug>/', views.CourseDetailView.as_view(), name='course-detail'),
     path('create/', views.CourseCreateView.as_view(), name='course-create'),
+    path('<slug:slug>/', views.CourseDetailView.as_view(), name='course-detail'),
+    path('<slug:slug>/outline/', views.CourseOutlineView.as_view(), name='course-outline'),
+    path('<slug:slug>/recommendations/', views.CourseRecommendationView.as_view(), name='course-recommendations'),
     path('<slug:slug>/edit/', views.CourseUpdateView.as_view(), name='course-update'),
     path('<slug:slug>/delete/', views.CourseDeleteView.as_view(), name='course-delete'),
     
     # Lessons
     path('<slug:course_slug>/lessons/', views.LessonListView.as_view(), name='lesson-list'),
     path('<slug:course_slug>/lessons/create/', views.LessonCreateView.as_view(), name='lesson-create'),
+    path('<slug:course_slug>/lessons/bulk/', views.LessonBulkCreateView.as_view(), name='lesson-bulk-create'),
+    path('<slug:course_slug>/lessons/reorder/', views.LessonReorderView.as_view(), name='lesson-reorder'),
     path('<slug:course_slug>/lessons/<int:pk>/', views.LessonDetailView.as_view(), name='lesson-detail'),
     path('<slug:course_slug>/lessons/<int:pk>/edit/', views.LessonUpdateView.as_view(), name='lesson-update'),
     path('<slug:course_slug>/lessons/<int:pk>/delete/', views.LessonDeleteView.as_view(), name='lesson-delete'),
     
     # Enrollments
     path('<slug:slug>/enroll/', views.CourseEnrollmentView.as_view(), name='course-enroll'),
+    path('<slug:course_slug>/enroll/bulk/', views.CourseBulkEnrollmentView.as_view(), name='course-bulk-enroll'),
     path('<slug:slug>/unenroll/', views.CourseUnenrollmentView.as_view(), name='course-unenroll'),
     path('<slug:slug>/progress/', views.CourseProgressView.as_view(), name='course-progress'),
     
     # Ratings and Reviews
     path('<slug:slug>/rate/', views.CourseRatingView.as_view(), name='course-rate'),
     path('<slug:slug>/reviews/', views.CourseReviewListView.as_view(), name='course-reviews'),
+    path('<slug:slug>/ratings/histogram/', views.CourseRatingHistogramView.as_view(), name='course-rating-histogram'),
+    
+    # Analytics
+    path('<slug:course_slug>/analytics/', views.CourseAnalyticsView.as_view(), name='course-analytics'),
     
     # Certificates
     path('<slug:slug>/certificate/', views.CourseCertificateView.as_view(), name='course-certificate'),
-    
-    # Search and Filter
-    path('search/', views.CourseSearchView.as_view(), name='course-search'),
-    path('featured/', views.FeaturedCourseListView.as_view(), name='featured-courses'),
-    path('popular/', views.PopularCourseListView.as_view(), name='popular-courses'),
 ]
@@ -1,15 +1,36 @@
 # backend/courses/views.py
+import csv
+import itertools
+
 from rest_framework import generics, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Category, Course, Lesson, CourseEnrollment, CourseRating
+from django.utils.http import parse_etags, quote_etag
+
+from core.views import ValuesListMixin
+
+from .analytics import course_dashboard, instructor_dashboard
+from .cache import CatalogCacheMixin, get_cache_stats
+from .certificates import get_verification, issue_certificate
+from .enrollments import REPORT_FIELDS, bulk_enroll, read_emails
+from .facets import faceted_search
+from .lessons import bulk_create_lessons, reorder_lessons
+from .progress import ingest_progress
+from .search import search_courses
+from .trending import DEFAULT_WINDOW, WINDOWS, popular_courses
+from .models import Category, Course, Lesson, CourseEnrollment, CourseRating, CourseSimilarity
 from .serializers import (
-    CategorySerializer, CourseSerializer, LessonSerializer,
-    CourseEnrollmentSerializer, CourseRatingSerializer
+    CategorySerializer, CourseSerializer, LessonSerializer, LessonImportSerializer,
+    LessonReorderSerializer, CourseEnrollmentSerializer, CourseRatingSerializer,
+    CourseOutlineSerializer, LessonProgressBatchSerializer, CourseCertificateSerializer,
+    BulkEnrollmentSerializer, CourseRecommendationSerializer
 )
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(CatalogCacheMixin, generics.ListAPIView):
     """List all active categories."""
     queryset = Category.objects.filter(is_active=True).order_by('name')
     serializer_class = CategorySerializer
@@ -20,7 +41,7 @@ class CategoryDetailView(generics.RetrieveAPIView):
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
-class CourseListView(generics.ListAPIView):
+class CourseListView(CatalogCacheMixin, ValuesListMixin, generics.ListAPIView):
     """List all active courses."""
     queryset = Course.objects.filter(is_active=True).order_by('-created_at')
     serializer_class = CourseSerializer
@@ -31,6 +52,63 @@ class CourseDetailView(generics.RetrieveAPIView):
     serializer_class = CourseSerializer
     lookup_field = 'slug'
 
+class CourseOutlineView(generics.RetrieveAPIView):
+    """Retrieve a course with its lessons and videos in a fixed number of queries."""
+    serializer_class = CourseOutlineSerializer
+    lookup_field = 'slug'
+
+    def get_queryset(self):
+        lessons = (
+            Lesson.objects.filter(is_active=True)
+            .select_related('video')
+            .defer('content', 'video__processing_error')
+            .order_by('order')
+        )
+        return (
+            Course.objects.filter(is_active=True)
+            .select_related('category', 'instructor')
+            .prefetch_related(Prefetch('lessons', queryset=lessons))
+        )
+
+    def get_etag(self, slug):
+        """Fingerprint the outline from the newest update anywhere in the tree."""
+        state = Course.objects.filter(slug=slug, is_active=True).aggregate(
+            course_updated=Max('updated_at'),
+            category_updated=Max('category__updated_at'),
+            instructor_updated=Max('instructor__updated_at'),
+            lesson_updated=Max('lessons__updated_at'),
+            video_updated=Max('lessons__video__updated_at'),
+            lesson_count=Count('lessons', distinct=True),
+            video_count=Count('lessons__video', distinct=True),
+        )
+        if state['course_updated'] is None:
+            raise Http404
+        newest = max(
+            value for key, value in state.items()
+            if key.endswith('_updated') and value is not None
+        )
+        return quote_etag(f"{newest.timestamp():.6f}-{state['lesson_count']}-{state['video_count']}")
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.get_etag(kwargs['slug'])
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+class CourseRecommendationView(generics.ListAPIView):
+    """Courses most often taken together with this one ("students also took")."""
+    serializer_class = CourseRecommendationSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return (
+            CourseSimilarity.objects.filter(course__slug=self.kwargs['slug'], similar_course__is_active=True)
+            .select_related('similar_course')
+            .order_by('rank')
+        )
+
 class CourseCreateView(generics.CreateAPIView):
     """Create a new course."""
     serializer_class = CourseSerializer
@@ -79,11 +157,77 @@ class LessonDeleteView(generics.DestroyAPIView):
     queryset = Lesson.objects.all()
     permission_classes = [IsAuthenticated]
 
+class CourseInstructorMixin:
+    """Resolve the course from the URL and require its instructor or staff."""
+
+    def get_course(self):
+        course = get_object_or_404(Course, slug=self.kwargs['course_slug'])
+        user = self.request.user
+        if not (user.is_staff or course.instructor_id == user.id):
+            raise PermissionDenied('Only the course instructor can manage this course.')
+        return course
+
+class LessonBulkCreateView(CourseInstructorMixin, generics.GenericAPIView):
+    """Create many lessons at the end of a course in one transaction."""
+    serializer_class = LessonImportSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_slug):
+        course = self.get_course()
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        lessons = bulk_create_lessons(course, serializer.validated_data)
+        return Response(LessonSerializer(lessons, many=True).data, status=status.HTTP_201_CREATED)
+
+class LessonReorderView(CourseInstructorMixin, generics.GenericAPIView):
+    """Rewrite the lesson order of a course."""
+    serializer_class = LessonReorderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_slug):
+        course = self.get_course()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            reorder_lessons(course, serializer.validated_data['lessons'])
+        except ValueError as exc:
+            return Response({'lessons': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        lessons = Lesson.objects.filter(course=course).order_by('order').values('id', 'order')
+        return Response({'lessons': list(lessons)})
+
 class CourseEnrollmentView(generics.CreateAPIView):
     """Enroll in a course."""
     serializer_class = CourseEnrollmentSerializer
     permission_classes = [IsAuthenticated]
 
+class EchoBuffer:
+    """File-like object whose ``write`` returns the value, for streaming CSV."""
+
+    def write(self, value):
+        return value
+
+class CourseBulkEnrollmentView(CourseInstructorMixin, generics.GenericAPIView):
+    """Enroll a cohort of students by email and stream a per-row CSV report."""
+    serializer_class = BulkEnrollmentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_slug):
+        course = self.get_course()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        emails = serializer.validated_data.get('emails') or []
+        if serializer.validated_data.get('file'):
+            emails = itertools.chain(emails, read_emails(serializer.validated_data['file']))
+
+        writer = csv.DictWriter(EchoBuffer(), fieldnames=REPORT_FIELDS)
+        rows = itertools.chain(
+            [writer.writeheader()],
+            (writer.writerow(result) for result in bulk_enroll(course, emails)),
+        )
+        response = StreamingHttpResponse(rows, content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{course.slug}-enrollments.csv"'
+        return response
+
 class CourseUnenrollmentView(generics.DestroyAPIView):
     """Unenroll from a course."""
     queryset = CourseEnrollment.objects.all()
@@ -104,6 +248,17 @@ class CourseProgressView(generics.RetrieveAPIView):
         user = self.request.user
         return get_object_or_404(CourseEnrollment, course__slug=course_slug, user=user)
 
+class LessonProgressBatchView(generics.GenericAPIView):
+    """Record watch time and completion for many lessons at once."""
+    serializer_class = LessonProgressBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = ingest_progress(request.user, serializer.validated_data['updates'])
+        return Response({'results': results})
+
 class CourseRatingView(generics.CreateAPIView):
     """Rate a course."""
     serializer_class = CourseRatingSerializer
@@ -118,34 +273,165 @@ class CourseReviewListView(generics.ListAPIView):
         course_slug = self.kwargs['slug']
         return CourseRating.objects.filter(course__slug=course_slug)
 
+class CourseRatingHistogramView(generics.GenericAPIView):
+    """Get the star rating histogram of a course."""
+    queryset = Course.objects.filter(is_active=True)
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    lookup_field = 'slug'
+
+    def get(self, request, slug):
+        fields = ['total_ratings', 'rating_sum'] + [f'rating_count_{stars}' for stars in range(1, 6)]
+        course = get_object_or_404(self.get_queryset().values('slug', *fields), slug=slug)
+        total = course['total_ratings']
+        return Response({
+            'course': course['slug'],
+            'total_ratings': total,
+            'average_rating': round(course['rating_sum'] / total, 2) if total else 0,
+            'histogram': {str(stars): course[f'rating_count_{stars}'] for stars in range(1, 6)},
+        })
+
+class AnalyticsWindowMixin:
+    """Read the ``?days=`` window of the analytics dashboards."""
+    default_days = 30
+    max_days = 365
+
+    def get_days(self):
+        try:
+            days = int(self.request.query_params.get('days', self.default_days))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.max_days:
+            raise ValidationError({'days': f'Expected a number of days between 1 and {self.max_days}.'})
+        return days
+
+class InstructorDashboardView(AnalyticsWindowMixin, generics.GenericAPIView):
+    """Recent activity of every course taught by the current user."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(instructor_dashboard(request.user, days=self.get_days()))
+
+class CourseAnalyticsView(AnalyticsWindowMixin, CourseInstructorMixin, generics.GenericAPIView):
+    """Daily enrollments, completions, ratings, watch time and lesson drop-off of a course."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, course_slug):
+        return Response(course_dashboard(self.get_course(), days=self.get_days()))
+
 class CourseCertificateView(generics.RetrieveAPIView):
-    """Get course completion certificate."""
+    """Issue (or poll) the completion certificate of a course.
+
+    Rendering happens on a worker pool; until the file is ready the
+    response is 202 with the current status and a Retry-After hint. A
+    certificate whose retries are exhausted answers 500 with the error.
+    """
+    serializer_class = CourseCertificateSerializer
     permission_classes = [IsAuthenticated]
 
     def get(self, request, slug):
-        # Placeholder for certificate generation
-        return Response({"message": "Certificate feature coming soon"}, status=status.HTTP_200_OK)
+        enrollment = get_object_or_404(
+            CourseEnrollment.objects.select_related('certificate'),
+            course__slug=slug, student=request.user,
+        )
+        if not enrollment.is_completed:
+            return Response(
+                {'error': 'Complete the course to receive a certificate.', 'progress': enrollment.progress},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        certificate = issue_certificate(enrollment)
+        data = self.get_serializer(certificate).data
+        if certificate.status == 'ready':
+            return Response(data)
+        if certificate.status == 'failed':
+            return Response(
+                {**data, 'error': certificate.rendering_error or 'Rendering the certificate failed.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Retry-After': '5'})
+
+class CertificateVerifyView(generics.GenericAPIView):
+    """Publicly verify a certificate by its number."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, certificate_number):
+        payload = get_verification(certificate_number)
+        if payload is None:
+            return Response({'valid': False}, status=status.HTTP_404_NOT_FOUND)
+        return Response(payload)
 
 class CourseSearchView(generics.ListAPIView):
-    """Search courses."""
+    """Search courses, ranked by relevance."""
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        query = self.request.query_params.get('q', '')
-        if query:
-            return Course.objects.filter(
-                is_active=True,
-                title__icontains=query
-            ).order_by('-created_at')
         return Course.objects.filter(is_active=True).order_by('-created_at')
 
-class FeaturedCourseListView(generics.ListAPIView):
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        # Paginate the ranked ids first so only the current page is loaded.
+        ranked = search_courses(query)
+        page = self.paginate_queryset(ranked)
+        ids = [course_id for course_id, _ in (page if page is not None else ranked)]
+        courses = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        results = [courses[course_id] for course_id in ids if course_id in courses]
+        serializer = self.get_serializer(results, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+class CourseFacetedListView(generics.ListAPIView):
+    """Filter the catalog by level, category, free/paid and price, with facet counts."""
+    serializer_class = CourseSerializer
+
+    def get_queryset(self):
+        return Course.objects.filter(is_active=True)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            course_ids, facets = faceted_search(request.query_params)
+        except ValueError as exc:
+            raise ValidationError({'price': str(exc)})
+
+        # Paginate the matching ids first so only the current page is loaded.
+        page = self.paginate_queryset(course_ids)
+        ids = [int(course_id) for course_id in (page if page is not None else course_ids)]
+        courses = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        results = [courses[course_id] for course_id in ids if course_id in courses]
+        serializer = self.get_serializer(results, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response({'results': serializer.data})
+        response.data['facets'] = facets
+        return response
+
+class FeaturedCourseListView(CatalogCacheMixin, generics.ListAPIView):
     """List featured courses."""
     queryset = Course.objects.filter(is_active=True, is_featured=True).order_by('-created_at')
     serializer_class = CourseSerializer
 
-class PopularCourseListView(generics.ListAPIView):
-    """List popular courses."""
-    queryset = Course.objects.filter(is_active=True).order_by('-enrollment_count', '-created_at')
+class PopularCourseListView(CatalogCacheMixin, generics.ListAPIView):
+    """List trending courses over ``?window=24h|7d|30d`` (default 7d).
+
+    Courses without activity in the window score 0 and follow, most
+    enrolled first, so the list is never empty.
+    """
     serializer_class = CourseSerializer
+    filter_backends = []
+
+    def get_queryset(self):
+        window = self.request.query_params.get('window', DEFAULT_WINDOW)
+        if window not in WINDOWS:
+            raise ValidationError({'window': f'Expected one of {", ".join(WINDOWS)}.'})
+        return popular_courses(window)
+
+class CatalogCacheStatsView(generics.GenericAPIView):
+    """Report hit/miss counters for the catalog cache."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats())
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Video, VideoStream, VideoAnalytics, VideoComment, VideoBookmark
+from .models import Video, VideoStream, VideoAnalytics, VideoComment, VideoBookmark, VideoProcessingJob, VideoUpload
 
 
 class VideoAdmin(admin.ModelAdmin):
@@ -80,7 +80,7 @@ class VideoAnalyticsAdmin(admin.ModelAdmin):
             'fields': ('total_watch_time', 'average_watch_time')
         }),
         (_('Engagement'), {
-            'fields': ('completion_rate',)
+            'fields': ('completed_views', 'completion_rate')
         }),
         (_('Device Data'), {
             'fields': ('mobile_views', 'desktop_views', 'tablet_views')
@@ -133,8 +133,26 @@ class VideoBookmarkAdmin(admin.ModelAdmin):
     )
 
 
+class VideoProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ['video', 'status', 'attempts', 'max_attempts', 'run_after', 'worker', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['video__title', 'worker', 'last_error']
+    readonly_fields = ['attempts', 'worker', 'locked_at', 'created_at', 'updated_at', 'finished_at']
+    ordering = ['-created_at']
+
+
+class VideoUploadAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'user', 'lesson', 'size', 'received', 'status', 'created_at', 'expires_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['filename', 'title', 'user__username', 'lesson__title']
+    readonly_fields = ['received', 'video', 'created_at', 'updated_at']
+    ordering = ['-created_at']
+
+
 admin.site.register(Video, VideoAdmin)
 admin.site.register(VideoStream, VideoStreamAdmin)
 admin.site.register(VideoAnalytics, VideoAnalyticsAdmin)
 admin.site.register(VideoComment, VideoCommentAdmin)
 admin.site.register(VideoBookmark, VideoBookmarkAdmin)
+admin.site.register(VideoProcessingJob, VideoProcessingJobAdmin)
+admin.site.register(VideoUpload, VideoUploadAdmin)
@@ -0,0 +1,142 @@
+"""Daily rollup of video streams into ``VideoAnalytics``.
+
+Like the course rollups (see ``courses.analytics``), an incremental job
+folds the streams that ended since its ``RollupWatermark`` (and before
+``now - ROLLUP_LAG``) into one row per video and day, and advances the
+watermark in the same transaction, so re-running it never counts a stream
+twice.
+
+Each day covered by the window is aggregated with one grouped query over
+the ``ended_at`` index. Counts and sums are added to the stored rows;
+unique viewers stay exact across runs because a viewer is only counted
+when they have no stream of the same video ended earlier that day, i.e.
+in a previous run. Averages and rates are derived from the summed columns.
+
+A view counts as completed when the viewer reached ``COMPLETION_RATIO``
+of the video's duration. The device is guessed from the user agent.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, Min, OuterRef, Q, Sum
+from django.utils import timezone
+
+from courses.analytics import ROLLUP_LAG, advance_watermark
+from courses.models import RollupWatermark
+
+from .models import VideoAnalytics, VideoStream
+
+WATERMARK = 'video_analytics:streams'
+
+COMPLETION_RATIO = 0.9
+
+SUM_FIELDS = [
+    'total_views', 'unique_views', 'total_watch_time', 'completed_views',
+    'mobile_views', 'tablet_views', 'desktop_views',
+]
+
+TABLET = Q(user_agent__iregex=r'ipad|tablet|kindle|silk|playbook') | (
+    Q(user_agent__icontains='android') & ~Q(user_agent__icontains='mobile')
+)
+MOBILE = ~TABLET & Q(user_agent__iregex=r'mobi|iphone|ipod|android|windows phone')
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _aggregate_day(day, since, upper):
+    """Per-video totals of the streams of ``day`` that ended in ``(since, upper]``."""
+    start, end = _day_start(day), _day_start(day + timedelta(days=1))
+    streams = VideoStream.objects.filter(ended_at__gte=start, ended_at__lt=end, ended_at__lte=upper)
+    unique = Count('user_id', distinct=True)
+    if since is not None:
+        streams = streams.filter(ended_at__gt=since)
+        if since >= start:
+            # Viewers already counted for this day by a previous run.
+            streams = streams.annotate(returning=Exists(VideoStream.objects.filter(
+                video=OuterRef('video'), user=OuterRef('user'), ended_at__gte=start, ended_at__lte=since,
+            )))
+            unique = Count('user_id', distinct=True, filter=Q(returning=False))
+    return (
+        streams.values('video_id')
+        .annotate(
+            total_views=Count('pk'),
+            unique_views=unique,
+            total_watch_time=Sum('total_watch_time'),
+            completed_views=Count('pk', filter=Q(
+                video__duration__gt=0, current_position__gte=F('video__duration') * COMPLETION_RATIO,
+            )),
+            mobile_views=Count('pk', filter=MOBILE),
+            tablet_views=Count('pk', filter=TABLET),
+        )
+        .values_list('video_id', *SUM_FIELDS[:-1])
+        .order_by()
+    )
+
+
+def _derive(values):
+    views = values['total_views']
+    values['average_watch_time'] = values['total_watch_time'] // views if views else 0
+    values['completion_rate'] = (
+        round(Decimal(values['completed_views'] * 100) / views, 2) if views else Decimal('0.00')
+    )
+    return values
+
+
+def _merge(deltas, batch_size=500):
+    """Add ``deltas`` (``{(video_id, date): {field: value}}``) to the ``VideoAnalytics`` rows."""
+    fields = SUM_FIELDS + ['average_watch_time', 'completion_rate']
+    keys = list(deltas)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        existing = {
+            (row[0], row[1]): dict(zip(SUM_FIELDS, row[2:]))
+            for row in VideoAnalytics.objects.filter(
+                video_id__in={video_id for video_id, _ in batch}, date__in={day for _, day in batch},
+            ).values_list('video_id', 'date', *SUM_FIELDS)
+        }
+        rows = []
+        for key in batch:
+            values = existing.get(key) or dict.fromkeys(SUM_FIELDS, 0)
+            for field, delta in deltas[key].items():
+                values[field] += delta
+            rows.append(VideoAnalytics(video_id=key[0], date=key[1], **_derive(values)))
+        VideoAnalytics.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['video', 'date'], update_fields=fields,
+        )
+
+
+def rollup(now=None):
+    """Fold the streams ended since the last run into ``VideoAnalytics``.
+
+    Returns the number of video-days touched.
+    """
+    upper = (now or timezone.now()) - ROLLUP_LAG
+    with transaction.atomic():
+        since = advance_watermark(WATERMARK, upper)
+        first = since
+        if first is None:
+            first = VideoStream.objects.filter(ended_at__lte=upper).aggregate(first=Min('ended_at'))['first']
+            if first is None:
+                return 0
+        deltas = {}
+        day, last_day = timezone.localdate(first), timezone.localdate(upper)
+        while day <= last_day:
+            for video_id, *values in _aggregate_day(day, since, upper):
+                totals = dict(zip(SUM_FIELDS, values))
+                totals['total_watch_time'] = totals['total_watch_time'] or 0
+                totals['desktop_views'] = totals['total_views'] - totals['mobile_views'] - totals['tablet_views']
+                deltas[(video_id, day)] = totals
+            day += timedelta(days=1)
+        _merge(deltas)
+    return len(deltas)
+
+
+def rebuild_rollup():
+    """Drop every ``VideoAnalytics`` row and the watermark, then roll up the full history."""
+    with transaction.atomic():
+        VideoAnalytics.objects.all().delete()
+        RollupWatermark.objects.filter(name=WATERMARK).delete()
+        return rollup()
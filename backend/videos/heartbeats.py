@@ -0,0 +1,195 @@
+"""
+Write-behind buffering of video playback heartbeats.
+
+Players report their position every few seconds. Instead of one UPDATE of
+the ``VideoStream`` row per heartbeat, heartbeats are kept in a
+process-wide buffer holding only the latest position and watch time of
+each session, and written in bulk: every flush is a single prepared
+``UPDATE`` run with ``executemany`` over the buffered sessions in one
+transaction. Watch time never decreases (the larger of the stored and the
+buffered value is kept), so flushes from several processes can
+interleave, and heartbeats arriving after a session ended are not
+written.
+
+The latest heartbeat of a session is also kept in the cache, so progress
+reads see it before it is flushed, from any process when the cache is
+shared. The buffer is flushed when it holds
+``VIDEO_HEARTBEAT_FLUSH_THRESHOLD`` sessions,
+``VIDEO_HEARTBEAT_FLUSH_INTERVAL`` seconds after the first pending
+heartbeat, and at interpreter exit.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+
+from .models import VideoStream
+
+HEARTBEAT_KEY = 'video_heartbeat:{}'
+
+# How long the cached heartbeat outlives the last one; it only has to
+# survive until the buffer holding it is flushed.
+CACHE_TIMEOUT = 10 * 60
+
+
+class HeartbeatBuffer:
+    """Thread-safe, per-session coalescing buffer of playback heartbeats."""
+
+    def __init__(self, flush_threshold=None, flush_interval=None):
+        self._flush_threshold = flush_threshold
+        self._flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def flush_threshold(self):
+        if self._flush_threshold is not None:
+            return self._flush_threshold
+        return getattr(settings, 'VIDEO_HEARTBEAT_FLUSH_THRESHOLD', 1000)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'VIDEO_HEARTBEAT_FLUSH_INTERVAL', 5.0)
+
+    def add(self, stream_id, current_position, total_watch_time):
+        """Buffer a heartbeat, replacing the pending one of the same session."""
+        with self._lock:
+            previous = self._pending.get(stream_id)
+            if previous is not None:
+                total_watch_time = max(total_watch_time, previous[1])
+            self._pending[stream_id] = (current_position, total_watch_time)
+            should_flush = len(self._pending) >= self.flush_threshold
+            if not should_flush and self._timer is None and self.flush_interval > 0:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if should_flush:
+            self.flush()
+
+    def get_pending(self, stream_id):
+        """Return the buffered ``(current_position, total_watch_time)`` of a session, or None."""
+        with self._lock:
+            return self._pending.get(stream_id)
+
+    def discard(self, stream_id):
+        with self._lock:
+            self._pending.pop(stream_id, None)
+
+    def _drain(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return pending
+
+    def flush(self):
+        """Write every buffered heartbeat to the database; return the rows updated."""
+        with self._flush_lock:
+            pending = self._drain()
+            if not pending:
+                return 0
+            # Plain tuples and one executemany: compiling an ORM CASE over
+            # thousands of sessions costs more than the writes it saves.
+            rows = [
+                (position, watch_time, watch_time, stream_id)
+                for stream_id, (position, watch_time) in sorted(pending.items())
+            ]
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(_update_sql(), rows)
+                    return cursor.rowcount
+            except Exception:
+                # Put the heartbeats back unless newer ones arrived meanwhile.
+                with self._lock:
+                    for stream_id, values in pending.items():
+                        self._pending.setdefault(stream_id, values)
+                raise
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+def _update_sql():
+    quote = connection.ops.quote_name
+    watch_time = quote('total_watch_time')
+    return (
+        f"UPDATE {quote(VideoStream._meta.db_table)} "
+        f"SET {quote('current_position')} = %s, "
+        f"{watch_time} = CASE WHEN {watch_time} < %s THEN %s ELSE {watch_time} END "
+        f"WHERE {quote(VideoStream._meta.pk.column)} = %s AND {quote('ended_at')} IS NULL"
+    )
+
+
+heartbeat_buffer = HeartbeatBuffer()
+atexit.register(heartbeat_buffer.flush)
+
+
+def stream_owner(stream_id):
+    """Return the user id of an active session, or None; cached with its heartbeat."""
+    cached = cache.get(HEARTBEAT_KEY.format(stream_id))
+    if cached is not None:
+        return cached['user']
+    return (
+        VideoStream.objects.filter(pk=stream_id, ended_at__isnull=True)
+        .values_list('user_id', flat=True)
+        .first()
+    )
+
+
+def record_heartbeat(stream_id, user_id, current_position, total_watch_time):
+    """Buffer a session's playback position; returns the values now current."""
+    latest = latest_heartbeat(stream_id)
+    if latest is not None:
+        total_watch_time = max(total_watch_time, latest[1])
+    heartbeat_buffer.add(stream_id, current_position, total_watch_time)
+    cache.set(
+        HEARTBEAT_KEY.format(stream_id),
+        {'user': user_id, 'current_position': current_position, 'total_watch_time': total_watch_time},
+        timeout=CACHE_TIMEOUT,
+    )
+    return current_position, total_watch_time
+
+
+def latest_heartbeat(stream_id):
+    """The latest not-yet-flushed ``(current_position, total_watch_time)``, or None."""
+    pending = heartbeat_buffer.get_pending(stream_id)
+    if pending is not None:
+        return pending
+    cached = cache.get(HEARTBEAT_KEY.format(stream_id))
+    if cached is not None:
+        return cached['current_position'], cached['total_watch_time']
+    return None
+
+
+def apply_heartbeat(stream):
+    """Overlay the latest buffered heartbeat on a ``VideoStream`` read from the database."""
+    if stream.ended_at is None:
+        latest = latest_heartbeat(stream.pk)
+        if latest is not None:
+            stream.current_position = latest[0]
+            stream.total_watch_time = max(stream.total_watch_time, latest[1])
+    return stream
+
+
+def discard_heartbeat(stream_id):
+    """Drop the buffered heartbeat of a session whose row is written directly."""
+    heartbeat_buffer.discard(stream_id)
+    cache.delete(HEARTBEAT_KEY.format(stream_id))
+
+
+def flush_heartbeats():
+    """Flush the process-wide heartbeat buffer."""
+    return heartbeat_buffer.flush()
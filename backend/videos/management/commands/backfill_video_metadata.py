@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from videos.metadata import MetadataError, read_field_file
+from videos.models import Video
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill duration and resolution of existing videos from the headers of '
+        'their MP4/MOV/WebM files. Files are read in parallel and only their '
+        'headers are read.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Number of files read in parallel (default: 8).',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-read every video, not only those missing a duration or resolution.',
+        )
+
+    def backfill(self, video_id):
+        try:
+            video = Video.objects.only('pk', 'video_file').get(pk=video_id)
+            try:
+                fields = read_field_file(video.video_file).as_video_fields()
+            except (MetadataError, OSError) as exc:
+                return video_id, str(exc)
+            if fields:
+                Video.objects.filter(pk=video_id).update(**fields)
+            return video_id, None
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        videos = Video.objects.exclude(video_file='')
+        if not options['all']:
+            videos = videos.filter(Q(duration=0) | Q(resolution=''))
+        ids = list(videos.order_by('pk').values_list('pk', flat=True))
+
+        started = time.monotonic()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for video_id, error in executor.map(self.backfill, ids):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Video {video_id}: {error}')
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Read metadata of {len(ids) - failed} of {len(ids)} videos in {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from videos.uploads import cancel_upload, expired_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete expired and failed video upload sessions together with their partial files.'
+
+    def handle(self, *args, **options):
+        removed = 0
+        for upload in expired_uploads().iterator():
+            cancel_upload(upload)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired uploads.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from videos.retention import fold_retention, rebuild_retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold the watched ranges recorded since the last run into the '
+        'per-second retention counters of each video. Meant to run '
+        'periodically (e.g. every 15 minutes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Drop the retention counters and watermark and fold the full history.',
+        )
+
+    def handle(self, *args, **options):
+        touched = rebuild_retention() if options['rebuild'] else fold_retention()
+        self.stdout.write(self.style.SUCCESS(f'Updated the retention of {touched} videos.'))
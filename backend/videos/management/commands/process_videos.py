@@ -0,0 +1,72 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from videos.processing import work, worker_name
+
+
+def run_worker(index, burst, poll_interval, stop, processed):
+    # Leave shutdown to the parent: it sets ``stop`` and the worker exits
+    # after its current job instead of being killed in the middle of it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    count = work(worker_name(index), burst=burst, poll_interval=poll_interval, should_stop=stop.is_set)
+    with processed.get_lock():
+        processed.value += count
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a pool of video processing worker processes that take jobs from '
+        'the persistent queue. Runs until interrupted, or until the queue is '
+        'empty with --burst.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'VIDEO_PROCESSING_WORKERS', 2),
+            help='Number of worker processes (default: VIDEO_PROCESSING_WORKERS).',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds an idle worker waits before checking the queue again (default: 5).',
+        )
+
+    def handle(self, *args, **options):
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        processed = context.Value('i', 0)
+        workers = [
+            context.Process(
+                target=run_worker, args=(index, options['burst'], options['poll_interval'], stop, processed),
+                name=f'video-worker-{index}',
+            )
+            for index in range(max(options['workers'], 1))
+        ]
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping after the current jobs...')
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+
+        rate = processed.value / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(workers)} workers processed {processed.value} jobs in {elapsed:.1f}s ({rate:.1f} jobs/s).'
+        ))
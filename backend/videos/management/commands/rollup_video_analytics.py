@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from videos.analytics import rebuild_rollup, rollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold the video streams ended since the last run into the daily '
+        'VideoAnalytics rows. Meant to run periodically (e.g. every 15 minutes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Drop the video analytics and watermark and recompute the full history.',
+        )
+
+    def handle(self, *args, **options):
+        touched = rebuild_rollup() if options['rebuild'] else rollup()
+        self.stdout.write(self.style.SUCCESS(f'Updated {touched} video-days.'))
@@ -0,0 +1,263 @@
+"""Pure-Python duration and resolution extraction for MP4/MOV and WebM/MKV.
+
+Only container headers are read. MP4 boxes are walked by their size
+fields, seeking over ``mdat`` and every other box that is not on the path
+to ``moov/mvhd`` and ``moov/trak/tkhd``. Matroska elements are walked by
+their EBML sizes down to ``Segment/Info`` and ``Segment/Tracks``, seeking
+over clusters. A file is thus parsed with a few small reads in constant
+memory, whatever its size and wherever ``moov`` is stored.
+"""
+import os
+import struct
+from dataclasses import dataclass
+
+
+class MetadataError(ValueError):
+    """The file is not a supported container or its headers are invalid."""
+
+
+@dataclass
+class VideoMetadata:
+    format: str
+    duration: float = None
+    width: int = None
+    height: int = None
+
+    @property
+    def resolution(self):
+        if self.width and self.height:
+            return f'{self.width}x{self.height}'
+        return ''
+
+    def as_video_fields(self):
+        """Values for the matching ``Video`` fields, skipping unknown ones."""
+        fields = {}
+        if self.duration is not None:
+            fields['duration'] = round(self.duration)
+        if self.resolution:
+            fields['resolution'] = self.resolution
+        return fields
+
+
+def _read_exact(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise MetadataError('Unexpected end of file.')
+    return data
+
+
+# MP4 / QuickTime
+
+def _mp4_boxes(file, end):
+    """Yield ``(type, payload start, box end)`` of the boxes up to ``end``.
+
+    The file is positioned at the payload of each yielded box, and at the
+    next box header when iteration resumes.
+    """
+    position = file.tell()
+    while end is None or position + 8 <= end:
+        header = file.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', _read_exact(file, 8))[0]
+            header_size = 16
+        elif size == 0:
+            # The box extends to the end of its parent or of the file.
+            if end is None:
+                end = file.seek(0, os.SEEK_END)
+                file.seek(position + header_size)
+            size = end - position
+        if size < header_size:
+            raise MetadataError(f'Invalid size of MP4 box {box_type!r}.')
+        yield box_type, position + header_size, position + size
+        position += size
+        file.seek(position)
+
+
+def _parse_mvhd(data):
+    if data[0] == 1:
+        timescale, duration = struct.unpack('>IQ', data[20:32])
+    else:
+        timescale, duration = struct.unpack('>II', data[12:20])
+    return duration / timescale if timescale else None
+
+
+def _parse_tkhd(data):
+    offset = 88 if data[0] == 1 else 76
+    width, height = struct.unpack('>II', data[offset:offset + 8])
+    # 16.16 fixed point.
+    return width >> 16, height >> 16
+
+
+def read_mp4(file):
+    metadata = VideoMetadata(format='mp4')
+    file.seek(0)
+    for box_type, start, end in _mp4_boxes(file, None):
+        if box_type == b'ftyp':
+            metadata.format = 'mov' if _read_exact(file, 4) == b'qt  ' else 'mp4'
+        elif box_type == b'moov':
+            for child_type, child_start, child_end in _mp4_boxes(file, end):
+                if child_type == b'mvhd':
+                    metadata.duration = _parse_mvhd(_read_exact(file, min(child_end - child_start, 32)))
+                elif child_type == b'trak' and not metadata.width:
+                    for track_type, track_start, track_end in _mp4_boxes(file, child_end):
+                        if track_type == b'tkhd':
+                            # Audio tracks have no dimensions; keep the first video track.
+                            data = _read_exact(file, min(track_end - track_start, 96))
+                            metadata.width, metadata.height = _parse_tkhd(data)
+                            break
+            return metadata
+    raise MetadataError('No moov box found.')
+
+
+# Matroska / WebM
+
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+TRACK_VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+
+VIDEO_TRACK = 1
+
+
+def _read_vint(file, keep_marker):
+    """Read an EBML variable-size integer; returns ``(value, length, unknown)``.
+
+    ``unknown`` is true for the reserved all-ones size ("unknown size").
+    """
+    first = file.read(1)
+    if not first:
+        return None, 0, False
+    length, mask = 1, 0x80
+    while not first[0] & mask:
+        mask >>= 1
+        length += 1
+        if not mask:
+            raise MetadataError('Invalid EBML variable-size integer.')
+    value = first[0] if keep_marker else first[0] & (mask - 1)
+    unknown = first[0] & (mask - 1) == mask - 1
+    for byte in _read_exact(file, length - 1):
+        value = (value << 8) | byte
+        unknown = unknown and byte == 0xFF
+    return value, length, unknown and not keep_marker
+
+
+def _mkv_elements(file, end):
+    """Yield ``(id, payload start, payload end)`` of the elements up to ``end``.
+
+    An element of unknown size extends to ``end`` and ends the iteration.
+    """
+    position = file.tell()
+    while end is None or position < end:
+        element_id, id_length, _ = _read_vint(file, keep_marker=True)
+        if element_id is None:
+            return
+        size, size_length, unknown = _read_vint(file, keep_marker=False)
+        if size is None:
+            return
+        start = position + id_length + size_length
+        element_end = end if unknown else start + size
+        yield element_id, start, element_end
+        if element_end is None:
+            return
+        position = element_end
+        file.seek(position)
+
+
+def _read_uint(file, size):
+    return int.from_bytes(_read_exact(file, size), 'big')
+
+
+def _read_mkv_info(file, end):
+    timecode_scale, duration = 1_000_000, None
+    for element_id, start, element_end in _mkv_elements(file, end):
+        if element_id == TIMECODE_SCALE:
+            timecode_scale = _read_uint(file, element_end - start)
+        elif element_id == DURATION:
+            size = element_end - start
+            duration = struct.unpack('>f' if size == 4 else '>d', _read_exact(file, size))[0]
+    return duration * timecode_scale / 1e9 if duration is not None else None
+
+
+def _read_mkv_video_track(file, end):
+    """``(width, height)`` of the first video track in ``Tracks``, or None."""
+    for element_id, start, element_end in _mkv_elements(file, end):
+        if element_id != TRACK_ENTRY:
+            continue
+        track_type, size = None, None
+        for child_id, child_start, child_end in _mkv_elements(file, element_end):
+            if child_id == TRACK_TYPE:
+                track_type = _read_uint(file, child_end - child_start)
+            elif child_id == TRACK_VIDEO:
+                size = {}
+                for video_id, video_start, video_end in _mkv_elements(file, child_end):
+                    if video_id in (PIXEL_WIDTH, PIXEL_HEIGHT):
+                        size[video_id] = _read_uint(file, video_end - video_start)
+        if track_type == VIDEO_TRACK and size:
+            return size.get(PIXEL_WIDTH), size.get(PIXEL_HEIGHT)
+    return None
+
+
+def read_webm(file):
+    metadata = VideoMetadata(format='webm')
+    found_info = found_tracks = False
+    file.seek(0)
+    for element_id, start, end in _mkv_elements(file, None):
+        if element_id == EBML_HEADER:
+            for child_id, child_start, child_end in _mkv_elements(file, end):
+                if child_id == EBML_DOCTYPE:
+                    doctype = _read_exact(file, child_end - child_start).rstrip(b'\0')
+                    metadata.format = 'webm' if doctype == b'webm' else 'mkv'
+        elif element_id == SEGMENT:
+            for child_id, child_start, child_end in _mkv_elements(file, end):
+                if child_id == INFO:
+                    metadata.duration = _read_mkv_info(file, child_end)
+                    found_info = True
+                elif child_id == TRACKS:
+                    metadata.width, metadata.height = _read_mkv_video_track(file, child_end) or (None, None)
+                    found_tracks = True
+                if found_info and found_tracks:
+                    break
+            break
+    if not (found_info or found_tracks):
+        raise MetadataError('No Matroska segment information found.')
+    return metadata
+
+
+def read_metadata(file):
+    """Read the duration and resolution of an open, seekable binary file."""
+    file.seek(0)
+    head = file.read(12)
+    if head[:4] == EBML_HEADER.to_bytes(4, 'big'):
+        return read_webm(file)
+    if len(head) >= 8 and head[4:8] in {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide'}:
+        return read_mp4(file)
+    raise MetadataError('Unsupported video container.')
+
+
+def read_field_file(field_file):
+    """``read_metadata`` for a ``FieldFile``, uploaded or already stored.
+
+    The file position is restored (or the file closed again) afterwards so
+    saving an upload still stores the whole file.
+    """
+    was_closed = field_file.closed
+    field_file.open('rb')
+    try:
+        return read_metadata(field_file)
+    finally:
+        if was_closed:
+            field_file.close()
+        else:
+            field_file.seek(0)
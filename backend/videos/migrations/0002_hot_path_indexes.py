@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at"],
+                name="video_active_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="videocomment",
+            index=models.Index(
+                condition=models.Q(("is_approved", True)),
+                fields=["video", "-created_at"],
+                name="videocomment_approved_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="videostream",
+            index=models.Index(
+                fields=["video", "user"],
+                include=("current_position", "total_watch_time"),
+                name="videostream_video_user_idx",
+            ),
+        ),
+    ]
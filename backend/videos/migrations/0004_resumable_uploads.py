@@ -0,0 +1,134 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_hot_path_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("videos", "0003_video_processing_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VideoUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("title", models.CharField(max_length=200, verbose_name="title")),
+                (
+                    "filename",
+                    models.CharField(max_length=255, verbose_name="file name"),
+                ),
+                ("size", models.PositiveBigIntegerField(verbose_name="size in bytes")),
+                (
+                    "checksum",
+                    models.CharField(
+                        blank=True, max_length=64, verbose_name="SHA-256 checksum"
+                    ),
+                ),
+                (
+                    "received",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="bytes received"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("uploading", "Uploading"),
+                            ("finalizing", "Finalizing"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="uploading",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("expires_at", models.DateTimeField(verbose_name="expires at")),
+                (
+                    "lesson",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="video_uploads",
+                        to="courses.lesson",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="video_uploads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "video",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload",
+                        to="videos.video",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "video upload",
+                "verbose_name_plural": "video uploads",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="VideoUploadChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("offset", models.PositiveBigIntegerField(verbose_name="offset")),
+                ("length", models.PositiveBigIntegerField(verbose_name="length")),
+                (
+                    "is_complete",
+                    models.BooleanField(default=False, verbose_name="is complete"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "upload",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="videos.videoupload",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "video upload chunk",
+                "verbose_name_plural": "video upload chunks",
+                "ordering": ["offset"],
+                "unique_together": {("upload", "offset")},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:34
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0004_resumable_uploads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videoanalytics",
+            name="completed_views",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="completed views"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="videoanalytics",
+            name="date",
+            field=models.DateField(
+                default=django.utils.timezone.localdate, verbose_name="date"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="videostream",
+            index=models.Index(fields=["ended_at"], name="videostream_ended_idx"),
+        ),
+    ]
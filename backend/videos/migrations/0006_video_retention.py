@@ -0,0 +1,96 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0005_video_analytics_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VideoRetention",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sessions",
+                    models.PositiveIntegerField(default=0, verbose_name="sessions"),
+                ),
+                (
+                    "counts",
+                    models.BinaryField(
+                        default=bytes,
+                        help_text="Little-endian uint32 array: how many times each second was played",
+                        verbose_name="plays per second",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "video",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retention",
+                        to="videos.video",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "video retention",
+                "verbose_name_plural": "video retention",
+            },
+        ),
+        migrations.CreateModel(
+            name="VideoWatchedRange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.PositiveIntegerField(verbose_name="start second")),
+                (
+                    "end",
+                    models.PositiveIntegerField(verbose_name="end second (exclusive)"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "stream",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="watched_ranges",
+                        to="videos.videostream",
+                    ),
+                ),
+                (
+                    "video",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="watched_ranges",
+                        to="videos.video",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "watched range",
+                "verbose_name_plural": "watched ranges",
+                "indexes": [
+                    models.Index(fields=["created_at"], name="watchedrange_created_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_end_recorded_at(apps, schema_editor):
+    # Existing streams were rolled up by ended_at; keep that position.
+    VideoStream = apps.get_model("videos", "VideoStream")
+    VideoStream.objects.filter(ended_at__isnull=False).update(
+        end_recorded_at=F("ended_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("videos", "0006_video_retention"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videostream",
+            name="end_recorded_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_end_recorded_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="videostream",
+            index=models.Index(
+                fields=["end_recorded_at"], name="videostream_end_recorded_idx"
+            ),
+        ),
+    ]
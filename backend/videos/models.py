@@ -1,10 +1,14 @@
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
+from django.utils import timezone
 from courses.models import Lesson
 from accounts.models import User
+from .metadata import MetadataError, read_field_file
 import os
+import uuid
 
 
 def video_upload_path(instance, filename):
@@ -59,6 +63,9 @@ class Video(models.Model):
         verbose_name = _('video')
         verbose_name_plural = _('videos')
         ordering = ['lesson__order']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=Q(is_active=True), name='video_active_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.lesson.course.title} - {self.title}"
@@ -68,8 +75,20 @@ class Video(models.Model):
             self.file_size = self.video_file.size
         if self.video_file and not self.format:
             self.format = os.path.splitext(self.video_file.name)[1][1:].lower()
+        if self.video_file and not self.duration and not self.resolution:
+            self.read_metadata()
         super().save(*args, **kwargs)
     
+    def read_metadata(self):
+        """Fill duration and resolution from the container headers of the file."""
+        try:
+            metadata = read_field_file(self.video_file)
+        except (MetadataError, OSError):
+            return False
+        for field, value in metadata.as_video_fields().items():
+            setattr(self, field, value)
+        return True
+    
     @property
     def file_size_mb(self):
         """Return file size in MB."""
@@ -89,6 +108,109 @@ class Video(models.Model):
         return None
 
 
+class VideoProcessingJob(models.Model):
+    """A queued, running or finished processing run of a video."""
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='processing_jobs')
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=[
+            ('queued', 'Queued'),
+            ('running', 'Running'),
+            ('succeeded', 'Succeeded'),
+            ('failed', 'Failed'),
+        ],
+        default='queued'
+    )
+    
+    # Scheduling
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    max_attempts = models.PositiveIntegerField(_('max attempts'), default=3)
+    run_after = models.DateTimeField(_('run after'), default=timezone.now)
+    worker = models.CharField(_('worker'), max_length=100, blank=True)
+    locked_at = models.DateTimeField(_('locked at'), blank=True, null=True)
+    last_error = models.TextField(_('last error'), blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(_('finished at'), blank=True, null=True)
+    
+    class Meta:
+        verbose_name = _('video processing job')
+        verbose_name_plural = _('video processing jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['run_after'], condition=Q(status__in=['queued', 'running']), name='videojob_pending_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['video'], condition=Q(status__in=['queued', 'running']), name='videojob_one_active_per_video',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Processing {self.video.title} ({self.status})"
+
+
+class VideoUpload(models.Model):
+    """A resumable upload of a video file, received in chunks."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_uploads')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='video_uploads')
+    title = models.CharField(_('title'), max_length=200)
+    filename = models.CharField(_('file name'), max_length=255)
+    size = models.PositiveBigIntegerField(_('size in bytes'))
+    checksum = models.CharField(_('SHA-256 checksum'), max_length=64, blank=True)
+    received = models.PositiveBigIntegerField(_('bytes received'), default=0)
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=[
+            ('uploading', 'Uploading'),
+            ('finalizing', 'Finalizing'),
+            ('completed', 'Completed'),
+            ('failed', 'Failed'),
+        ],
+        default='uploading'
+    )
+    error = models.TextField(_('error'), blank=True)
+    video = models.OneToOneField(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(_('expires at'))
+    
+    class Meta:
+        verbose_name = _('video upload')
+        verbose_name_plural = _('video uploads')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.status})"
+
+
+class VideoUploadChunk(models.Model):
+    """A byte range of a resumable upload, reserved while it is being written."""
+    upload = models.ForeignKey(VideoUpload, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.PositiveBigIntegerField(_('offset'))
+    length = models.PositiveBigIntegerField(_('length'))
+    is_complete = models.BooleanField(_('is complete'), default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('video upload chunk')
+        verbose_name_plural = _('video upload chunks')
+        unique_together = ['upload', 'offset']
+        ordering = ['offset']
+    
+    def __str__(self):
+        return f"Bytes {self.offset}-{self.offset + self.length - 1} of {self.upload_id}"
+
+
 class VideoStream(models.Model):
     """Track video streaming sessions."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_streams')
@@ -98,6 +220,8 @@ class VideoStream(models.Model):
     # Streaming data
     started_at = models.DateTimeField(auto_now_add=True)
     ended_at = models.DateTimeField(blank=True, null=True)
+    # Server time at which the end was saved; ended_at may be reported by the client.
+    end_recorded_at = models.DateTimeField(blank=True, null=True, editable=False)
     total_watch_time = models.PositiveIntegerField(_('total watch time in seconds'), default=0)
     current_position = models.PositiveIntegerField(_('current position in seconds'), default=0)
     
@@ -123,10 +247,27 @@ class VideoStream(models.Model):
         verbose_name = _('video stream')
         verbose_name_plural = _('video streams')
         ordering = ['-started_at']
+        indexes = [
+            # Covers progress lookups (position and watch time) on PostgreSQL.
+            models.Index(
+                fields=['video', 'user'], include=['current_position', 'total_watch_time'],
+                name='videostream_video_user_idx',
+            ),
+            # Range scans of the analytics rollups past their watermark.
+            models.Index(fields=['ended_at'], name='videostream_ended_idx'),
+            models.Index(fields=['end_recorded_at'], name='videostream_end_recorded_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} streaming {self.video.title}"
     
+    def save(self, *args, **kwargs):
+        if self.ended_at is None:
+            self.end_recorded_at = None
+        elif self.end_recorded_at is None:
+            self.end_recorded_at = timezone.now()
+        super().save(*args, **kwargs)
+    
     @property
     def is_active(self):
         return self.ended_at is None
@@ -142,7 +283,7 @@ class VideoStream(models.Model):
 class VideoAnalytics(models.Model):
     """Track video analytics and metrics."""
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='analytics')
-    date = models.DateField(_('date'), auto_now_add=True)
+    date = models.DateField(_('date'), default=timezone.localdate)
     
     # View counts
     total_views = models.PositiveIntegerField(_('total views'), default=0)
@@ -153,6 +294,7 @@ class VideoAnalytics(models.Model):
     average_watch_time = models.PositiveIntegerField(_('average watch time in seconds'), default=0)
     
     # Engagement
+    completed_views = models.PositiveIntegerField(_('completed views'), default=0)
     completion_rate = models.DecimalField(
         _('completion rate'),
         max_digits=5,
@@ -183,6 +325,45 @@ class VideoAnalytics(models.Model):
         return 0
 
 
+class VideoWatchedRange(models.Model):
+    """A range of seconds of a video played during a streaming session."""
+    stream = models.ForeignKey(VideoStream, on_delete=models.CASCADE, related_name='watched_ranges')
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='watched_ranges')
+    start = models.PositiveIntegerField(_('start second'))
+    end = models.PositiveIntegerField(_('end second (exclusive)'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('watched range')
+        verbose_name_plural = _('watched ranges')
+        indexes = [
+            # Range scans of the retention fold past its watermark.
+            models.Index(fields=['created_at'], name='watchedrange_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Seconds {self.start}-{self.end} of {self.video_id} in stream {self.stream_id}"
+
+
+class VideoRetention(models.Model):
+    """Per-second audience retention of a video, folded from watched ranges."""
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name='retention')
+    sessions = models.PositiveIntegerField(_('sessions'), default=0)
+    counts = models.BinaryField(
+        _('plays per second'),
+        default=bytes,
+        help_text='Little-endian uint32 array: how many times each second was played'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('video retention')
+        verbose_name_plural = _('video retention')
+    
+    def __str__(self):
+        return f"Retention of {self.video_id} over {self.sessions} sessions"
+
+
 class VideoComment(models.Model):
     """Comments on videos."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_comments')
@@ -204,6 +385,9 @@ class VideoComment(models.Model):
         verbose_name = _('video comment')
         verbose_name_plural = _('video comments')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['video', '-created_at'], condition=Q(is_approved=True), name='videocomment_approved_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.video.title}"
@@ -0,0 +1,218 @@
+"""Background video processing.
+
+Processing runs are persisted as ``VideoProcessingJob`` rows, so queued work
+survives restarts and any number of worker processes (see the
+``process_videos`` command) can share the queue. A worker claims a job with
+a conditional ``UPDATE`` (only one worker can move it from ``queued`` to
+``running``), runs the transcoder and records the outcome on both the job
+and the ``Video``:
+
+    Video.processing_status   pending -> processing -> completed | failed
+
+Failed attempts are retried with exponential backoff until
+``max_attempts``; a ``PermanentProcessingError`` fails the job at once.
+Jobs whose worker died stay ``running`` until their lease
+(``VIDEO_PROCESSING_LEASE`` seconds) expires and are then claimed again.
+
+The transcoder is the callable named by ``VIDEO_TRANSCODER``: it receives
+the ``Video`` and returns the field values to store on it (``duration``,
+``resolution``, ...). Tests can point the setting at a stub.
+"""
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import subprocess
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .metadata import MetadataError, read_field_file
+from .models import Video, VideoProcessingJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Longest wait between two attempts, whatever the backoff gives.
+MAX_RETRY_DELAY = 60 * 60
+
+# Video fields a transcoder may set.
+VIDEO_FIELDS = {'duration', 'file_size', 'resolution', 'format', 'video_file'}
+
+
+class PermanentProcessingError(Exception):
+    """A processing failure retrying cannot fix (e.g. an unreadable file)."""
+
+
+def probe_video(video):
+    """Default transcoder: read the file's metadata.
+
+    MP4/MOV and WebM headers are parsed in Python; other containers use
+    ``ffprobe`` when it is installed.
+    """
+    if not video.video_file:
+        raise PermanentProcessingError('The video has no file.')
+    updates = {
+        'file_size': video.video_file.size,
+        'format': os.path.splitext(video.video_file.name)[1][1:].lower(),
+    }
+    try:
+        return {**updates, **read_field_file(video.video_file).as_video_fields()}
+    except MetadataError:
+        pass
+    if shutil.which('ffprobe') is None:
+        return updates
+    try:
+        path = video.video_file.path
+    except NotImplementedError:
+        return updates
+    output = subprocess.run(
+        [
+            'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-print_format', 'json',
+            '-show_entries', 'stream=width,height:format=duration', path,
+        ],
+        capture_output=True, check=True, timeout=300,
+    ).stdout
+    probe = json.loads(output or b'{}')
+    streams = probe.get('streams') or [{}]
+    if streams[0].get('width'):
+        updates['resolution'] = f"{streams[0]['width']}x{streams[0]['height']}"
+    if probe.get('format', {}).get('duration'):
+        updates['duration'] = round(float(probe['format']['duration']))
+    return updates
+
+
+def get_transcoder():
+    return import_string(getattr(settings, 'VIDEO_TRANSCODER', 'videos.processing.probe_video'))
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt ``attempts + 1``: exponential with jitter."""
+    base = getattr(settings, 'VIDEO_PROCESSING_RETRY_DELAY', 30)
+    delay = min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue_processing(video):
+    """Queue ``video`` for processing; returns its active job.
+
+    A video has at most one queued or running job, so enqueueing a video
+    that is already waiting or being processed returns the existing job.
+    """
+    existing = VideoProcessingJob.objects.filter(video=video, status__in=ACTIVE_STATUSES).first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            job = VideoProcessingJob.objects.create(
+                video=video, max_attempts=getattr(settings, 'VIDEO_PROCESSING_MAX_ATTEMPTS', 3),
+            )
+            Video.objects.filter(pk=video.pk).update(
+                processing_status='pending', processing_error='', updated_at=timezone.now(),
+            )
+    except IntegrityError:
+        # Another request queued it concurrently.
+        return VideoProcessingJob.objects.get(video=video, status__in=ACTIVE_STATUSES)
+    return job
+
+
+def claim_job(worker, now=None):
+    """Take the next due job for ``worker``; returns it or None.
+
+    Candidates are queued jobs that are due and running jobs whose lease
+    expired. The conditional update makes the claim safe across processes
+    without row locks, so it works on every database backend.
+    """
+    now = now or timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'VIDEO_PROCESSING_LEASE', 60 * 60))
+    claimable = Q(status='queued', run_after__lte=now) | Q(status='running', locked_at__lt=now - lease)
+    candidates = (
+        VideoProcessingJob.objects.filter(claimable)
+        .order_by('run_after', 'pk')
+        .values_list('pk', 'status', 'locked_at')[:10]
+    )
+    for job_id, job_status, locked_at in candidates:
+        claimed = VideoProcessingJob.objects.filter(pk=job_id, status=job_status, locked_at=locked_at).update(
+            status='running', worker=worker, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if claimed:
+            return VideoProcessingJob.objects.select_related('video').get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome; returns the final job status."""
+    video = job.video
+    Video.objects.filter(pk=video.pk).update(processing_status='processing', updated_at=timezone.now())
+    try:
+        updates = get_transcoder()(video) or {}
+    except Exception as exc:
+        logger.warning('Processing video %s failed (attempt %s)', video.pk, job.attempts, exc_info=True)
+        return fail_job(job, exc)
+
+    now = timezone.now()
+    with transaction.atomic():
+        Video.objects.filter(pk=video.pk).update(
+            **{field: value for field, value in updates.items() if field in VIDEO_FIELDS},
+            is_processed=True, processing_status='completed', processing_error='',
+            processed_at=now, updated_at=now,
+        )
+        VideoProcessingJob.objects.filter(pk=job.pk).update(
+            status='succeeded', last_error='', finished_at=now, updated_at=now,
+        )
+    return 'succeeded'
+
+
+def fail_job(job, exc):
+    now = timezone.now()
+    error = str(exc) or exc.__class__.__name__
+    permanent = isinstance(exc, PermanentProcessingError)
+    with transaction.atomic():
+        if permanent or job.attempts >= job.max_attempts:
+            VideoProcessingJob.objects.filter(pk=job.pk).update(
+                status='failed', last_error=error, finished_at=now, updated_at=now,
+            )
+            Video.objects.filter(pk=job.video_id).update(
+                processing_status='failed', processing_error=error, updated_at=now,
+            )
+            return 'failed'
+        VideoProcessingJob.objects.filter(pk=job.pk).update(
+            status='queued', last_error=error, locked_at=None, worker='',
+            run_after=now + timedelta(seconds=retry_delay(job.attempts)), updated_at=now,
+        )
+        Video.objects.filter(pk=job.video_id).update(
+            processing_status='pending', processing_error=error, updated_at=now,
+        )
+    return 'queued'
+
+
+def worker_name(index=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def work(name=None, burst=False, poll_interval=5.0, should_stop=None):
+    """Process jobs until stopped, or until the queue is empty in ``burst`` mode.
+
+    Returns the number of jobs run.
+    """
+    name = name or worker_name()
+    processed = 0
+    while not (should_stop and should_stop()):
+        close_old_connections()
+        job = claim_job(name)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,166 @@
+"""Per-second audience retention curves.
+
+Players report the ranges of seconds they played since their previous
+report; every range is stored as a ``VideoWatchedRange``. A periodic job
+folds the ranges recorded since its ``RollupWatermark`` into one
+``VideoRetention`` row per video holding a counter per second (a uint32
+array stored as bytes):
+
+* the ranges of all videos are laid out back to back in one flat array,
+  ``+1`` is added at every range start and ``-1`` at every range end with
+  ``np.bincount``, and a single ``np.cumsum`` turns these differences into
+  per-second play counts for every video at once;
+* the counts are added to the stored arrays (grown to the longest range
+  seen) and written back with one upsert.
+
+A second played twice counts twice, so rewatched parts stand out. The
+number of sessions, used to turn counts into retention rates, counts each
+stream once: when its first range is folded.
+
+Reading a curve loads one row and downsamples its array; nothing is
+scanned per request.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from courses.analytics import ROLLUP_LAG, advance_watermark
+from courses.models import RollupWatermark
+
+from .models import VideoRetention, VideoWatchedRange
+
+WATERMARK = 'video_retention:ranges'
+
+COUNT_DTYPE = np.dtype('<u4')
+
+# Longest range stored for videos of unknown duration.
+MAX_SECONDS = 24 * 60 * 60
+
+
+def merge_ranges(ranges, limit):
+    """Sort, clip to ``[0, limit)`` and merge overlapping ``(start, end)`` ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        start, end = max(start, 0), min(end, limit)
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(item) for item in merged]
+
+
+def record_ranges(stream, ranges):
+    """Store the ranges played in ``stream`` since its previous report."""
+    limit = stream.video.duration or MAX_SECONDS
+    VideoWatchedRange.objects.bulk_create([
+        VideoWatchedRange(stream_id=stream.pk, video_id=stream.video_id, start=start, end=end)
+        for start, end in merge_ranges(ranges, limit)
+    ])
+
+
+def play_counts(video_ids, starts, ends):
+    """Per-second play counts of every video in ``video_ids``.
+
+    Returns ``(videos, counts)``: the distinct video ids and, for each, an
+    array with one counter per second up to its furthest range end.
+    """
+    videos, index = np.unique(video_ids, return_inverse=True)
+    lengths = np.zeros(len(videos), dtype=np.int64)
+    np.maximum.at(lengths, index, ends)
+    # One slot past each video's last second, where its ranges close.
+    offsets = np.concatenate(([0], np.cumsum(lengths + 1)))
+    size = int(offsets[-1])
+    diff = (
+        np.bincount(offsets[index] + starts, minlength=size)
+        - np.bincount(offsets[index] + ends, minlength=size)
+    )
+    # Every video's differences sum to zero, so one cumsum covers all of them.
+    flat = np.cumsum(diff)
+    return videos, [flat[offsets[i]:offsets[i] + lengths[i]] for i in range(len(videos))]
+
+
+def _new_sessions(ranges, since):
+    """Streams per video whose first range is among ``ranges``."""
+    if since is not None:
+        ranges = ranges.annotate(seen=Exists(VideoWatchedRange.objects.filter(
+            stream=OuterRef('stream'), created_at__lte=since,
+        )))
+        sessions = Count('stream', distinct=True, filter=Q(seen=False))
+    else:
+        sessions = Count('stream', distinct=True)
+    return dict(ranges.values('video_id').annotate(sessions=sessions).values_list('video_id', 'sessions').order_by())
+
+
+def fold_retention(now=None):
+    """Fold the ranges recorded since the last run into ``VideoRetention``.
+
+    Returns the number of videos updated.
+    """
+    upper = (now or timezone.now()) - ROLLUP_LAG
+    with transaction.atomic():
+        since = advance_watermark(WATERMARK, upper)
+        ranges = VideoWatchedRange.objects.filter(created_at__lte=upper)
+        if since is not None:
+            ranges = ranges.filter(created_at__gt=since)
+        rows = np.array(list(ranges.values_list('video_id', 'start', 'end').order_by()), dtype=np.int64)
+        if not len(rows):
+            return 0
+        videos, counts = play_counts(rows[:, 0], rows[:, 1], rows[:, 2])
+        sessions = _new_sessions(ranges, since)
+
+        existing = {
+            video_id: (stored_sessions, bytes(stored))
+            for video_id, stored_sessions, stored in VideoRetention.objects.filter(
+                video_id__in=videos.tolist(),
+            ).values_list('video_id', 'sessions', 'counts')
+        }
+        retention = []
+        for video_id, added in zip(videos.tolist(), counts):
+            stored_sessions, stored = existing.get(video_id, (0, b''))
+            total = np.frombuffer(stored, dtype=COUNT_DTYPE).astype(np.int64)
+            if len(total) < len(added):
+                total = np.pad(total, (0, len(added) - len(total)))
+            total[:len(added)] += added
+            retention.append(VideoRetention(
+                video_id=video_id,
+                sessions=stored_sessions + sessions.get(video_id, 0),
+                counts=total.astype(COUNT_DTYPE).tobytes(),
+                updated_at=timezone.now(),
+            ))
+        VideoRetention.objects.bulk_create(
+            retention, batch_size=500, update_conflicts=True, unique_fields=['video'],
+            update_fields=['sessions', 'counts', 'updated_at'],
+        )
+    return len(retention)
+
+
+def rebuild_retention():
+    """Drop every retention row and the watermark, then fold the full history."""
+    with transaction.atomic():
+        VideoRetention.objects.all().delete()
+        RollupWatermark.objects.filter(name=WATERMARK).delete()
+        return fold_retention()
+
+
+def retention_curve(retention, points=100, duration=None):
+    """Downsample a video's per-second counts to at most ``points`` buckets.
+
+    Each bucket holds its first second, the average number of plays of its
+    seconds and that average as a percentage of the sessions.
+    """
+    counts = np.frombuffer(bytes(retention.counts), dtype=COUNT_DTYPE)
+    if duration:
+        counts = np.pad(counts[:duration], (0, max(duration - len(counts), 0)))
+    if not len(counts):
+        return []
+    starts = np.unique(np.linspace(0, len(counts), num=min(points, len(counts)), endpoint=False).astype(np.int64))
+    sizes = np.diff(np.append(starts, len(counts)))
+    averages = np.add.reduceat(counts.astype(np.int64), starts) / sizes
+    rates = averages * 100 / retention.sessions if retention.sessions else np.zeros(len(starts))
+    return [
+        {'second': int(second), 'plays': round(float(plays), 2), 'retention': round(float(rate), 2)}
+        for second, plays, rate in zip(starts, averages, rates)
+    ]
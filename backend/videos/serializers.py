@@ -1,29 +1,119 @@
 # backend/videos/serializers.py
+import os
+
+from django.conf import settings
 from rest_framework import serializers
-from .models import Video, VideoStream, VideoAnalytics, VideoComment, VideoBookmark
+from core.serializers import DynamicFieldsModelSerializer
+from .models import Video, VideoStream, VideoAnalytics, VideoComment, VideoBookmark, VideoProcessingJob, VideoUpload
+from .uploads import missing_ranges, upload_offset
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Video
         fields = '__all__'
+        expandable_fields = {
+            'lesson': 'courses.serializers.LessonSerializer',
+        }
+
+class VideoProcessingJobSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = VideoProcessingJob
+        fields = '__all__'
+
+class VideoProcessingStatusSerializer(serializers.ModelSerializer):
+    """Processing state of a video and its latest job."""
+    job = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Video
+        fields = ['id', 'processing_status', 'is_processed', 'processing_error', 'processed_at', 'job']
+
+    def get_job(self, video):
+        job = video.processing_jobs.order_by('-created_at', '-pk').first()
+        return VideoProcessingJobSerializer(job).data if job else None
+
+class VideoUploadSerializer(serializers.ModelSerializer):
+    """A resumable upload session and the byte ranges it still needs."""
+    offset = serializers.SerializerMethodField()
+    missing_ranges = serializers.SerializerMethodField()
 
-class VideoStreamSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VideoUpload
+        fields = '__all__'
+        read_only_fields = ['user', 'received', 'status', 'error', 'video', 'expires_at']
+
+    def get_offset(self, upload):
+        return upload_offset(upload)
+
+    def get_missing_ranges(self, upload):
+        return [[start, end] for start, end in missing_ranges(upload)]
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.MAX_VIDEO_SIZE:
+            raise serializers.ValidationError(f'Videos must be between 1 and {settings.MAX_VIDEO_SIZE} bytes.')
+        return value
+
+    def validate_filename(self, value):
+        if os.path.splitext(value)[1].lower() not in settings.ALLOWED_VIDEO_EXTENSIONS:
+            raise serializers.ValidationError(
+                f"Allowed extensions: {', '.join(settings.ALLOWED_VIDEO_EXTENSIONS)}."
+            )
+        return value
+
+    def validate_checksum(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or value.strip('0123456789abcdef')):
+            raise serializers.ValidationError('Expected a hex SHA-256 digest.')
+        return value
+
+    def validate_lesson(self, lesson):
+        if hasattr(lesson, 'video'):
+            raise serializers.ValidationError('This lesson already has a video.')
+        return lesson
+
+class VideoStreamSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = VideoStream
         fields = '__all__'
+        expandable_fields = {
+            'video': VideoSerializer,
+        }
+
+class VideoHeartbeatSerializer(serializers.Serializer):
+    """A player heartbeat: the playback position and watch time of a session."""
+    id = serializers.IntegerField(read_only=True)
+    current_position = serializers.IntegerField(min_value=0)
+    total_watch_time = serializers.IntegerField(min_value=0, default=0)
+
+class VideoWatchedRangesSerializer(serializers.Serializer):
+    """Ranges of seconds ``[start, end)`` played since the previous report."""
+    ranges = serializers.ListField(
+        child=serializers.ListField(child=serializers.IntegerField(min_value=0), min_length=2, max_length=2),
+        allow_empty=False, max_length=1000,
+    )
 
-class VideoAnalyticsSerializer(serializers.ModelSerializer):
+    def validate_ranges(self, value):
+        if any(start >= end for start, end in value):
+            raise serializers.ValidationError('Every range must end after it starts.')
+        return value
+
+class VideoAnalyticsSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = VideoAnalytics
         fields = '__all__'
 
-class VideoCommentSerializer(serializers.ModelSerializer):
+class VideoCommentSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = VideoComment
         fields = '__all__'
+        expandable_fields = {
+            'user': 'accounts.serializers.PublicUserSerializer',
+        }
 
-class VideoBookmarkSerializer(serializers.ModelSerializer):
+class VideoBookmarkSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = VideoBookmark
         fields = '__all__'
-
+        expandable_fields = {
+            'video': VideoSerializer,
+        }
@@ -0,0 +1,204 @@
+"""Byte-range delivery of video files.
+
+``serve_video`` answers ``GET``/``HEAD`` requests for a video file with
+``Accept-Ranges``, a strong ``ETag`` and ``Last-Modified``, honouring
+``Range`` (a single range, ``206 Partial Content``), ``If-Range`` and
+``If-None-Match``.
+
+Bytes are never read into Python when avoidable: with
+``VIDEO_SENDFILE_BACKEND`` set to ``x-accel-redirect`` (nginx) or
+``x-sendfile`` (Apache, lighttpd) the web server is told which file to send
+and handles ranges itself; otherwise a ``FileResponse`` over an open file
+positioned at the range start is returned, which WSGI servers supporting
+``wsgi.file_wrapper`` (e.g. gunicorn) send with ``os.sendfile``.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework.negotiation import BaseContentNegotiation
+
+from courses.models import CourseEnrollment
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+BLOCK_SIZE = 64 * 1024
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Accept any ``Accept`` header; media players rarely ask for JSON."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class FileRange:
+    """Read at most ``length`` bytes of an open file from its current position.
+
+    ``fileno`` is exposed so ``wsgi.file_wrapper`` implementations can hand
+    the descriptor to ``os.sendfile``, bounded by ``Content-Length``.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def can_stream(user, video):
+    """Whether ``user`` may watch ``video``.
+
+    Public videos and free lessons are open to everyone; other videos need
+    an active enrollment in the course, or being its instructor or staff.
+    """
+    if not video.is_active:
+        return False
+    lesson = video.lesson
+    if video.is_public or lesson.is_free:
+        return True
+    if not user.is_authenticated:
+        return False
+    if user.is_staff or lesson.course.instructor_id == user.id:
+        return True
+    return CourseEnrollment.objects.filter(student=user, course_id=lesson.course_id, is_active=True).exists()
+
+
+def parse_range(header, size):
+    """Parse a ``Range`` header into an inclusive ``(start, end)``.
+
+    Returns None when the header should be ignored (absent, malformed or
+    several ranges) and raises ``ValueError`` when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('Empty suffix range.')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError('Range starts past the end of the file.')
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def file_validators(stat):
+    """Strong ETag and Last-Modified timestamp of a file."""
+    return quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}'), int(stat.st_mtime)
+
+
+def range_applies(request, etag, modified):
+    """``If-Range``: honour ``Range`` only if the client's copy is current."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Weak validators never match for ranges.
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and modified <= since
+
+
+def offload(path, content_type):
+    """Response asking the front-end server to send ``path`` itself."""
+    backend = getattr(settings, 'VIDEO_SENDFILE_BACKEND', '')
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-accel-redirect':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        location = getattr(settings, 'VIDEO_ACCEL_REDIRECT_LOCATION', '/protected-media/')
+        response['X-Accel-Redirect'] = quote(location.rstrip('/') + '/' + relative.replace(os.sep, '/'))
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve_video(request, video):
+    """Stream ``video.video_file`` with range and conditional request support."""
+    if not video.video_file:
+        raise Http404('This video has no file.')
+    storage = video.video_file.storage
+    try:
+        path = storage.path(video.video_file.name)
+    except NotImplementedError:
+        # Remote storage (e.g. S3) serves ranges from its own URL.
+        return HttpResponseRedirect(video.video_file.url)
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('Video file not found.')
+    size = stat.st_size
+    etag, modified = file_validators(stat)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Last-Modified': http_date(modified),
+        'Cache-Control': 'private, max-age=3600',
+    }
+
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    if getattr(settings, 'VIDEO_SENDFILE_BACKEND', ''):
+        response = offload(path, content_type)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = None
+    if range_applies(request, etag, modified):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE', ''), size)
+        except ValueError:
+            response = HttpResponse(status=416, content_type=content_type)
+            response['Content-Range'] = f'bytes */{size}'
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        file = open(path, 'rb')
+        file.seek(start)
+        response = FileResponse(FileRange(file, length), content_type=content_type)
+        response.block_size = BLOCK_SIZE
+    for name, value in headers.items():
+        response[name] = value
+    response['Content-Length'] = str(length)
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,254 @@
+"""Resumable (tus-like) chunked video uploads.
+
+A client creates an upload session with the final size, then sends the
+file as ``PATCH`` requests carrying ``Upload-Offset`` and a slice of the
+bytes, and asks ``HEAD`` how far it got after a disconnect:
+
+* The session owns a temporary file, preallocated (sparse) to the final
+  size, so chunks are written at their offset and may be sent in parallel
+  and in any order.
+* Every chunk first reserves its byte range under a lock on the session;
+  ranges overlapping a complete or in-flight chunk are rejected. The range
+  is released if the request fails, or after ``VIDEO_UPLOAD_CHUNK_TIMEOUT``
+  seconds if the worker died.
+* Chunks are streamed to disk in fixed-size blocks while being hashed, so
+  memory per upload is bounded whatever the chunk size, and an optional
+  ``Upload-Checksum`` is verified before the range counts as received.
+* When every byte has arrived, the temporary file is renamed (atomically,
+  on the same filesystem) to the ``video_upload_path`` of a new ``Video``,
+  which is then queued for processing.
+"""
+import base64
+import hashlib
+import hmac
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Video, VideoUpload, VideoUploadChunk
+from .processing import enqueue_processing
+
+BLOCK_SIZE = 1024 * 1024
+
+CHECKSUM_ALGORITHMS = {'sha256', 'sha1', 'md5'}
+
+
+class UploadError(Exception):
+    """An upload request that cannot be applied; ``status_code`` is the HTTP answer."""
+    status_code = 400
+
+
+class UploadConflict(UploadError):
+    status_code = 409
+
+
+class UploadGone(UploadError):
+    status_code = 410
+
+
+class ChecksumMismatch(UploadError):
+    # tus: 460 Checksum Mismatch.
+    status_code = 460
+
+
+class ChunkTooLarge(UploadError):
+    status_code = 413
+
+
+class IncompleteChunk(UploadError):
+    pass
+
+
+def get_temp_dir():
+    return getattr(settings, 'VIDEO_UPLOAD_TEMP_DIR', '') or os.path.join(settings.MEDIA_ROOT, 'uploads')
+
+
+def temp_path(upload):
+    return os.path.join(get_temp_dir(), f'{upload.pk}.part')
+
+
+def create_upload(user, lesson, title, filename, size, checksum=''):
+    """Open an upload session and preallocate its temporary file."""
+    expiry = timedelta(hours=getattr(settings, 'VIDEO_UPLOAD_EXPIRY', 24))
+    upload = VideoUpload.objects.create(
+        user=user, lesson=lesson, title=title, filename=os.path.basename(filename), size=size,
+        checksum=checksum.lower(), expires_at=timezone.now() + expiry,
+    )
+    os.makedirs(get_temp_dir(), exist_ok=True)
+    with open(temp_path(upload), 'wb') as file:
+        file.truncate(size)
+    return upload
+
+
+def received_ranges(upload):
+    """Complete chunks as sorted, merged ``(start, end)`` ranges (end exclusive)."""
+    ranges = []
+    for offset, length in upload.chunks.filter(is_complete=True).order_by('offset').values_list('offset', 'length'):
+        if ranges and ranges[-1][1] == offset:
+            ranges[-1] = (ranges[-1][0], offset + length)
+        else:
+            ranges.append((offset, offset + length))
+    return ranges
+
+
+def upload_offset(upload, ranges=None):
+    """Bytes received contiguously from the start of the file (tus ``Upload-Offset``)."""
+    ranges = received_ranges(upload) if ranges is None else ranges
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+
+def missing_ranges(upload, ranges=None):
+    ranges = received_ranges(upload) if ranges is None else ranges
+    missing, position = [], 0
+    for start, end in ranges:
+        if start > position:
+            missing.append((position, start))
+        position = end
+    if position < upload.size:
+        missing.append((position, upload.size))
+    return missing
+
+
+def parse_checksum(header):
+    """Parse ``Upload-Checksum: <algorithm> <base64 digest>``; None when absent."""
+    if not header:
+        return None
+    try:
+        algorithm, encoded = header.split(' ', 1)
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except ValueError:
+        raise UploadError('Upload-Checksum must be "<algorithm> <base64 digest>".')
+    if algorithm.lower() not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f'Unsupported checksum algorithm {algorithm!r}.')
+    return algorithm.lower(), digest
+
+
+def reserve_chunk(upload, offset, length):
+    """Reserve ``[offset, offset + length)`` of an upload for one writer."""
+    if length <= 0:
+        raise UploadError('A chunk needs a Content-Length.')
+    max_chunk = getattr(settings, 'VIDEO_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024)
+    if length > max_chunk:
+        raise ChunkTooLarge(f'Chunks are limited to {max_chunk} bytes.')
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Writing the row first locks it for the transaction, like
+        # select_for_update(), and also serializes writers on SQLite.
+        VideoUpload.objects.filter(pk=upload.pk).update(updated_at=now)
+        upload = VideoUpload.objects.get(pk=upload.pk)
+        if upload.status != 'uploading' or upload.expires_at <= now:
+            raise UploadGone('This upload is no longer accepting data.')
+        if offset < 0 or offset + length > upload.size:
+            raise UploadConflict(f'The chunk does not fit in the {upload.size} bytes of the upload.')
+        timeout = timedelta(seconds=getattr(settings, 'VIDEO_UPLOAD_CHUNK_TIMEOUT', 600))
+        upload.chunks.filter(is_complete=False, created_at__lt=now - timeout).delete()
+        # [o, o + l) overlaps the new range when o < offset + length and o + l > offset.
+        overlapping = upload.chunks.filter(offset__lt=offset + length, offset__gt=offset - F('length'))
+        if overlapping.exists():
+            raise UploadConflict('Part of this range was already received or is being received.')
+        return VideoUploadChunk.objects.create(upload=upload, offset=offset, length=length)
+
+
+def write_chunk(upload, offset, length, stream, checksum=None):
+    """Stream one chunk from ``stream`` into the upload at ``offset``.
+
+    Returns the upload, finalized when this was the last missing chunk.
+    """
+    chunk = reserve_chunk(upload, offset, length)
+    digest = hashlib.new(checksum[0]) if checksum else None
+    try:
+        remaining = length
+        with open(temp_path(upload), 'r+b') as file:
+            file.seek(offset)
+            while remaining:
+                block = stream.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    raise IncompleteChunk(f'Received {length - remaining} of {length} bytes; resend the chunk.')
+                if digest is not None:
+                    digest.update(block)
+                file.write(block)
+                remaining -= len(block)
+        if digest is not None and not hmac.compare_digest(digest.digest(), checksum[1]):
+            raise ChecksumMismatch('The chunk does not match its Upload-Checksum.')
+    except BaseException:
+        chunk.delete()
+        raise
+
+    with transaction.atomic():
+        # The reservation may have timed out and been released meanwhile;
+        # then the range belongs to another writer and must not count twice.
+        if not VideoUploadChunk.objects.filter(pk=chunk.pk, is_complete=False).update(is_complete=True):
+            raise UploadConflict('The reservation of this chunk expired; resend it.')
+        VideoUpload.objects.filter(pk=upload.pk).update(received=F('received') + length, updated_at=timezone.now())
+    upload.refresh_from_db()
+    if upload.received == upload.size:
+        finalize_upload(upload)
+        upload.refresh_from_db()
+    return upload
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def move_into_storage(path, video, filename):
+    """Move the finished file to the video's upload path; returns the stored name."""
+    field = Video._meta.get_field('video_file')
+    storage = field.storage
+    name = storage.get_available_name(field.generate_filename(video, filename), max_length=field.max_length)
+    try:
+        destination = storage.path(name)
+    except NotImplementedError:
+        # Remote storage: stream the file up, then drop the local copy.
+        with open(path, 'rb') as file:
+            name = storage.save(name, File(file))
+        os.remove(path)
+        return name
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(path, destination)
+    return name
+
+
+def finalize_upload(upload):
+    """Turn a fully received upload into a ``Video``; only one caller wins."""
+    if not VideoUpload.objects.filter(pk=upload.pk, status='uploading').update(status='finalizing'):
+        return None
+    path = temp_path(upload)
+    try:
+        if upload.checksum and file_checksum(path) != upload.checksum:
+            raise ChecksumMismatch('The uploaded file does not match its checksum.')
+        with transaction.atomic():
+            video = Video(title=upload.title, lesson=upload.lesson)
+            video.video_file.name = move_into_storage(path, video, upload.filename)
+            video.save()
+            VideoUpload.objects.filter(pk=upload.pk).update(
+                status='completed', video=video, updated_at=timezone.now(),
+            )
+            transaction.on_commit(lambda: enqueue_processing(video))
+    except Exception as exc:
+        VideoUpload.objects.filter(pk=upload.pk).update(status='failed', error=str(exc), updated_at=timezone.now())
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return video
+
+
+def cancel_upload(upload):
+    if os.path.exists(temp_path(upload)):
+        os.remove(temp_path(upload))
+    upload.delete()
+
+
+def expired_uploads(now=None):
+    now = now or timezone.now()
+    return VideoUpload.objects.filter(status__in=['uploading', 'failed'], expires_at__lte=now)
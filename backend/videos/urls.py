@@ -8,6 +8,8 @@ urlpatterns = [
     path('', views.VideoListView.as_view(), name='video-list'),
     path('<int:pk>/', views.VideoDetailView.as_view(), name='video-detail'),
     path('create/', views.VideoCreateView.as_view(), name='video-create'),
+    path('uploads/', views.VideoUploadCreateView.as_view(), name='video-upload-create'),
+    path('uploads/<uuid:pk>/', views.VideoUploadView.as_view(), name='video-upload'),
     path('<int:pk>/edit/', views.VideoUpdateView.as_view(), name='video-update'),
     path('<int:pk>/delete/', views.VideoDeleteView.as_view(), name='video-delete'),
     
@@ -19,6 +21,7 @@ urlpatterns = [
     # Video progress
     path('<int:pk>/progress/', views.VideoProgressView.as_view(), name='video-progress'),
     path('<int:pk>/progress/update/', views.VideoProgressUpdateView.as_view(), name='video-progress-update'),
+    path('streams/<int:pk>/ranges/', views.VideoWatchedRangesView.as_view(), name='video-stream-ranges'),
     
     # Video comments
     path('<int:pk>/comments/', views.VideoCommentListView.as_view(), name='video-comments'),
@@ -34,6 +37,7 @@ urlpatterns = [
     # Video analytics
     path('<int:pk>/analytics/', views.VideoAnalyticsView.as_view(), name='video-analytics'),
     path('analytics/summary/', views.VideoAnalyticsSummaryView.as_view(), name='video-analytics-summary'),
+    path('<int:pk>/retention/', views.VideoRetentionView.as_view(), name='video-retention'),
     
     # Video processing
     path('<int:pk>/process/', views.VideoProcessView.as_view(), name='video-process'),
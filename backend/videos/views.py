@@ -1,15 +1,29 @@
 # backend/videos/views.py
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied, ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import Video, VideoStream, VideoAnalytics, VideoComment, VideoBookmark
+from django.urls import reverse
+
+from core.views import ValuesListMixin
+
+from .heartbeats import apply_heartbeat, discard_heartbeat, record_heartbeat, stream_owner
+from .processing import enqueue_processing
+from .retention import record_ranges, retention_curve
+from .streaming import IgnoreClientContentNegotiation, can_stream, serve_video
+from .uploads import (
+    ChecksumMismatch, UploadError, cancel_upload, create_upload, parse_checksum, upload_offset, write_chunk,
+)
+from .models import Video, VideoStream, VideoAnalytics, VideoComment, VideoBookmark, VideoUpload, VideoRetention
 from .serializers import (
     VideoSerializer, VideoStreamSerializer, VideoAnalyticsSerializer,
-    VideoCommentSerializer, VideoBookmarkSerializer
+    VideoCommentSerializer, VideoBookmarkSerializer, VideoProcessingStatusSerializer,
+    VideoUploadSerializer, VideoHeartbeatSerializer, VideoWatchedRangesSerializer
 )
 
-class VideoListView(generics.ListAPIView):
+class VideoListView(ValuesListMixin, generics.ListAPIView):
     """List all videos."""
     queryset = Video.objects.filter(is_active=True).order_by('-created_at')
     serializer_class = VideoSerializer
@@ -22,10 +36,14 @@ class VideoDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 class VideoCreateView(generics.CreateAPIView):
-    """Create a new video."""
+    """Create a new video and queue it for processing."""
     serializer_class = VideoSerializer
     permission_classes = [IsAuthenticated]
 
+    def perform_create(self, serializer):
+        video = serializer.save()
+        transaction.on_commit(lambda: enqueue_processing(video))
+
 class VideoUpdateView(generics.UpdateAPIView):
     """Update a video."""
     queryset = Video.objects.all()
@@ -38,10 +56,18 @@ class VideoDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 class VideoStreamView(generics.RetrieveAPIView):
-    """Stream a video."""
-    queryset = Video.objects.filter(is_active=True)
-    serializer_class = VideoSerializer
-    permission_classes = [IsAuthenticated]
+    """Stream the video file, with HTTP range and conditional request support."""
+    queryset = Video.objects.filter(is_active=True).select_related('lesson__course')
+    permission_classes = [AllowAny]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def retrieve(self, request, *args, **kwargs):
+        video = self.get_object()
+        if not can_stream(request.user, video):
+            if not request.user.is_authenticated:
+                raise NotAuthenticated()
+            raise PermissionDenied('Enroll in the course to watch this video.')
+        return serve_video(request, video)
 
 class VideoStreamStartView(generics.CreateAPIView):
     """Start video streaming session."""
@@ -54,6 +80,18 @@ class VideoStreamEndView(generics.UpdateAPIView):
     serializer_class = VideoStreamSerializer
     permission_classes = [IsAuthenticated]
 
+    def perform_update(self, serializer):
+        # Save the buffered heartbeat along with the update, keeping the
+        # larger watch time, then drop it so a later flush cannot overwrite
+        # the row.
+        stream = apply_heartbeat(serializer.instance)
+        extra = {}
+        watch_time = serializer.validated_data.get('total_watch_time')
+        if watch_time is not None:
+            extra['total_watch_time'] = max(watch_time, stream.total_watch_time)
+        serializer.save(**extra)
+        discard_heartbeat(stream.pk)
+
 class VideoProgressView(generics.RetrieveAPIView):
     """Get video progress for a user."""
     serializer_class = VideoStreamSerializer
@@ -62,14 +100,80 @@ class VideoProgressView(generics.RetrieveAPIView):
     def get_object(self):
         video_id = self.kwargs['pk']
         user = self.request.user
-        return get_object_or_404(VideoStream, video_id=video_id, user=user)
+        return apply_heartbeat(get_object_or_404(VideoStream, video_id=video_id, user=user))
 
-class VideoProgressUpdateView(generics.UpdateAPIView):
-    """Update video progress."""
-    queryset = VideoStream.objects.all()
-    serializer_class = VideoStreamSerializer
+class VideoProgressUpdateView(generics.GenericAPIView):
+    """Record a player heartbeat; the stream row is written in periodic batches."""
+    serializer_class = VideoHeartbeatSerializer
+    permission_classes = [IsAuthenticated]
+
+    def update(self, request, *args, **kwargs):
+        stream_id = self.kwargs['pk']
+        if stream_owner(stream_id) != request.user.id:
+            raise NotFound()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        current_position, total_watch_time = record_heartbeat(
+            stream_id, request.user.id, **serializer.validated_data
+        )
+        return Response({
+            'id': stream_id, 'current_position': current_position, 'total_watch_time': total_watch_time,
+        })
+
+    def put(self, request, *args, **kwargs):
+        return self.update(request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        return self.update(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        return self.update(request, *args, **kwargs)
+
+class VideoWatchedRangesView(generics.GenericAPIView):
+    """Record the ranges of a video played in a streaming session."""
+    serializer_class = VideoWatchedRangesSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return VideoStream.objects.filter(user=self.request.user, ended_at__isnull=True).select_related('video')
+
+    def post(self, request, *args, **kwargs):
+        stream = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        record_ranges(stream, serializer.validated_data['ranges'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class VideoRetentionView(generics.GenericAPIView):
+    """Audience retention curve of a video, downsampled to ``?points=`` buckets."""
+    queryset = Video.objects.select_related('lesson__course')
+    permission_classes = [IsAuthenticated]
+    default_points = 100
+    max_points = 1000
+
+    def get_points(self):
+        try:
+            points = int(self.request.query_params.get('points', self.default_points))
+        except ValueError:
+            points = 0
+        if not 1 <= points <= self.max_points:
+            raise ValidationError({'points': f'Expected a number of points between 1 and {self.max_points}.'})
+        return points
+
+    def get(self, request, *args, **kwargs):
+        video = self.get_object()
+        user = request.user
+        if not (user.is_staff or video.lesson.course.instructor_id == user.id):
+            raise PermissionDenied('Only the course instructor can see the retention of this video.')
+        retention = VideoRetention.objects.filter(video=video).first() or VideoRetention(video=video)
+        return Response({
+            'video': video.pk,
+            'duration': video.duration,
+            'sessions': retention.sessions,
+            'updated_at': retention.updated_at,
+            'curve': retention_curve(retention, points=self.get_points(), duration=video.duration),
+        })
+
 class VideoCommentListView(generics.ListAPIView):
     """List comments for a video."""
     serializer_class = VideoCommentSerializer
@@ -77,7 +181,7 @@ class VideoCommentListView(generics.ListAPIView):
 
     def get_queryset(self):
         video_id = self.kwargs['pk']
-        return VideoComment.objects.filter(video_id=video_id, is_active=True)
+        return VideoComment.objects.filter(video_id=video_id, is_approved=True)
 
 class VideoCommentCreateView(generics.CreateAPIView):
     """Create a comment on a video."""
@@ -116,13 +220,16 @@ class VideoBookmarkDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
 class VideoAnalyticsView(generics.RetrieveAPIView):
-    """Get analytics for a specific video."""
+    """Get the latest daily analytics of a specific video."""
     serializer_class = VideoAnalyticsSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
         video_id = self.kwargs['pk']
-        return get_object_or_404(VideoAnalytics, video_id=video_id)
+        analytics = VideoAnalytics.objects.filter(video_id=video_id).order_by('-date').first()
+        if analytics is None:
+            raise NotFound()
+        return analytics
 
 class VideoAnalyticsSummaryView(generics.ListAPIView):
     """Get analytics summary for all videos."""
@@ -130,21 +237,101 @@ class VideoAnalyticsSummaryView(generics.ListAPIView):
     serializer_class = VideoAnalyticsSerializer
     permission_classes = [IsAuthenticated]
 
-class VideoProcessView(generics.CreateAPIView):
-    """Process a video."""
-    serializer_class = VideoSerializer
+class VideoProcessView(generics.GenericAPIView):
+    """Queue a video for (re)processing by the background workers."""
+    queryset = Video.objects.select_related('lesson__course')
+    serializer_class = VideoProcessingStatusSerializer
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        # Placeholder for video processing
-        return Response({"message": "Video processing started"}, status=status.HTTP_200_OK)
+        video = self.get_object()
+        user = request.user
+        if not (user.is_staff or video.lesson.course.instructor_id == user.id):
+            raise PermissionDenied('Only the course instructor can process this video.')
+        enqueue_processing(video)
+        video.refresh_from_db()
+        return Response(self.get_serializer(video).data, status=status.HTTP_202_ACCEPTED)
 
 class VideoProcessingStatusView(generics.RetrieveAPIView):
-    """Get video processing status."""
-    serializer_class = VideoSerializer
+    """Get the processing status of a video and its latest job."""
+    queryset = Video.objects.all()
+    serializer_class = VideoProcessingStatusSerializer
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, pk):
-        # Placeholder for processing status
-        return Response({"status": "completed"}, status=status.HTTP_200_OK)
+class VideoUploadCreateView(generics.CreateAPIView):
+    """Open a resumable upload of a video file for a lesson."""
+    serializer_class = VideoUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lesson = serializer.validated_data['lesson']
+        if not (request.user.is_staff or lesson.course.instructor_id == request.user.id):
+            raise PermissionDenied('Only the course instructor can upload videos to this lesson.')
+        upload = create_upload(request.user, **serializer.validated_data)
+        response = Response(self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(
+            reverse('videos:video-upload', kwargs={'pk': upload.pk})
+        )
+        response['Upload-Offset'] = 0
+        response['Upload-Length'] = upload.size
+        return response
+
+class VideoUploadView(generics.RetrieveDestroyAPIView):
+    """Resume a video upload.
+
+    ``HEAD`` reports the bytes received from the start (``Upload-Offset``),
+    ``GET`` also lists the missing ranges, ``PATCH`` writes the request body
+    at ``Upload-Offset`` and ``DELETE`` cancels the upload. Chunks may be
+    sent in parallel and in any order; the video is created and queued for
+    processing once every byte has arrived.
+    """
+    serializer_class = VideoUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return VideoUpload.objects.filter(user=self.request.user)
+
+    def upload_headers(self, response, upload):
+        response['Upload-Offset'] = upload_offset(upload)
+        response['Upload-Length'] = upload.size
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def head(self, request, *args, **kwargs):
+        return self.upload_headers(Response(status=status.HTTP_200_OK), self.get_object())
+
+    def patch(self, request, *args, **kwargs):
+        upload = self.get_object()
+        if request.content_type != 'application/offset+octet-stream':
+            return Response(
+                {'detail': 'Chunks must be sent as application/offset+octet-stream.'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'Upload-Offset and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            checksum = parse_checksum(request.headers.get('Upload-Checksum'))
+            upload = write_chunk(upload, offset, length, request.stream, checksum)
+        except UploadError as exc:
+            response = Response({'detail': str(exc)}, status=exc.status_code)
+            if isinstance(exc, ChecksumMismatch):
+                response.reason_phrase = 'Checksum Mismatch'
+            return response
+        if upload.status == 'completed':
+            return self.upload_headers(Response(self.get_serializer(upload).data), upload)
+        return self.upload_headers(Response(status=status.HTTP_204_NO_CONTENT), upload)
 
+    def destroy(self, request, *args, **kwargs):
+        upload = self.get_object()
+        if upload.status == 'finalizing':
+            return Response({'detail': 'The upload is being finalized.'}, status=status.HTTP_409_CONFLICT)
+        cancel_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)